@@ -0,0 +1,148 @@
+# ---------------------------------------------------------------------------- #
+
+import typer
+import json
+import pathlib
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, List, Optional
+
+# ---------------------------------------------------------------------------- #
+
+from .stages import compare
+
+# ---------------------------------------------------------------------------- #
+
+app = typer.Typer()
+
+ROOT = pathlib.Path(__file__).parent.parent
+
+MODULES = [
+    "pyghost.__main__",
+    "pyghost.ghost",
+    "pyghost.document",
+    "pyghost.matchers.regex",
+    "pyghost.matchers.spacy",
+    "pyghost.ocr.tesseract",
+    "pyghost.transformers.faker"
+]
+
+COMMANDS = {
+    "cli.help": ["-m", "pyghost", "--help"]
+}
+
+PROBE = """
+import time
+start = time.perf_counter()
+import {module}
+duration = time.perf_counter() - start
+import resource, sys
+sys.stdout.write(f"{{duration}} "
+                 f"{{resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}}")
+"""
+
+# ---------------------------------------------------------------------------- #
+
+
+def measure_module(module: str, repeat: int) -> dict[str, Any]:
+    """
+    Import a module in fresh interpreters and measure the import time and
+    the peak memory of the interpreter.
+    """
+    timings = []
+    memory = 0
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module)],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.split()
+        timings.append(float(output[0]))
+        memory = max(memory, int(output[1]) * 1024)
+
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.mean(timings),
+        "repeat": repeat,
+        "peak_memory": memory
+    }
+
+
+def measure_command(arguments: List[str], repeat: int) -> dict[str, Any]:
+    """
+    Measure the wall time of a command, including interpreter startup.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *arguments], cwd=ROOT,
+                       capture_output=True, check=True)
+        timings.append(time.perf_counter() - start)
+
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.mean(timings),
+        "repeat": repeat,
+        "peak_memory": 0
+    }
+
+# ---------------------------------------------------------------------------- #
+
+
+@app.command()
+def run(
+    module: Optional[List[str]] = None,
+    repeat: int = 5,
+    save: Optional[pathlib.Path] = None,
+    baseline: Optional[pathlib.Path] = None,
+    tolerance: float = 1.25
+) -> None:
+    """
+    Benchmark the import time of pyghost modules and the startup time of the
+    cli in fresh interpreters.
+    """
+    results: dict[str, Any] = {}
+    for name in module or MODULES:
+        key = f"import.{name}"
+        try:
+            results[key] = measure_module(module=name, repeat=repeat)
+            print(f"{key:50} {results[key]['median']*1000:10.2f} ms "
+                  f"{results[key]['peak_memory']/1024:10.0f} KiB")
+        except subprocess.CalledProcessError as exception:
+            results[key] = {"skipped": exception.stderr.strip()[-200:]}
+            print(f"{key:50} skipped")
+
+    for key, arguments in COMMANDS.items():
+        results[key] = measure_command(arguments=arguments, repeat=repeat)
+        print(f"{key:50} {results[key]['median']*1000:10.2f} ms")
+
+    if save:
+        with save.open("w", encoding="utf-8") as file:
+            json.dump({
+                "python": sys.version,
+                "platform": platform.platform(),
+                "repeat": repeat,
+                "timestamp": time.time(),
+                "results": results
+            }, file, indent=4)
+
+    if baseline:
+        with baseline.open("r", encoding="utf-8") as file:
+            previous = json.load(file)
+
+        regressions = compare(results=results, baseline=previous["results"],
+                              tolerance=tolerance)
+        if regressions:
+            print(f"Regressions: {', '.join(regressions)}")
+            raise typer.Exit(code=1)
+
+# ---------------------------------------------------------------------------- #
+
+if __name__ == "__main__":
+    app()
+
+# ---------------------------------------------------------------------------- #
@@ -0,0 +1,443 @@
+# ---------------------------------------------------------------------------- #
+
+import typer
+import concurrent.futures
+import enum
+import json
+import math
+import os
+import pathlib
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, List, Optional
+
+# ---------------------------------------------------------------------------- #
+
+from .synthetic import Generator
+
+# ---------------------------------------------------------------------------- #
+
+app = typer.Typer()
+
+# pdf2image rasterizes pdfs with 200 dpi
+PDF_DPI = 200
+
+# ---------------------------------------------------------------------------- #
+
+
+class Mode(str, enum.Enum):
+    LIBRARY = "library"
+    CLI = "cli"
+
+
+class Format(str, enum.Enum):
+    PDF = "pdf"
+    PNG = "png"
+
+# ---------------------------------------------------------------------------- #
+
+
+def generate(
+    directory: pathlib.Path,
+    documents: int,
+    pages: int,
+    format: Format,
+    dpi: int,
+    size: int,
+    seed: int
+) -> dict[str, Any]:
+    """
+    Generate synthetic documents and return their ground truth: for each
+    file and page the size of the rasterized page and the boxes of each
+    placed entity, in the pixels pyghost will see.
+    """
+    generator = Generator(seed=seed)
+
+    if format == Format.PNG:
+        pages = 1
+
+    truth: dict[str, Any] = {}
+    for index in range(documents):
+        filename = directory / f"document{index}.{format.value}"
+
+        scale = PDF_DPI / dpi if format == Format.PDF else 1.0
+
+        images = []
+        expected = []
+        for _ in range(pages):
+            page = generator.page(size=size, dpi=dpi)
+            images.append(page.image)
+
+            entities = []
+            for entity in page.entities:
+                boxes = [[round(value * scale) for value in
+                          (word.coordinates.left, word.coordinates.top,
+                           word.coordinates.width, word.coordinates.height)]
+                         for word in page.ocr.words
+                         if word.coordinates and word.start >= entity.start
+                         and word.end <= entity.end]
+                entities.append({"label": entity.label, "text": entity.text,
+                                 "boxes": boxes})
+
+            expected.append({
+                "size": [round(page.image.width * scale),
+                         round(page.image.height * scale)],
+                "entities": entities
+            })
+
+        if format == Format.PDF:
+            images[0].save(filename, save_all=True,
+                           append_images=images[1:], resolution=dpi)
+        else:
+            images[0].save(filename)
+
+        truth[str(filename)] = expected
+
+    return truth
+
+
+def percentiles(values: List[float]) -> dict[str, float]:
+    """
+    Return the nearest-rank percentiles and the mean of a list of values.
+    """
+    if not values:
+        return {}
+
+    ordered = sorted(values)
+
+    def rank(percent: float) -> float:
+        return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+    return {
+        "p50": rank(50),
+        "p95": rank(95),
+        "p99": rank(99),
+        "max": ordered[-1],
+        "mean": statistics.mean(ordered)
+    }
+
+
+def recall(
+    expected: List[dict[str, Any]],
+    matches: dict[int, List[Any]]
+) -> dict[str, List[int]]:
+    """
+    Count the found and placed entities by label. An entity has been found
+    if the center of each of its words lies inside a word touched by a match
+    on the same page.
+    """
+    result: dict[str, List[int]] = {}
+    for page, content in enumerate(expected):
+        touched = [word["coordinates"] for match in matches.get(page, [])
+                   for word in match["touched"] if word.get("coordinates")]
+
+        for entity in content["entities"]:
+            counts = result.setdefault(entity["label"], [0, 0])
+            counts[1] += 1
+
+            found = len(entity["boxes"]) > 0
+            for (left, top, width, height) in entity["boxes"]:
+                x = left + width / 2
+                y = top + height / 2
+                if not any(box["left"] <= x <= box["left"] + box["width"] and
+                           box["top"] <= y <= box["top"] + box["height"]
+                           for box in touched):
+                    found = False
+                    break
+
+            if found:
+                counts[0] += 1
+
+    return result
+
+# ---------------------------------------------------------------------------- #
+
+# every worker process of the library mode keeps one Ghost and one Document,
+# like a long running service would
+
+_worker: dict[str, Any] = {}
+
+
+def _initialize_worker(
+    language: str,
+    configfile: Optional[pathlib.Path],
+    ocr: Optional[str],
+    transformer: Optional[str]
+) -> None:
+    """
+    Initialize Ghost and Document in a worker process.
+    """
+    from pyghost.__main__ import load_config
+    from pyghost.document import Document
+    from pyghost.ghost import Ghost
+    from pyghost.metrics import Metrics
+
+    config = load_config(configfile=configfile)
+    metrics = Metrics()
+
+    _worker["metrics"] = metrics
+    _worker["ghost"] = Ghost(language=language, config=config,
+                             transformer=transformer, metrics=metrics)
+    _worker["document"] = Document(language=language, config=config,
+                                   ocr_provider=ocr, metrics=metrics)
+
+
+def _process_library(
+    filename: pathlib.Path,
+    output: pathlib.Path
+) -> dict[str, Any]:
+    """
+    Process a document in a worker process like the doc command does and
+    return its latency, stage timings, and matches.
+    """
+    metrics = _worker["metrics"]
+    ghost = _worker["ghost"]
+    document = _worker["document"]
+
+    metrics.reset()
+    start = time.perf_counter()
+
+    document.load(filename=filename)
+
+    found = ghost.find_document_matches(pages=document.ocr)
+
+    matches = {}
+    transformations = {}
+    for page, ocr in enumerate(document.ocr):
+        if document.is_blank(page=page):
+            continue
+
+        transformations[page] = ghost.transform_text(
+            text=ocr.text, matches=found[page], words=ocr.words)
+        matches[page] = [match.model_dump(mode="json")
+                         for match in found[page]]
+
+    document.manipulate_pages(transformers=transformations)
+    document.save(filename=output / f"out_{filename.stem}.jpg")
+
+    return {
+        "file": str(filename),
+        "latency": time.perf_counter() - start,
+        "pages": len(document.images),
+        "stages": {stage: values["total"] for stage, values
+                   in metrics.snapshot()["stages"].items()},
+        "matches": matches,
+        "rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    }
+
+
+def drive_library(
+    files: List[pathlib.Path],
+    output: pathlib.Path,
+    concurrency: int,
+    language: str,
+    config: Optional[pathlib.Path],
+    ocr: Optional[str],
+    transformer: Optional[str]
+) -> List[dict[str, Any]]:
+    """
+    Process the documents with the library in worker processes.
+    """
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=concurrency,
+        initializer=_initialize_worker,
+        initargs=(language, config, ocr, transformer)
+    ) as pool:
+        futures = [pool.submit(_process_library, filename, output)
+                   for filename in files]
+
+        return [future.result() for future in futures]
+
+
+def _process_cli(
+    filename: pathlib.Path,
+    output: pathlib.Path,
+    arguments: List[str]
+) -> dict[str, Any]:
+    """
+    Process a document with the doc command in a fresh interpreter and
+    return its latency, stage timings, and matches.
+    """
+    metricsfile = output / f"{filename.stem}.metrics.json"
+    exportfile = output / f"{filename.stem}.jsonl"
+
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", "pyghost", "doc", *arguments, str(filename),
+         "--output", str(output / f"out_{filename.stem}.jpg"),
+         "--metrics", str(metricsfile),
+         "--export-matches", str(exportfile), "--no-export-text",
+         "--log", "WARNING"],
+        check=True, capture_output=True, text=True
+    )
+    latency = time.perf_counter() - start
+
+    with metricsfile.open("r", encoding="utf-8") as file:
+        metrics = json.load(file)
+
+    matches = {}
+    with exportfile.open("r", encoding="utf-8") as file:
+        for line in file:
+            record = json.loads(line)
+            matches[record["page"]] = record["matches"]
+
+    return {
+        "file": str(filename),
+        "latency": latency,
+        "pages": metrics["counters"].get("pages", 0),
+        "stages": {stage: values["total"] for stage, values
+                   in metrics["stages"].items()},
+        "matches": matches,
+        "rss": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    }
+
+
+def drive_cli(
+    files: List[pathlib.Path],
+    output: pathlib.Path,
+    concurrency: int,
+    language: str,
+    config: Optional[pathlib.Path],
+    ocr: Optional[str],
+    transformer: Optional[str],
+    snapshot: Optional[pathlib.Path]
+) -> List[dict[str, Any]]:
+    """
+    Process the documents with one doc command per document, with the
+    given number of commands running at the same time.
+    """
+    # a snapshot already contains its configuration
+    arguments = [language]
+    for option, value in [("--config", None if snapshot else config),
+                          ("--ocr", ocr),
+                          ("--transformer", transformer),
+                          ("--snapshot", snapshot)]:
+        if value:
+            arguments += [option, str(value)]
+
+    with concurrent.futures.ThreadPoolExecutor(
+            max_workers=concurrency) as pool:
+        futures = [pool.submit(_process_cli, filename, output, arguments)
+                   for filename in files]
+
+        return [future.result() for future in futures]
+
+# ---------------------------------------------------------------------------- #
+
+
+@app.command()
+def run(
+    documents: int = 20,
+    pages: int = 2,
+    format: Format = Format.PDF,
+    dpi: int = 150,
+    size: int = 2000,
+    seed: int = 0,
+    mode: Mode = Mode.LIBRARY,
+    concurrency: int = 1,
+    language: str = "en",
+    config: Optional[pathlib.Path] = None,
+    ocr: Optional[str] = None,
+    transformer: Optional[str] = None,
+    snapshot: Optional[pathlib.Path] = None,
+    directory: Optional[pathlib.Path] = None,
+    save: Optional[pathlib.Path] = None
+) -> None:
+    """
+    Run the full doc pipeline on synthetic documents and report throughput,
+    latency percentiles per stage, peak memory, and the recall of the placed
+    entities.
+    """
+    with tempfile.TemporaryDirectory() as temporary:
+        folder = directory or pathlib.Path(temporary)
+        folder.mkdir(parents=True, exist_ok=True)
+        output = folder / "output"
+        output.mkdir(exist_ok=True)
+
+        truth = generate(directory=folder, documents=documents, pages=pages,
+                         format=format, dpi=dpi, size=size, seed=seed)
+        files = [pathlib.Path(filename) for filename in truth]
+
+        start = time.perf_counter()
+        if mode == Mode.LIBRARY:
+            results = drive_library(
+                files=files, output=output, concurrency=concurrency,
+                language=language, config=config, ocr=ocr,
+                transformer=transformer)
+        else:
+            results = drive_cli(
+                files=files, output=output, concurrency=concurrency,
+                language=language, config=config, ocr=ocr,
+                transformer=transformer, snapshot=snapshot)
+        duration = time.perf_counter() - start
+
+    total_pages = sum(result["pages"] for result in results)
+
+    stages: dict[str, List[float]] = {}
+    for result in results:
+        for stage, seconds in result["stages"].items():
+            stages.setdefault(stage, []).append(seconds)
+
+    found: dict[str, List[int]] = {}
+    for result in results:
+        counts = recall(expected=truth[result["file"]],
+                        matches={int(page): matches for page, matches
+                                 in result["matches"].items()})
+        for label, (hits, placed) in counts.items():
+            found.setdefault(label, [0, 0])
+            found[label][0] += hits
+            found[label][1] += placed
+
+    # ru_maxrss is reported in KiB on linux and in bytes on macos
+    unit = 1 if sys.platform == "darwin" else 1024
+    report: dict[str, Any] = {
+        "mode": mode.value,
+        "concurrency": concurrency,
+        "documents": len(results),
+        "pages": total_pages,
+        "duration": duration,
+        "pages_per_second": total_pages / duration,
+        "documents_per_second": len(results) / duration,
+        "latency": percentiles([result["latency"] for result in results]),
+        "stages": {stage: percentiles(values)
+                   for stage, values in stages.items()},
+        "peak_rss": max([result["rss"] * unit for result in results] +
+                        [resource.getrusage(
+                            resource.RUSAGE_SELF).ru_maxrss * unit]),
+        "recall": {label: hits / max(placed, 1)
+                   for label, (hits, placed) in sorted(found.items())}
+    }
+
+    print(f"{report['documents']} documents, {report['pages']} pages in "
+          f"{duration:.2f} s: {report['pages_per_second']:.2f} pages/s, "
+          f"peak rss {report['peak_rss'] / 1024 / 1024:.0f} MiB")
+    print(f"{'stage':30} {'p50':>10} {'p95':>10} {'p99':>10}")
+    for stage, values in [("document", report["latency"]),
+                          *report["stages"].items()]:
+        print(f"{stage:30} {values['p50']*1000:8.1f}ms "
+              f"{values['p95']*1000:8.1f}ms {values['p99']*1000:8.1f}ms")
+    for label, value in report["recall"].items():
+        print(f"recall {label:23} {value:10.2%}")
+
+    if save:
+        with save.open("w", encoding="utf-8") as file:
+            json.dump({
+                "python": sys.version,
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "seed": seed,
+                "timestamp": time.time(),
+                "report": report
+            }, file, indent=4)
+
+# ---------------------------------------------------------------------------- #
+
+if __name__ == "__main__":
+    app()
+
+# ---------------------------------------------------------------------------- #
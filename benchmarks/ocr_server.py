@@ -0,0 +1,145 @@
+# ---------------------------------------------------------------------------- #
+
+import typer
+import base64
+import enum
+import http.server
+import io
+import json
+import threading
+import time
+from PIL import Image
+from typing import Any, List
+
+# ---------------------------------------------------------------------------- #
+
+from .synthetic import Generator
+
+# ---------------------------------------------------------------------------- #
+
+app = typer.Typer()
+
+# ---------------------------------------------------------------------------- #
+
+
+class Engine(str, enum.Enum):
+    TESSERACT = "tesseract"
+    SYNTHETIC = "synthetic"
+
+# ---------------------------------------------------------------------------- #
+
+
+class OcrHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Answer the requests of pyghost's HttpOcr: a JSON body with base64
+    encoded images in, a JSON body with one OCR result per image out.
+    """
+    server: "OcrServer"
+
+    def do_POST(self) -> None:
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            content = json.loads(self.rfile.read(length))
+
+            images = [Image.open(io.BytesIO(base64.b64decode(image)))
+                      for image in content["images"]]
+
+            results = self.server.recognize(images=images)
+        except Exception as exception:
+            self.send_error(500, str(exception))
+            return
+
+        body = json.dumps({"results": results}).encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class OcrServer(http.server.ThreadingHTTPServer):
+    """
+    A local stand-in for a shared OCR service. It recognizes pages with
+    Tesseract, or returns synthetic results after a simulated latency to
+    measure pyghost's side of the pipeline without any OCR cost.
+    """
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        engine: Engine,
+        lang: str,
+        latency: float,
+        seed: int
+    ) -> None:
+        super().__init__(address, OcrHandler)
+        self.engine = engine
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._generator = Generator(seed=seed)
+
+        if engine == Engine.TESSERACT:
+            from pyghost.ocr import TesseractOcr
+
+            self._tesseract = TesseractOcr(config={"lang": lang})
+
+    def recognize(self, images: List[Image.Image]) -> List[dict[str, Any]]:
+        """
+        Return the OCR results of a batch of images as JSON.
+        """
+        with self._lock:
+            self.requests += 1
+
+        if self.engine == Engine.TESSERACT:
+            return [self._tesseract.process_image(image=image).model_dump(
+                mode="json") for image in images]
+
+        time.sleep(self.latency * len(images))
+
+        # the generator is not thread-safe
+        with self._lock:
+            pages = [self._generator.page(size=2000).ocr for _ in images]
+
+        return [page.model_dump(mode="json") for page in pages]
+
+# ---------------------------------------------------------------------------- #
+
+
+@app.command()
+def run(
+    host: str = "127.0.0.1",
+    port: int = 8080,
+    engine: Engine = Engine.SYNTHETIC,
+    lang: str = "eng",
+    latency: float = 0.2,
+    seed: int = 0
+) -> None:
+    """
+    Serve OCR requests of the HttpOcr provider until interrupted. The
+    synthetic engine waits latency seconds per page.
+    """
+    server = OcrServer(address=(host, port), engine=engine, lang=lang,
+                       latency=latency, seed=seed)
+
+    print(f"Serving {engine.value} OCR on http://{host}:{port}/ocr")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Served {server.requests} requests.")
+
+# ---------------------------------------------------------------------------- #
+
+if __name__ == "__main__":
+    app()
+
+# ---------------------------------------------------------------------------- #
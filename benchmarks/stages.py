@@ -0,0 +1,330 @@
+# ---------------------------------------------------------------------------- #
+
+import typer
+import json
+import pathlib
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, List, Optional
+
+# ---------------------------------------------------------------------------- #
+
+from pyghost.models import Config
+from .synthetic import DPIS, SIZES, Generator
+
+# ---------------------------------------------------------------------------- #
+
+app = typer.Typer()
+
+CONFIG = pathlib.Path(__file__).parent.parent / \
+    pathlib.Path("pyghost/config/default.json")
+
+Workload = Callable[[], Any]
+
+# ---------------------------------------------------------------------------- #
+
+
+def load_config(configfile: Optional[pathlib.Path] = None) -> Config:
+    """
+    Load a pyghost configuration, the default one if no file is given.
+    """
+    with (configfile or CONFIG).open("r", encoding="utf-8") as file:
+        return Config(**json.load(file))
+
+
+def matcher_config(config: Config, cls: str) -> Config:
+    """
+    Return a copy of the configuration that only keeps the english matchers
+    of the given class.
+    """
+    return config.model_copy(update={
+        "matchers": [matcher for matcher in config.matchers
+                     if matcher.cls == cls and "en" in matcher.languages]
+    })
+
+# ---------------------------------------------------------------------------- #
+
+
+def bench_get_words(generator: Generator, size: str) -> Workload:
+    from pyghost.text import Text
+
+    text = generator.text(size=SIZES[size]).text
+
+    return lambda: Text().get_words(text=text)
+
+
+def bench_regex(generator: Generator, size: str) -> Workload:
+    from pyghost.ghost import Ghost
+
+    text = generator.text(size=SIZES[size]).text
+    ghost = Ghost(language="en",
+                  config=matcher_config(CONFIG_CACHE, cls="RegexMatcher"))
+
+    def workload() -> None:
+        for matcher in ghost.matchers.values():
+            matcher.process(text=text)
+
+    return workload
+
+
+def bench_spacy(generator: Generator, size: str) -> Workload:
+    from pyghost.ghost import Ghost
+
+    text = generator.text(size=SIZES[size]).text
+    ghost = Ghost(language="en",
+                  config=matcher_config(CONFIG_CACHE, cls="SpacyMatcher"))
+    matcher = next(iter(ghost.matchers.values()))
+
+    return lambda: matcher.process(text=text)
+
+
+def bench_touched_words(generator: Generator, size: str) -> Workload:
+    from pyghost.ghost import Ghost
+    from pyghost.text import Text
+
+    synthetic = generator.text(size=SIZES[size])
+    words = Text().get_words(text=synthetic.text)
+    ghost = Ghost(language="en",
+                  config=matcher_config(CONFIG_CACHE, cls="RegexMatcher"))
+
+    return lambda: ghost.get_touched_words(
+        matches=synthetic.entities, words=words)
+
+
+def bench_get_fake(generator: Generator, size: str) -> Workload:
+    from pyghost.ghost import Ghost
+
+    synthetic = generator.text(size=SIZES[size])
+    ghost = Ghost(language="en", config=matcher_config(
+        CONFIG_CACHE, cls="RegexMatcher"), transformer="FakerEN")
+    transformer: Any = ghost.transformer
+
+    # load the faker files outside of the measurement
+    for entity in synthetic.entities:
+        transformer.load_file(label=entity.label)
+
+    def workload() -> None:
+        for entity in synthetic.entities:
+            for text in entity.text.split(" "):
+                transformer.get_fake(label=entity.label, text=text)
+
+    return workload
+
+
+def bench_randomize_text(generator: Generator, size: str) -> Workload:
+    from pyghost.ghost import Ghost
+
+    text = generator.text(size=SIZES[size]).text
+    ghost = Ghost(language="en", config=matcher_config(
+        CONFIG_CACHE, cls="RegexMatcher"), transformer="FakerEN")
+    transformer: Any = ghost.transformer
+
+    return lambda: transformer.randomize_text(text=text)
+
+
+def bench_apply_transformations(generator: Generator, size: str) -> Workload:
+    from pyghost.ghost import Ghost
+    from pyghost.text import Text
+
+    synthetic = generator.text(size=SIZES[size])
+    ghost = Ghost(language="en", config=matcher_config(
+        CONFIG_CACHE, cls="RegexMatcher"), transformer="Label")
+
+    words = Text().get_words(text=synthetic.text)
+    matches = ghost.get_touched_words(matches=synthetic.entities, words=words)
+    transformations = ghost.transformer.create_transformations(
+        matches=matches)
+
+    def workload() -> None:
+        ghost.transformer.apply_transformations(
+            text=synthetic.text,
+            transformations=transformations,
+            words=words
+        )
+
+    return workload
+
+
+def bench_tesseract(generator: Generator, size: str) -> Workload:
+    from pyghost.ocr import TesseractOcr
+
+    page = generator.page(dpi=DPIS[size])
+    ocr = TesseractOcr(config={"lang": "eng"})
+
+    return lambda: ocr.process_image(image=page.image)
+
+
+def bench_manipulate_page(generator: Generator, size: str) -> Workload:
+    from pyghost.document import Document
+    from pyghost.ghost import Ghost
+
+    page = generator.page(dpi=DPIS[size])
+    ghost = Ghost(language="en", config=matcher_config(
+        CONFIG_CACHE, cls="RegexMatcher"), transformer="Label")
+    document = Document(language="en", config=CONFIG_CACHE)
+
+    matches = ghost.get_touched_words(
+        matches=page.entities, words=page.ocr.words)
+    result = ghost.transform_text(
+        text=page.ocr.text, matches=matches, words=page.ocr.words)
+
+    def workload() -> None:
+        document.images = [page.image.copy()]
+        document.manipulate_page(page=0, transformer=result)
+
+    return workload
+
+
+def bench_add_text_to_rectangle(generator: Generator, size: str) -> Workload:
+    from PIL import ImageDraw
+    from pyghost.document import Document
+
+    page = generator.page(dpi=DPIS[size])
+    document = Document(language="en", config=CONFIG_CACHE)
+    draw = ImageDraw.Draw(page.image)
+    words = [word for word in page.ocr.words if word.coordinates][:50]
+
+    def workload() -> None:
+        for word in words:
+            assert word.coordinates
+            document.add_text_to_rectangle(
+                draw=draw,
+                coordinates=word.coordinates,
+                text="<person>",
+                max_font_size=CONFIG_CACHE.document.max_font_size
+            )
+
+    return workload
+
+
+BENCHMARKS: dict[str, Callable[[Generator, str], Workload]] = {
+    "text.get_words": bench_get_words,
+    "regex.process": bench_regex,
+    "spacy.process": bench_spacy,
+    "ghost.get_touched_words": bench_touched_words,
+    "faker.get_fake": bench_get_fake,
+    "faker.randomize_text": bench_randomize_text,
+    "transformer.apply_transformations": bench_apply_transformations,
+    "tesseract.process_image": bench_tesseract,
+    "document.manipulate_page": bench_manipulate_page,
+    "document.add_text_to_rectangle": bench_add_text_to_rectangle
+}
+
+CONFIG_CACHE: Config
+
+# ---------------------------------------------------------------------------- #
+
+
+def measure(workload: Workload, repeat: int) -> dict[str, Any]:
+    """
+    Measure the run time of a workload over several runs and its peak memory
+    allocation in a separate run.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        workload()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    workload()
+    (_, peak) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.mean(timings),
+        "repeat": repeat,
+        "peak_memory": peak
+    }
+
+
+def compare(
+    results: dict[str, Any],
+    baseline: dict[str, Any],
+    tolerance: float
+) -> List[str]:
+    """
+    Compare results with a baseline and return the list of regressions.
+    """
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline or "median" not in result or \
+                "median" not in baseline[key]:
+            continue
+
+        ratio = result["median"] / max(baseline[key]["median"], 1e-9)
+        memory = result["peak_memory"] / \
+            max(baseline[key]["peak_memory"], 1)
+        print(f"{key:50} time x{ratio:6.2f}   memory x{memory:6.2f}")
+
+        if ratio > tolerance or memory > tolerance:
+            regressions.append(key)
+
+    return regressions
+
+# ---------------------------------------------------------------------------- #
+
+
+@app.command()
+def run(
+    stage: Optional[List[str]] = None,
+    size: Optional[List[str]] = None,
+    repeat: int = 5,
+    seed: int = 0,
+    config: Optional[pathlib.Path] = None,
+    save: Optional[pathlib.Path] = None,
+    baseline: Optional[pathlib.Path] = None,
+    tolerance: float = 1.25
+) -> None:
+    """
+    Benchmark the pyghost stages on synthetic data. Results can be saved as
+    a baseline and compared with an earlier baseline.
+    """
+    global CONFIG_CACHE
+    CONFIG_CACHE = load_config(configfile=config)
+
+    results: dict[str, Any] = {}
+    for name in stage or list(BENCHMARKS.keys()):
+        for size_name in size or list(SIZES.keys()):
+            key = f"{name}[{size_name}]"
+            try:
+                workload = BENCHMARKS[name](Generator(seed=seed), size_name)
+                results[key] = measure(workload=workload, repeat=repeat)
+                print(f"{key:50} {results[key]['median']*1000:10.2f} ms "
+                      f"{results[key]['peak_memory']/1024:10.0f} KiB")
+            except Exception as exception:
+                results[key] = {"skipped": repr(exception)}
+                print(f"{key:50} skipped ({exception!r})")
+
+    if save:
+        with save.open("w", encoding="utf-8") as file:
+            json.dump({
+                "python": sys.version,
+                "platform": platform.platform(),
+                "seed": seed,
+                "repeat": repeat,
+                "timestamp": time.time(),
+                "results": results
+            }, file, indent=4)
+
+    if baseline:
+        with baseline.open("r", encoding="utf-8") as file:
+            previous = json.load(file)
+
+        regressions = compare(results=results, baseline=previous["results"],
+                              tolerance=tolerance)
+        if regressions:
+            print(f"Regressions: {', '.join(regressions)}")
+            raise typer.Exit(code=1)
+
+# ---------------------------------------------------------------------------- #
+
+if __name__ == "__main__":
+    app()
+
+# ---------------------------------------------------------------------------- #
@@ -0,0 +1,217 @@
+# ---------------------------------------------------------------------------- #
+
+import pathlib
+import random
+from PIL import Image, ImageDraw, ImageFont
+from typing import List, Tuple
+
+# ---------------------------------------------------------------------------- #
+
+from pyghost.models import Coordinates, Match, OcrResult, Word
+from pyghost.text import Text
+
+# ---------------------------------------------------------------------------- #
+
+DATA = pathlib.Path(__file__).parent.parent / pathlib.Path("pyghost/data")
+FONT = pathlib.Path(__file__).parent.parent / \
+    pathlib.Path("pyghost/fonts/Roboto-Regular.ttf")
+
+FILLER = [
+    "the", "policy", "claim", "insurance", "letter", "regarding", "your",
+    "contract", "number", "dear", "customer", "we", "received", "payment",
+    "of", "and", "for", "with", "please", "contact", "us", "if", "you",
+    "have", "any", "questions.", "sincerely,", "damage", "vehicle", "house",
+    "on", "date", "in", "was", "reported", "by", "to", "a", "an", "at",
+    "premium", "amount", "due", "office", "department", "reference,"
+]
+
+SIZES = {
+    "small": 1000,
+    "medium": 10000,
+    "large": 100000
+}
+
+DPIS = {
+    "small": 75,
+    "medium": 150,
+    "large": 300
+}
+
+# ---------------------------------------------------------------------------- #
+
+
+class SyntheticText():
+    """
+    A synthetic text together with the entities that have been placed in it.
+    """
+    text: str
+    entities: List[Match]
+
+    def __init__(self, text: str, entities: List[Match]) -> None:
+        self.text = text
+        self.entities = entities
+
+
+class SyntheticPage():
+    """
+    A synthetic page image together with its (perfect) OCR result and the
+    entities that have been placed on it.
+    """
+    image: Image.Image
+    ocr: OcrResult
+    entities: List[Match]
+
+    def __init__(
+        self,
+        image: Image.Image,
+        ocr: OcrResult,
+        entities: List[Match]
+    ) -> None:
+        self.image = image
+        self.ocr = ocr
+        self.entities = entities
+
+# ---------------------------------------------------------------------------- #
+
+
+class Generator():
+    """
+    The Generator creates reproducible synthetic texts and pages that contain
+    fake personal data from the bundled faker files.
+    """
+    random: random.Random
+    entity_ratio: float
+    pools: dict[str, List[str]]
+
+    def __init__(self, seed: int = 0, entity_ratio: float = 0.1) -> None:
+        """
+        Initialize the generator with a seed.
+        """
+        self.random = random.Random(seed)
+        self.entity_ratio = entity_ratio
+        self.pools = {}
+
+        for label, filename in [("person", "fake-name-en.txt"),
+                                ("organization", "fake-organization-en.txt"),
+                                ("location", "fake-location-en.txt"),
+                                ("email", "fake-email-en.txt")]:
+            with (DATA / filename).open("r", encoding="utf-8") as file:
+                self.pools[label] = [line for line in file.read().splitlines()
+                                     if len(line) > 0]
+
+    def entity(self) -> Tuple[str, str]:
+        """
+        Return a random (label, text) entity.
+        """
+        label = self.random.choice(
+            ["person", "organization", "location", "email", "phone", "iban"])
+
+        if label == "person":
+            text = f"{self.random.choice(self.pools['person'])} " \
+                f"{self.random.choice(self.pools['person'])}"
+        elif label == "phone":
+            text = f"(+{self.random.randint(10, 99)}) " \
+                f"{self.random.randint(100, 9999)} " \
+                f"{self.random.randint(100000, 9999999)}"
+        elif label == "iban":
+            digits = "".join(self.random.choice("0123456789")
+                             for _ in range(20))
+            text = f"DE{digits[:2]} " + " ".join(
+                digits[index:index+4] for index in range(2, 18, 4)) + \
+                f" {digits[18:]}"
+        else:
+            text = self.random.choice(self.pools[label])
+
+        return (label, text)
+
+    def text(self, size: int) -> SyntheticText:
+        """
+        Generate a text of roughly the given number of characters.
+        """
+        tokens: List[str] = []
+        entities = []
+        length = 0
+        while length < size:
+            if self.random.random() < self.entity_ratio:
+                (label, text) = self.entity()
+                start = length + (1 if tokens else 0)
+                entities.append(
+                    Match(
+                        label=label,
+                        matcher="synthetic",
+                        text=text,
+                        start=start,
+                        end=start+len(text)
+                    )
+                )
+            else:
+                text = self.random.choice(FILLER)
+
+            length += len(text) + (1 if tokens else 0)
+            tokens.append(text)
+
+        return SyntheticText(text=" ".join(tokens), entities=entities)
+
+    def page(self, size: int = 2000, dpi: int = 150) -> SyntheticPage:
+        """
+        Render a synthetic text of roughly the given number of characters onto
+        an A4 page image with the given resolution. Text that does not fit
+        onto the page is dropped.
+        """
+        synthetic = self.text(size=size)
+
+        width = int(8.27 * dpi)
+        height = int(11.69 * dpi)
+        font_size = int(dpi / 6.25)
+        margin = int(dpi / 2)
+
+        image = Image.new("RGB", (width, height), "#ffffff")
+        draw = ImageDraw.Draw(image)
+        font = ImageFont.truetype(FONT, font_size)
+
+        line_height = int(font_size * 1.5)
+        space = int(draw.textlength(" ", font=font))
+
+        words = []
+        text = ""
+        left = margin
+        top = margin
+        for word in Text().get_words(text=synthetic.text):
+            box = draw.textbbox((0, 0), word.text, font=font)
+            if left + box[2] > width - margin:
+                left = margin
+                top += line_height
+
+            if top + line_height > height - margin:
+                break
+
+            draw.text((left, top), word.text, font=font, fill="#000000")
+
+            words.append(
+                Word(
+                    text=word.text,
+                    start=word.start,
+                    end=word.end,
+                    page=0,
+                    coordinates=Coordinates(
+                        left=left,
+                        top=top,
+                        width=box[2],
+                        height=box[3]
+                    )
+                )
+            )
+            text = synthetic.text[:word.end]
+
+            left += box[2] + space
+
+        entities = [entity for entity in synthetic.entities
+                    if entity.end <= len(text)]
+
+        return SyntheticPage(
+            image=image,
+            ocr=OcrResult(text=text, words=words),
+            entities=entities
+        )
+
+# ---------------------------------------------------------------------------- #
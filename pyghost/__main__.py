@@ -7,17 +7,23 @@ import sys
 import pathlib
 import json
 import pydantic
+import cProfile
 from typing import Any, Optional, List
 
 # ---------------------------------------------------------------------------- #
 
-from .ghost import Ghost
-from .text import Text
-from .document import Document
+from .deadline import Deadline
+from .metrics import Metrics
 from .models import Config, GhostResult
 
 # ---------------------------------------------------------------------------- #
 
+# ghost and document (and with them pdf2image, pillow, and the configured
+# matchers like spacy) are imported inside the commands that need them to
+# keep the startup of the cli fast
+
+# ---------------------------------------------------------------------------- #
+
 app = typer.Typer()
 
 # ---------------------------------------------------------------------------- #
@@ -76,6 +82,39 @@ def load_config(
 # ---------------------------------------------------------------------------- #
 
 
+def load_snapshot(
+    snapshotfile: pathlib.Path,
+    language: str,
+    configfile: Optional[pathlib.Path] = None,
+    transformer: Optional[str] = None,
+    ocr: Optional[str] = None
+) -> Any:
+    """
+    Load a compiled snapshot, make sure it fits the language, and switch to
+    the given transformer and OCR provider.
+    """
+    from .snapshot import Snapshot
+
+    if configfile:
+        raise Exception(
+            f"The configuration is compiled into the snapshot at "
+            f"'{snapshotfile}', so --config cannot be used with --snapshot. "
+            f"Please compile a snapshot with the configuration instead.")
+
+    snapshot = Snapshot.load(filename=snapshotfile)
+
+    if snapshot.language != language:
+        raise Exception(
+            f"The snapshot at '{snapshotfile}' has been compiled for the "
+            f"language '{snapshot.language}', not '{language}'.")
+
+    snapshot.select(transformer=transformer, ocr_provider=ocr)
+
+    return snapshot
+
+# ---------------------------------------------------------------------------- #
+
+
 def export_to_json(
     object: pydantic.BaseModel,
     filename: pathlib.Path,
@@ -87,6 +126,157 @@ def export_to_json(
         content = object.model_dump()
         json.dump(content, file, indent=4)
 
+
+def export_metrics(
+    metrics: Metrics,
+    filename: pathlib.Path,
+) -> None:
+    """
+    Save metrics to a file, in the Prometheus text format if the file ends
+    with '.prom' and as JSON otherwise.
+    """
+    with filename.open("w", encoding="utf-8") as file:
+        if filename.suffix.lower() == ".prom":
+            file.write(metrics.to_prometheus())
+        else:
+            file.write(metrics.to_json())
+
+
+def report_prefilters(metrics: Metrics) -> None:
+    """
+    Log how many segments the prefilter of each matcher has skipped.
+    """
+    logger = logging.getLogger("pyghost")
+    counters = metrics.snapshot()["counters"]
+
+    for key, segments in counters.items():
+        if not key.startswith("prefilter.") or \
+                not key.endswith(".segments") or segments == 0:
+            continue
+
+        name = key[len("prefilter."):-len(".segments")]
+        skipped = counters.get(f"prefilter.{name}.skipped", 0)
+
+        logger.info(f"The prefilter of matcher '{name}' skipped {skipped} "
+                    f"of {segments} segments ({skipped / segments:.1%}).")
+
+
+def export_profile(
+    profiler: cProfile.Profile,
+    breakdown: dict[str, Any],
+    filename: pathlib.Path,
+) -> None:
+    """
+    Save a per-file stage breakdown as JSON and the cProfile statistics next
+    to it with the suffix '.prof'.
+    """
+    with filename.open("w", encoding="utf-8") as file:
+        json.dump(breakdown, file, indent=4)
+
+    profiler.dump_stats(filename.with_suffix(".prof"))
+
+
+def process_document(
+    ghost: Any,
+    document: Any,
+    filename: pathlib.Path,
+    output: Optional[pathlib.Path],
+    export_matches: Optional[pathlib.Path],
+    print_text: bool,
+    exporter: Any = None,
+    export_ocr: bool = False,
+    vector_pdf: bool = False
+) -> List[pathlib.Path]:
+    """
+    Load, pseudonymize or anonymize, and save a single document. Return the
+    filenames of the saved pages, or of the saved PDF if vector_pdf is set
+    and the document is a PDF.
+    """
+    # the time budgets start with the document
+    deadline = Deadline(config=ghost.config.deadline, metrics=ghost.metrics)
+
+    document.load(filename=filename, deadline=deadline)
+
+    # the checksum lets a replay make sure it renders the same file
+    checksum = None
+    if exporter:
+        from .manifest import hash_file
+
+        checksum = hash_file(filename=filename)
+
+    # blank pages have no words and are skipped
+    found = ghost.find_document_matches(pages=document.ocr,
+                                        deadline=deadline)
+
+    transformations = {}
+    for page, doc_ocr in enumerate(document.ocr):
+        if document.is_blank(page=page):
+            continue
+
+        matches = found[page]
+
+        transformation = ghost.transform_text(
+            text=doc_ocr.text, matches=matches, words=doc_ocr.words,
+            deadline=deadline, page=page)
+
+        if exporter:
+            exporter.write(
+                file=str(filename),
+                page=page,
+                result=GhostResult(
+                    matches=matches,
+                    transformation=transformation,
+                    degradations=deadline.get_degradations(page=page)
+                ),
+                checksum=checksum,
+                ocr=doc_ocr if export_ocr else None
+            )
+        elif export_matches:  # todo: gets overwritten with multiple files
+            export_to_json(
+                object=GhostResult(
+                    matches=matches,
+                    transformation=transformation,
+                    degradations=deadline.get_degradations(page=page)
+                ),
+                filename=export_matches.with_stem(
+                    f"{export_matches.stem}_{filename.stem}_{page}"),
+            )
+
+        transformations[page] = transformation
+
+        if print_text:
+            print(transformation.transformed_text)
+
+    # pages that could not be processed in time are covered completely
+    redacted = [page for page in transformations
+                if deadline.is_redacted(page=page)]
+
+    if vector_pdf and filename.suffix.lower() == ".pdf":
+        target = output.with_stem(f"{output.stem}_{filename.stem}") \
+            if output else filename.with_stem(f"out_{filename.stem}")
+
+        return [document.save_pdf(
+            filename=target.with_suffix(".pdf"),
+            transformers=transformations,
+            redacted=redacted
+        )]
+
+    document.manipulate_pages(transformers=transformations)
+
+    for page in redacted:
+        document.redact_page(page=page)
+
+    if output is None:
+        return document.save(
+            filename=filename.with_stem(
+                f"out_{filename.stem}").with_suffix(".jpg")
+        )
+
+    return document.save(
+        filename=output.with_stem(
+            f"{output.stem}_{filename.stem}")
+    )
+
 # ---------------------------------------------------------------------------- #
 
 
@@ -98,27 +288,59 @@ def text(
     log: LogLevel = LogLevel.INFO,
     config: Optional[pathlib.Path] = None,
     export_matches: Optional[pathlib.Path] = None,
+    export_text: bool = True,
+    metrics: Optional[pathlib.Path] = None,
+    profile: Optional[pathlib.Path] = None,
+    snapshot: Optional[pathlib.Path] = None
 ) -> None:
     """
     Pseudonymize or anonymize a text.
     """
+    from .ghost import Ghost
+    from .text import Text
+
     setup_logging(level=log)
-    configuration = load_config(configfile=config)
+
+    profiler = cProfile.Profile()
+    if profile:
+        profiler.enable()
+
+    collected = Metrics()
 
     words = Text().get_words(text=text)
 
-    ghost = Ghost(
-        language=language,
-        config=configuration,
-        transformer=transformer
-    )
+    if snapshot:
+        ghost = load_snapshot(snapshotfile=snapshot, language=language,
+                              configfile=config,
+                              transformer=transformer).ghost
+        ghost.set_metrics(metrics=collected)
+    else:
+        ghost = Ghost(
+            language=language,
+            config=load_config(configfile=config),
+            transformer=transformer,
+            metrics=collected
+        )
 
     matches = ghost.find_matches(text=text, words=words)
 
     transformation = ghost.transform_text(
         text=text, matches=matches, words=words)
 
-    if export_matches:
+    if export_matches and export_matches.suffix.lower() == ".jsonl":
+        from .export import JsonlExporter
+
+        with JsonlExporter(filename=export_matches,
+                           include_text=export_text) as exporter:
+            exporter.write(
+                file="-",
+                page=0,
+                result=GhostResult(
+                    matches=matches,
+                    transformation=transformation
+                )
+            )
+    elif export_matches:
         export_to_json(
             object=GhostResult(
                 matches=matches,
@@ -129,6 +351,19 @@ def text(
 
     print(transformation.transformed_text)
 
+    report_prefilters(metrics=collected)
+
+    ghost.close()
+
+    if profile:
+        profiler.disable()
+        export_profile(profiler=profiler,
+                       breakdown={"text": collected.snapshot()},
+                       filename=profile)
+
+    if metrics:
+        export_metrics(metrics=collected, filename=metrics)
+
 # ---------------------------------------------------------------------------- #
 
 
@@ -142,53 +377,239 @@ def doc(
     log: LogLevel = LogLevel.INFO,
     config: Optional[pathlib.Path] = None,
     export_matches: Optional[pathlib.Path] = None,
-    print_text: bool = False
+    export_text: bool = True,
+    export_ocr: bool = False,
+    print_text: bool = False,
+    metrics: Optional[pathlib.Path] = None,
+    profile: Optional[pathlib.Path] = None,
+    snapshot: Optional[pathlib.Path] = None,
+    manifest: Optional[pathlib.Path] = None,
+    retry_failed: bool = False,
+    vector_pdf: bool = False
 ) -> None:
     """
     Process a local document (pdf, jpg, png, or tiff).
     """
+    from .ghost import Ghost
+    from .document import Document
+
+    setup_logging(level=log)
+    logger = logging.getLogger("pyghost")
+
+    profiler = cProfile.Profile()
+    if profile:
+        profiler.enable()
+
+    # the metrics are collected per file and summed up in totals
+    collected = Metrics()
+    totals = Metrics()
+    breakdown = {}
+
+    if snapshot:
+        restored = load_snapshot(snapshotfile=snapshot, language=language,
+                                 configfile=config, transformer=transformer,
+                                 ocr=ocr)
+        ghost = restored.ghost
+        ghost.set_metrics(metrics=collected)
+        document = restored.document
+        document.set_metrics(metrics=collected)
+    else:
+        configuration = load_config(configfile=config)
+
+        ghost = Ghost(
+            language=language,
+            config=configuration,
+            transformer=transformer,
+            metrics=collected
+        )
+
+        document = Document(
+            language=language,
+            config=configuration,
+            ocr_provider=ocr,
+            metrics=collected
+        )
+
+    progress = None
+    if manifest:
+        from .manifest import Manifest, hash_config, hash_file
+
+        progress = Manifest(filename=manifest)
+        config_hash = hash_config(
+            config=ghost.config,
+            language=language,
+            transformer=transformer,
+            ocr=ocr,
+            output=output,
+            snapshot=snapshot,
+            vector_pdf=vector_pdf
+        )
+
+        if retry_failed:
+            failed = [str(entry.input) for entry in
+                      progress.entries(status="failed")]
+            documents = [filename for filename in documents
+                         if str(filename.resolve()) in failed]
+
+    # a .jsonl export streams all pages of the batch into a single file,
+    # one document at a time, resumed batches append to it
+    exporter = None
+    if export_matches and export_matches.suffix.lower() == ".jsonl":
+        from .export import JsonlExporter
+
+        exporter = JsonlExporter(
+            filename=export_matches,
+            include_text=export_text,
+            append=progress is not None
+        )
+
+    # todo: deal with folders
+    # todo: accept other output folders
+
+    failures = 0
+    try:
+        for filename in documents:
+            if progress is None:
+                process_document(
+                    ghost=ghost,
+                    document=document,
+                    filename=filename,
+                    output=output,
+                    export_matches=export_matches,
+                    print_text=print_text,
+                    exporter=exporter,
+                    export_ocr=export_ocr,
+                    vector_pdf=vector_pdf
+                )
+
+                if exporter:
+                    exporter.commit()
+            else:
+                content_hash = hash_file(filename=filename)
+
+                if progress.is_done(input=filename.resolve(),
+                                    content_hash=content_hash,
+                                    config_hash=config_hash):
+                    logger.info(f"Skipping '{filename}', it is unchanged and "
+                                f"has already been processed.")
+                    continue
+
+                progress.start(input=filename.resolve(),
+                               content_hash=content_hash,
+                               config_hash=config_hash)
+                try:
+                    outputs = process_document(
+                        ghost=ghost,
+                        document=document,
+                        filename=filename,
+                        output=output,
+                        export_matches=export_matches,
+                        print_text=print_text,
+                        exporter=exporter,
+                        export_ocr=export_ocr,
+                        vector_pdf=vector_pdf
+                    )
+                except Exception as exception:
+                    logger.error(f"Unable to process '{filename}': "
+                                 f"{exception}")
+                    progress.fail(input=filename.resolve(),
+                                  error=str(exception))
+                    failures += 1
+
+                    # the failed document is exported when it is retried
+                    if exporter:
+                        exporter.discard()
+
+                    # its metrics must not be added to the next document
+                    breakdown[str(filename)] = collected.snapshot()
+                    totals.merge(breakdown[str(filename)])
+                    collected.reset()
+                    continue
+
+                # the records are exported before the document is done, so a
+                # crash in between exports them again instead of losing them,
+                # and a replay uses the latest records of each page
+                if exporter:
+                    exporter.commit()
+
+                progress.finish(input=filename.resolve(), outputs=outputs)
+
+            breakdown[str(filename)] = collected.snapshot()
+            totals.merge(breakdown[str(filename)])
+            collected.reset()
+
+        if profile:
+            profiler.disable()
+            export_profile(profiler=profiler, breakdown=breakdown,
+                           filename=profile)
+
+        if metrics:
+            export_metrics(metrics=totals, filename=metrics)
+
+        report_prefilters(metrics=totals)
+    finally:
+        # the matchers save their caches even if a document has raised
+        ghost.close()
+        document.close()
+
+        if progress:
+            progress.close()
+
+        # the records of a document that has raised are not exported
+        if exporter:
+            exporter.discard()
+            exporter.close()
+
+    if failures:
+        logger.error(f"{failures} document(s) failed. Use --retry-failed to "
+                     f"process them again.")
+        raise typer.Exit(code=1)
+
+# ---------------------------------------------------------------------------- #
+
+
+@app.command()
+def replay(
+    language: str,
+    export: pathlib.Path,
+    documents: List[pathlib.Path],
+    output: Optional[pathlib.Path] = None,
+    transformer: Optional[str] = None,
+    log: LogLevel = LogLevel.INFO,
+    config: Optional[pathlib.Path] = None
+) -> None:
+    """
+    Render documents again from exported matches without OCR and matching.
+    """
+    from .ghost import Ghost
+    from .document import Document
+    from .manifest import hash_file
+    from .replay import Replay, read_records
+
     setup_logging(level=log)
     configuration = load_config(configfile=config)
 
+    # the matchers are not needed to replay, so they are not loaded at all
     ghost = Ghost(
         language=language,
-        config=configuration,
+        config=configuration.model_copy(update={"matchers": []}),
         transformer=transformer
     )
 
     document = Document(
         language=language,
-        config=configuration,
-        ocr_provider=ocr
+        config=configuration
     )
 
-    # todo: deal with folders
-    # todo: accept other output folders
+    records = read_records(filename=export)
+    replayer = Replay(ghost=ghost, document=document)
 
     for filename in documents:
-        document.load(filename=filename)
-
-        for page, doc_ocr in enumerate(document.ocr):
-            matches = ghost.find_matches(
-                text=doc_ocr.text, words=doc_ocr.words)
-
-            transformation = ghost.transform_text(
-                text=doc_ocr.text, matches=matches, words=doc_ocr.words)
-
-            if export_matches:  # todo: gets overwritten when using multiple files
-                export_to_json(
-                    object=GhostResult(
-                        matches=matches,
-                        transformation=transformation
-                    ),
-                    filename=export_matches.with_stem(
-                        f"{export_matches.stem}_{filename.stem}_{page}"),
-                )
-
-            document.manipulate_page(page=page, transformer=transformation)
-
-            if print_text:
-                print(transformation.transformed_text)
+        replayer.run(
+            filename=filename,
+            records=records,
+            checksum=hash_file(filename=filename)
+        )
 
         if output is None:
             document.save(
@@ -197,10 +618,112 @@ def doc(
             )
         else:
             document.save(
-                filename=output.with_stem(
-                    f"{output.stem}_{filename.stem}")
+                filename=output.with_stem(f"{output.stem}_{filename.stem}")
             )
 
+    document.close()
+
+# ---------------------------------------------------------------------------- #
+
+
+@app.command()
+def table(
+    language: str,
+    source: pathlib.Path,
+    columns: List[str],
+    output: Optional[pathlib.Path] = None,
+    transformer: Optional[str] = None,
+    log: LogLevel = LogLevel.INFO,
+    config: Optional[pathlib.Path] = None,
+    chunk_size: int = 10000,
+    cache_size: int = 100000,
+    delimiter: str = ",",
+    metrics: Optional[pathlib.Path] = None,
+    snapshot: Optional[pathlib.Path] = None
+) -> None:
+    """
+    Process columns of a table (csv or parquet).
+    """
+    from .ghost import Ghost
+    from .table import Table
+
+    setup_logging(level=log)
+    logger = logging.getLogger("pyghost")
+
+    collected = Metrics()
+
+    if snapshot:
+        ghost = load_snapshot(snapshotfile=snapshot, language=language,
+                              configfile=config,
+                              transformer=transformer).ghost
+        ghost.set_metrics(metrics=collected)
+    else:
+        ghost = Ghost(
+            language=language,
+            config=load_config(configfile=config),
+            transformer=transformer,
+            metrics=collected
+        )
+
+    if output is None:
+        output = source.with_stem(f"out_{source.stem}")
+
+    processor = Table(
+        ghost=ghost,
+        columns=columns,
+        chunk_size=chunk_size,
+        cache_size=cache_size
+    )
+
+    # the matchers save their caches even if the table cannot be processed
+    try:
+        if source.suffix.lower() == ".parquet":
+            rows = processor.process_parquet(source=source, target=output)
+        else:
+            rows = processor.process_csv(
+                source=source, target=output, delimiter=delimiter)
+    finally:
+        ghost.close()
+
+    counters = collected.snapshot()["counters"]
+    logger.info(f"Processed {rows} rows with "
+                f"{counters.get('table.values', 0)} values, "
+                f"{counters.get('table.processed_values', 0)} of them "
+                f"distinct, into '{output}'.")
+
+    report_prefilters(metrics=collected)
+
+    if metrics:
+        export_metrics(metrics=collected, filename=metrics)
+
+# ---------------------------------------------------------------------------- #
+
+
+@app.command()
+def compile(
+    language: str,
+    output: pathlib.Path,
+    ocr: Optional[str] = None,
+    transformer: Optional[str] = None,
+    log: LogLevel = LogLevel.INFO,
+    config: Optional[pathlib.Path] = None
+) -> None:
+    """
+    Compile a configuration into a snapshot for a fast startup.
+    """
+    from .snapshot import Snapshot
+
+    setup_logging(level=log)
+    configuration = load_config(configfile=config)
+
+    snapshot = Snapshot.compile(
+        language=language,
+        config=configuration,
+        transformer=transformer,
+        ocr_provider=ocr
+    )
+    snapshot.save(filename=output)
+
 # ---------------------------------------------------------------------------- #
 
 
@@ -225,6 +748,7 @@ if __name__ == "__main__":
     except Exception as exception:
         raise exception
 
-    sys.exit(0)
+    # commands return None, typer.Exit is returned as its exit code
+    sys.exit(result if isinstance(result, int) else 0)
 
 # ---------------------------------------------------------------------------- #
@@ -0,0 +1,113 @@
+# ---------------------------------------------------------------------------- #
+
+import contextvars
+import threading
+import time
+from typing import Optional
+
+# ---------------------------------------------------------------------------- #
+
+
+class DeadlineExceeded(Exception):
+    """
+    Raised when a stage does not finish within its time budget.
+    """
+    pass
+
+# ---------------------------------------------------------------------------- #
+
+
+class Budget():
+    """
+    The time budget of the stage that runs in the current context. Stages
+    that can be stopped (Tesseract, HTTP requests, patterns of the regex
+    backend) limit themselves to the time left. A stage that is abandoned
+    after its deadline stops writing shared state like caches, memories and
+    metrics, so its late results do not leak into later documents.
+    """
+    expires: float
+    _abandoned: threading.Event
+
+    def __init__(self, timeout: float) -> None:
+        """
+        Initialize a budget that expires after timeout seconds.
+        """
+        self.expires = time.monotonic() + timeout
+        self._abandoned = threading.Event()
+
+    def remaining(self) -> float:
+        """
+        Return the seconds left.
+        """
+        return self.expires - time.monotonic()
+
+    def abandon(self) -> None:
+        """
+        Mark the stage as abandoned.
+        """
+        self._abandoned.set()
+
+    @property
+    def abandoned(self) -> bool:
+        """
+        Return whether the stage has been abandoned.
+        """
+        return self._abandoned.is_set()
+
+
+_current: contextvars.ContextVar[Optional[Budget]] = \
+    contextvars.ContextVar("pyghost_budget", default=None)
+
+# ---------------------------------------------------------------------------- #
+
+
+def get_budget() -> Optional[Budget]:
+    """
+    Return the budget of the current context, if any.
+    """
+    return _current.get()
+
+
+def set_budget(budget: Optional[Budget]) -> contextvars.Token:
+    """
+    Set the budget of the current context. Threads started with a copy of
+    the context (contextvars.copy_context, asyncio.to_thread) inherit it.
+    """
+    return _current.set(budget)
+
+
+def get_timeout(timeout: Optional[float] = None) -> Optional[float]:
+    """
+    Limit a timeout to the time left in the current budget. Return None if
+    there is neither a timeout nor a budget. Raise DeadlineExceeded if the
+    budget is used up.
+    """
+    budget = _current.get()
+    if budget is None:
+        return timeout
+
+    remaining = budget.remaining()
+    if remaining <= 0:
+        raise DeadlineExceeded("No time left in the current budget.")
+
+    return remaining if timeout is None else min(timeout, remaining)
+
+
+def is_expired() -> bool:
+    """
+    Return whether the budget of the current context is used up, e.g. to
+    tell whether a timeout has been caused by the budget.
+    """
+    budget = _current.get()
+    return budget is not None and budget.remaining() <= 0.01
+
+
+def is_abandoned() -> bool:
+    """
+    Return whether the stage running in the current context has been
+    abandoned. Shared state must not be written in that case.
+    """
+    budget = _current.get()
+    return budget is not None and budget.abandoned
+
+# ---------------------------------------------------------------------------- #
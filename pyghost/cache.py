@@ -0,0 +1,151 @@
+# ---------------------------------------------------------------------------- #
+
+import pathlib
+import collections
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, List, Optional, Tuple
+
+# ---------------------------------------------------------------------------- #
+
+from .budget import is_abandoned
+
+# ---------------------------------------------------------------------------- #
+
+# an entity of a segment: start and end relative to the segment, and label
+Entity = Tuple[int, int, str]
+
+# ---------------------------------------------------------------------------- #
+
+
+class SegmentCache():
+    """
+    The SegmentCache remembers the entities a model has found in a segment of
+    text (a line or a paragraph), keyed by the hash of the model name and the
+    segment. Letters repeat the same headers, footers and disclaimers on
+    every page, so their entities only need to be found once. The least
+    recently used segments are evicted when the cache is full. It is safe to
+    share one instance between threads, and it can be saved to and loaded
+    from a JSON file.
+    """
+    capacity: int
+    filename: Optional[pathlib.Path]
+    _entries: collections.OrderedDict[str, List[Entity]]
+    _lock: threading.Lock
+    _logger: logging.Logger
+
+    def __init__(
+        self,
+        capacity: int = 10000,
+        filename: Optional[pathlib.Path] = None
+    ) -> None:
+        """
+        Initialize the cache and load it from the file if it exists.
+        """
+        self.capacity = capacity
+        self.filename = filename
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._logger = logging.getLogger("pyghost.cache")
+
+        if filename and filename.is_file():
+            self.load()
+
+    def __len__(self) -> int:
+        """
+        Return the number of cached segments.
+        """
+        return len(self._entries)
+
+    @staticmethod
+    def key(model: str, segment: str) -> str:
+        """
+        Return the key of a segment processed by a model.
+        """
+        content = f"{model}\0{segment}".encode("utf-8")
+        return hashlib.sha256(content).hexdigest()
+
+    def get(self, key: str) -> Optional[List[Entity]]:
+        """
+        Return the entities of a segment or None if it is not cached.
+        """
+        with self._lock:
+            entities = self._entries.get(key)
+            if entities is not None:
+                self._entries.move_to_end(key)
+            return entities
+
+    def put(self, key: str, entities: List[Entity]) -> None:
+        """
+        Cache the entities of a segment and evict the least recently used
+        segments if the cache is full. Abandoned stages do not write.
+        """
+        if is_abandoned():
+            return
+
+        with self._lock:
+            self._entries[key] = entities
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def load(self) -> None:
+        """
+        Load the cache from its file.
+        """
+        assert self.filename
+
+        try:
+            with self.filename.open("r", encoding="utf-8") as file:
+                content = json.load(file)
+        except Exception as exception:
+            self._logger.warning(f"Unable to load the segment cache at "
+                                 f"'{self.filename}': {exception}")
+            return
+
+        with self._lock:
+            for key, entities in content[-self.capacity:]:
+                self._entries[key] = [tuple(entity) for entity in entities]
+
+        self._logger.debug(f"Loaded {len(content)} segments from "
+                           f"'{self.filename}'.")
+
+    def save(self) -> None:
+        """
+        Save the cache to its file. The file is replaced atomically, so an
+        interrupted save does not leave a broken cache behind.
+        """
+        if not self.filename:
+            return
+
+        with self._lock:
+            content: List[Any] = [[key, entities] for key, entities
+                                  in self._entries.items()]
+
+        temporary = self.filename.with_name(f".{self.filename.name}.tmp")
+        with temporary.open("w", encoding="utf-8") as file:
+            json.dump(content, file, separators=(",", ":"))
+        os.replace(temporary, self.filename)
+
+        self._logger.debug(f"Saved {len(content)} segments to "
+                           f"'{self.filename}'.")
+
+    def __getstate__(self) -> dict[str, Any]:
+        """
+        Pickle the cache without its lock.
+        """
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        """
+        Restore a pickled cache with a new lock.
+        """
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+# ---------------------------------------------------------------------------- #
@@ -0,0 +1,222 @@
+# ---------------------------------------------------------------------------- #
+
+import contextvars
+import logging
+import threading
+import time
+from typing import Any, Callable, List, Literal, Optional, TypeVar
+
+# ---------------------------------------------------------------------------- #
+
+from .budget import Budget, DeadlineExceeded, is_abandoned, set_budget
+from .models import DeadlineConfig, Degradation
+from .metrics import Metrics
+
+# ---------------------------------------------------------------------------- #
+
+T = TypeVar("T")
+
+# ---------------------------------------------------------------------------- #
+
+
+class Deadline():
+    """
+    A Deadline tracks the time budget of a single document and the budgets
+    of its stages (OCR, matchers and transformation), which are summed over
+    all pages. A stage that exceeds its budget falls back to a cheaper
+    strategy, which may only use the rest of the document's budget. The
+    fallbacks that have been used are recorded as degradations.
+
+    The remaining time is passed to the stages as a Budget. Stages that can
+    be stopped limit themselves to it: Tesseract is killed, HTTP requests
+    and patterns of the regex backend time out. Python cannot stop other
+    functions (like spacy or patterns of the re backend), so a stage that
+    runs out of time is abandoned: it keeps running in a background thread
+    until it finishes, but its result is ignored, it no longer writes shared
+    state, and the document continues without waiting.
+    """
+    config: DeadlineConfig
+    metrics: Metrics
+    degradations: List[Degradation]
+    _start: float
+    _spent: dict[str, float]
+    _logger: logging.Logger
+
+    def __init__(
+        self,
+        config: DeadlineConfig,
+        metrics: Optional[Metrics] = None
+    ) -> None:
+        """
+        Initialize the deadline, its time starts immediately.
+        """
+        self.config = config
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.degradations = []
+        self._start = time.monotonic()
+        self._spent = {}
+        self._logger = logging.getLogger("pyghost.deadline")
+
+    @property
+    def enabled(self) -> bool:
+        """
+        Return whether any budget is configured.
+        """
+        return any(budget is not None for budget in (
+            self.config.document, self.config.ocr, self.config.matchers,
+            self.config.transform))
+
+    def elapsed(self) -> float:
+        """
+        Return the seconds since the document has been started.
+        """
+        return time.monotonic() - self._start
+
+    def remaining(self, stage: Optional[str] = None) -> Optional[float]:
+        """
+        Return the seconds left for a stage (or the document if no stage is
+        given), or None if there is no budget.
+        """
+        budgets = []
+
+        if self.config.document is not None:
+            budgets.append(self.config.document - self.elapsed())
+
+        budget = getattr(self.config, stage) if stage else None
+        if budget is not None:
+            budgets.append(budget - self._spent.get(stage or "", 0.0))
+
+        return min(budgets) if budgets else None
+
+    def expired(self, stage: Optional[str] = None) -> bool:
+        """
+        Return whether the budget of a stage (or the document) is used up.
+        """
+        remaining = self.remaining(stage=stage)
+        return remaining is not None and remaining <= 0
+
+    def run(
+        self,
+        stage: Optional[str],
+        function: Callable[..., T],
+        *args: Any,
+        **kwargs: Any
+    ) -> T:
+        """
+        Call a function within the budget of a stage (or only the document
+        if no stage is given) and add its time to the stage. Raise
+        DeadlineExceeded if it does not finish in time.
+        """
+        timeout = self.remaining(stage=stage)
+
+        start = time.monotonic()
+        try:
+            if timeout is None:
+                return function(*args, **kwargs)
+
+            if timeout <= 0:
+                raise DeadlineExceeded(f"No time left for stage '{stage}'.")
+
+            return self._call(timeout, function, *args, **kwargs)
+        finally:
+            if stage:
+                self.charge(stage=stage, seconds=time.monotonic() - start)
+
+    def charge(self, stage: str, seconds: float) -> None:
+        """
+        Add time that has been spent outside of run to a stage.
+        """
+        self._spent[stage] = self._spent.get(stage, 0.0) + seconds
+
+    def _call(
+        self,
+        timeout: float,
+        function: Callable[..., T],
+        *args: Any,
+        **kwargs: Any
+    ) -> T:
+        """
+        Call a function with a budget of timeout seconds in a daemon thread
+        and wait for it at most that long. A daemon thread is used so an
+        abandoned call neither blocks a thread pool nor the exit of the
+        interpreter.
+        """
+        outcome: dict[str, Any] = {}
+        budget = Budget(timeout=timeout)
+        context = contextvars.copy_context()
+
+        def call() -> None:
+            set_budget(budget)
+            outcome["result"] = function(*args, **kwargs)
+
+        def target() -> None:
+            try:
+                context.run(call)
+            except BaseException as exception:
+                outcome["exception"] = exception
+
+        thread = threading.Thread(target=target, daemon=True,
+                                  name="pyghost-deadline")
+        thread.start()
+        thread.join(timeout=timeout)
+
+        if thread.is_alive():
+            budget.abandon()
+            raise DeadlineExceeded(
+                f"Function '{getattr(function, '__name__', function)}' did "
+                f"not finish within {timeout:.2f} seconds.")
+
+        if "exception" in outcome:
+            raise outcome["exception"]
+
+        return outcome["result"]
+
+    def degrade(
+        self,
+        stage: Literal["ocr", "matchers", "transform"],
+        fallback: Literal["low_resolution_ocr", "regex_only",
+                          "label_transformer", "page_redaction"],
+        page: Optional[int] = None
+    ) -> None:
+        """
+        Record that a stage has fallen back to a cheaper strategy, once per
+        page. Stages that have been abandoned do not record anything.
+        """
+        if is_abandoned():
+            return
+
+        if any((degradation.stage, degradation.fallback, degradation.page) ==
+               (stage, fallback, page) for degradation in self.degradations):
+            return
+
+        degradation = Degradation(
+            stage=stage,
+            fallback=fallback,
+            page=page,
+            elapsed=round(self.elapsed(), 3)
+        )
+        self.degradations.append(degradation)
+
+        self.metrics.increment(f"degradations.{fallback}")
+
+        self._logger.warning(
+            f"Stage '{stage}' exceeded its time budget after "
+            f"{degradation.elapsed} seconds, falling back to '{fallback}'"
+            + (f" on page {page}." if page is not None else "."))
+
+    def get_degradations(self, page: int) -> List[Degradation]:
+        """
+        Return the degradations that affect a page, including those of the
+        whole document.
+        """
+        return [degradation for degradation in self.degradations
+                if degradation.page is None or degradation.page == page]
+
+    def is_redacted(self, page: int) -> bool:
+        """
+        Return whether a page has to be redacted completely.
+        """
+        return any(degradation.fallback == "page_redaction"
+                   for degradation in self.get_degradations(page=page))
+
+# ---------------------------------------------------------------------------- #
@@ -1,18 +1,23 @@
 # ---------------------------------------------------------------------------- #
 
 import pathlib
-import pdf2image
-import pytesseract
 import json
 import logging
 import importlib
-from PIL import Image, ImageDraw, ImageFont
+import asyncio
+import concurrent.futures
+import time
+from PIL import Image, ImageColor, ImageDraw, ImageFont
 from typing import Any, List, Optional
 
 # ---------------------------------------------------------------------------- #
 
 from .models import Config, Coordinates, OcrResult, TransformerResult
+from .budget import Budget, set_budget
+from .deadline import Deadline, DeadlineExceeded
+from .metrics import Metrics
 from .ocr import BaseOcr
+from .pagestore import PageHandle, PageStore
 
 # ---------------------------------------------------------------------------- #
 
@@ -21,37 +26,92 @@ class Document():
     """
     The Document class reads images or PDF documents (which will be converted
     to images), calls OCR providers and applies manipulations to the images
-    before exporting them.
+    before exporting them. With more than one process configured, the pages
+    are kept in shared memory and OCR and rendering run in worker processes.
     """
+    filename: Optional[pathlib.Path]
     images: List[Image.Image]
     ocr: List[OcrResult]
+    blank: List[bool]
     _config: Config
     _logger: logging.Logger
+    metrics: Metrics
     language: str
     ocr_provider: BaseOcr
+    _ocr_provider_name: Optional[str]
+    _pool: Optional[concurrent.futures.ProcessPoolExecutor]
+    _store: Optional[PageStore]
+    _handles: List[PageHandle]
 
     def __init__(
         self,
         language: str,
         config: Config,
-        ocr_provider: Optional[str] = None
+        ocr_provider: Optional[str] = None,
+        metrics: Optional[Metrics] = None
     ):
         """
-        Initialize the document.
+        Initialize the document. Pass a Metrics instance to collect the
+        timings and counters of several Ghost and Document instances in one
+        place.
         """
+        self.filename = None
         self.images = []
         self.ocr = []
+        self.blank = []
 
         self._config = config
         self._logger = logging.getLogger("pyghost.document")
+        self.metrics = metrics if metrics is not None else Metrics()
 
         self.language = language
 
+        self._pool = None
+        self._store = None
+        self._handles = []
+
+        self._ocr_provider_name = ocr_provider
         self._initialize_ocr(provider=ocr_provider)
 
-    def load(self, filename: pathlib.Path) -> None:
+    def __getstate__(self) -> dict[str, Any]:
+        """
+        Pickle the document without its pages and worker processes.
+        """
+        state = self.__dict__.copy()
+        state["images"] = []
+        state["_pool"] = None
+        state["_store"] = None
+        state["_handles"] = []
+        return state
+
+    def close(self) -> None:
+        """
+        Release the shared pages and stop the worker processes.
+        """
+        self._release_pages()
+
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def set_metrics(self, metrics: Metrics) -> None:
+        """
+        Collect the metrics of the document and its OCR provider in the given
+        instance.
+        """
+        self.metrics = metrics
+        self.ocr_provider.metrics = metrics
+
+    def load(
+        self,
+        filename: pathlib.Path,
+        ocr: bool = True,
+        deadline: Optional[Deadline] = None
+    ) -> None:
         """
-        Load a document from a file.
+        Load a document from a file. Set ocr to False to only load the pages,
+        e.g. to replay previously exported results. Pass a deadline to limit
+        the time of the OCR.
         """
         if not filename.is_file():
             raise Exception(f"Cannot find file '{filename}'.")
@@ -60,17 +120,122 @@ class Document():
                 [".jpg", ".jpeg", ".png", ".tiff", ".pdf"]:
             raise Exception(f"Invalid file extension '{filename.suffix}'.")
 
-        if filename.suffix.lower() == ".pdf":
-            self._load_pdf(filename=filename)
+        self._release_pages()
+
+        self.filename = filename
+
+        with self.metrics.timer("rasterize"):
+            if filename.suffix.lower() == ".pdf":
+                self._load_pdf(filename=filename)
+            else:
+                self._load_image(filename=filename)
+
+        self.metrics.increment("pages", len(self.images))
+
+        if self._config.document.processes > 1 and len(self.images) > 1:
+            self._share_pages()
+
+        self._detect_blank_pages()
+
+        if ocr:
+            self._retrieve_ocr(deadline=deadline)
         else:
-            self._load_image(filename=filename)
+            self.ocr = []
+
+    def is_blank(self, page: int) -> bool:
+        """
+        Return whether a page has been classified as blank. Blank pages are
+        skipped by OCR and should be passed through without processing.
+        """
+        return self.blank[page]
+
+    def _detect_blank_pages(self) -> None:
+        """
+        Classify each page as blank or not, if enabled.
+        """
+        self.blank = [False] * len(self.images)
+
+        if not self._config.document.blank_pages.enabled:
+            return
+
+        with self.metrics.timer("blank_detection"):
+            for page, image in enumerate(self.images):
+                self.blank[page] = self._is_blank_image(image=image)
+
+                if self.blank[page]:
+                    self._logger.debug(f"Page {page} is blank.")
+                    self.metrics.increment("blank_pages")
+
+    def _is_blank_image(self, image: Image.Image) -> bool:
+        """
+        Check whether an image is blank by measuring its ink coverage: the
+        share of pixels that are considerably darker than the background. The
+        image is downsampled by taking the minimum of each block, so that
+        thin strokes survive the downsampling.
+        """
+        import numpy
+
+        config = self._config.document.blank_pages
+
+        pixels = numpy.asarray(image.convert("L"))
+
+        factor = max(1, max(pixels.shape) // config.size)
+        height = pixels.shape[0] // factor * factor
+        width = pixels.shape[1] // factor * factor
+        if height == 0 or width == 0:
+            return True
+
+        blocks = pixels[:height, :width].reshape(
+            height // factor, factor, width // factor, factor).min(axis=(1, 3))
+
+        background = numpy.median(blocks)
+        coverage = numpy.mean(blocks < background - config.ink_contrast)
+
+        return bool(coverage <= config.max_ink_coverage)
+
+    def _share_pages(self) -> None:
+        """
+        Move the pages into shared memory. The images of the document then
+        share their pixels with the worker processes.
+        """
+        self._store = PageStore()
+        self._handles = [self._store.put(image=image)
+                         for image in self.images]
+        self.images = [self._store.image(handle=handle)
+                       for handle in self._handles]
+
+    def _release_pages(self) -> None:
+        """
+        Release the pages of the previous document from shared memory.
+        """
+        if self._store is None:
+            return
+
+        self.images = []
+        self._handles = []
+        self._store.close()
+        self._store = None
+
+    def _get_pool(self) -> concurrent.futures.ProcessPoolExecutor:
+        """
+        Return the worker processes, start them on first use.
+        """
+        if self._pool is None:
+            self._pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self._config.document.processes,
+                initializer=_initialize_worker,
+                initargs=(self.language, self._config,
+                          self._ocr_provider_name)
+            )
 
-        self._retrieve_ocr()
+        return self._pool
 
     def _load_pdf(self, filename: pathlib.Path) -> None:
         """
         Load a PDF document.
         """
+        import pdf2image
+
         self.images = pdf2image.convert_from_path(filename)
         try:
             self.images = pdf2image.convert_from_path(filename)
@@ -92,25 +257,348 @@ class Document():
     def save(
         self,
         filename: pathlib.Path
+    ) -> List[pathlib.Path]:
+        """
+        Save each page as an image and return the filenames.
+        """
+        filenames = []
+        with self.metrics.timer("save"):
+            for page, image in enumerate(self.images):
+                filename_mod = filename.with_stem(
+                    f"{filename.stem}_{page}")
+                if image.mode == "RGBX":  # pages from shared memory
+                    image = image.convert("RGB")
+                image.save(filename_mod)
+                filenames.append(filename_mod)
+
+        return filenames
+
+    def save_pdf(
+        self,
+        filename: pathlib.Path,
+        transformers: dict[int, TransformerResult],
+        redacted: Optional[List[int]] = None
+    ) -> pathlib.Path:
+        """
+        Save a PDF document as a PDF that keeps its original pages instead of
+        images. The applied transformations are added as vector redactions:
+        the text, vector graphics and image pixels beneath them are removed
+        and the replacement is written on top, all other content (including
+        the text layer) stays as is. Pages in redacted are covered
+        completely. This requires PyMuPDF.
+        """
+        if self.filename is None or self.filename.suffix.lower() != ".pdf":
+            raise Exception("Only PDF documents can be saved as PDF.")
+
+        pymupdf = _import_pymupdf()
+
+        with self.metrics.timer("save"):
+            pdf = pymupdf.open(self.filename)
+
+            try:
+                pages = set(transformers) | set(redacted or [])
+
+                for page, transformer in transformers.items():
+                    self._redact_pdf_page(
+                        pymupdf=pymupdf, pdf_page=pdf[page],
+                        image=self.images[page], transformer=transformer)
+
+                for page in redacted or []:
+                    pdf[page].add_redact_annot(
+                        pdf[page].rect * pdf[page].derotation_matrix,
+                        fill=self._get_pdf_color(
+                            color=self._config.document.highlighter_color))
+
+                for page in sorted(pages):
+                    pdf[page].apply_redactions(
+                        images=pymupdf.PDF_REDACT_IMAGE_PIXELS)
+
+                pdf.save(filename, garbage=3, deflate=True)
+            finally:
+                pdf.close()
+
+        return filename
+
+    def _redact_pdf_page(
+        self,
+        pymupdf: Any,
+        pdf_page: Any,
+        image: Image.Image,
+        transformer: TransformerResult
     ) -> None:
-        for page, image in enumerate(self.images):
-            filename_mod = filename.with_stem(
-                f"{filename.stem}_{page}")
-            image.save(filename_mod)
+        """
+        Add the applied transformations of a page as redactions. The pixel
+        coordinates of the words are scaled to the visible page in points
+        and rotated back into the coordinates of the unrotated page.
+        """
+        scale_x = pdf_page.rect.width / image.width
+        scale_y = pdf_page.rect.height / image.height
+
+        fill = self._get_pdf_color(
+            color=self._config.document.highlighter_color)
+        text_color = self._get_pdf_color(
+            color=self._config.document.text_color)
+
+        for transformation in transformer.transformations:
+            if not transformation.applied:
+                continue
+
+            coordinates = transformation.word.coordinates
+            if not coordinates:
+                continue
+
+            rect = pymupdf.Rect(
+                coordinates.left * scale_x,
+                coordinates.top * scale_y,
+                (coordinates.left + coordinates.width) * scale_x,
+                (coordinates.top + coordinates.height) * scale_y
+            )
+
+            # the font must fit the rectangle, otherwise the text is dropped
+            font_size = min(rect.height * 0.7,
+                            self._config.document.max_font_size * scale_y)
+            length = pymupdf.get_text_length(
+                transformation.replacement, fontname="helv",
+                fontsize=font_size)
+            if length > rect.width > 0:
+                font_size *= rect.width / length
+
+            pdf_page.add_redact_annot(
+                rect * pdf_page.derotation_matrix,
+                text=transformation.replacement,
+                fontname="helv",
+                fontsize=font_size,
+                align=pymupdf.TEXT_ALIGN_CENTER,
+                fill=fill,
+                text_color=text_color
+            )
 
-    def _retrieve_ocr(self, provider: Optional[str] = None) -> None:
+    def _get_pdf_color(self, color: str) -> tuple[float, ...]:
+        """
+        Convert a color to RGB values between 0 and 1.
+        """
+        return tuple(value / 255
+                     for value in ImageColor.getrgb(color)[:3])
+
+    def _retrieve_ocr(self, deadline: Optional[Deadline] = None) -> None:
         """
         Call the OCR provider to retrieve the text of an image.
         """
         self.ocr = []
 
+        if deadline is not None and not deadline.enabled:
+            deadline = None
+
+        if self._store is not None:
+            with self.metrics.timer("ocr"):
+                self.ocr = self._retrieve_ocr_in_workers(deadline=deadline)
+            return
+
+        if self._config.document.ocr_concurrency > 1 or \
+                self._config.document.ocr_batch_size > 1:
+            pages = [page for page in range(len(self.images))
+                     if not self.is_blank(page=page)]
+
+            with self.metrics.timer("ocr"):
+                found = self._run_async(self._retrieve_ocr_async(
+                    pages=pages, deadline=deadline))
+
+            self.ocr = [found.get(page, OcrResult(text="", words=[]))
+                        for page in range(len(self.images))]
+            return
+
         for page, image in enumerate(self.images):
-            result = self.ocr_provider.process_image(
-                image=image,
-                page_increment=page
-            )
+            if self.is_blank(page=page):
+                self.ocr.append(OcrResult(text="", words=[]))
+                continue
+
+            with self.metrics.timer("ocr"):
+                if deadline is None:
+                    result = self.ocr_provider.process_image(
+                        image=image,
+                        page_increment=page
+                    )
+                else:
+                    result = self._retrieve_page_ocr(
+                        image=image, page=page, deadline=deadline)
             self.ocr.append(result)
 
+    def _run_async(self, coroutine: Any) -> Any:
+        """
+        Run a coroutine in a new event loop. The threads of the loop (used by
+        the default async OCR methods) allow one thread per page in flight.
+        Unlike asyncio.run, closing the loop does not wait for the threads,
+        so requests abandoned after a deadline do not delay the document.
+        """
+        config = self._config.document
+
+        loop = asyncio.new_event_loop()
+        loop.set_default_executor(concurrent.futures.ThreadPoolExecutor(
+            max_workers=config.ocr_concurrency * config.ocr_batch_size,
+            thread_name_prefix="pyghost-ocr"))
+
+        try:
+            return loop.run_until_complete(coroutine)
+        finally:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+
+    async def _retrieve_ocr_async(
+        self,
+        pages: List[int],
+        deadline: Optional[Deadline] = None
+    ) -> dict[int, OcrResult]:
+        """
+        Retrieve the text of pages with the async interface of the OCR
+        provider, in batches of ocr_batch_size pages with up to
+        ocr_concurrency batches in flight. The requests share the OCR
+        budget, and the pages of batches that do not finish within it fall
+        back like pages that are recognized one after another.
+        """
+        config = self._config.document
+        semaphore = asyncio.Semaphore(config.ocr_concurrency)
+
+        batches = [pages[start:start + config.ocr_batch_size]
+                   for start in range(0, len(pages), config.ocr_batch_size)]
+        if not batches:
+            return {}
+
+        timeout = deadline.remaining(stage="ocr") if deadline else None
+        if timeout is not None:
+            timeout = max(timeout, 0.0)
+
+        # the tasks and their threads inherit the budget of the requests
+        budget = Budget(timeout=timeout) if timeout is not None else None
+        set_budget(budget)
+
+        async def process(batch: List[int]) -> List[OcrResult]:
+            async with semaphore:
+                return await self.ocr_provider.process_images_async(
+                    images=[self.images[page] for page in batch],
+                    page_increments=batch)
+
+        start = time.monotonic()
+        tasks = [asyncio.create_task(process(batch)) for batch in batches]
+
+        (_, pending) = await asyncio.wait(tasks, timeout=timeout)
+        if budget is not None and pending:
+            budget.abandon()
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        set_budget(None)
+
+        result = {}
+        for batch, task in zip(batches, tasks):
+            if task not in pending and (deadline is None or not isinstance(
+                    task.exception(), DeadlineExceeded)):
+                result.update(zip(batch, task.result()))
+
+        if deadline is None:
+            return result
+
+        deadline.charge(stage="ocr", seconds=time.monotonic() - start)
+
+        for page in pages:
+            if page not in result:
+                result[page] = self._retrieve_page_ocr(
+                    image=self.images[page], page=page, deadline=deadline)
+
+        return result
+
+    def _retrieve_page_ocr(
+        self,
+        image: Image.Image,
+        page: int,
+        deadline: Deadline
+    ) -> OcrResult:
+        """
+        Retrieve the text of a page within the OCR budget. If the budget is
+        exceeded, the page is recognized at a lower resolution with the rest
+        of the document's budget, and if that fails as well, it is left
+        without text to be redacted completely.
+        """
+        try:
+            return deadline.run("ocr", self.ocr_provider.process_image,
+                                image=image, page_increment=page)
+        except DeadlineExceeded:
+            pass
+
+        if not deadline.expired():
+            deadline.degrade(stage="ocr", fallback="low_resolution_ocr",
+                             page=page)
+            try:
+                return deadline.run(None, self._retrieve_scaled_ocr,
+                                    image=image, page=page,
+                                    scale=deadline.config.ocr_scale)
+            except DeadlineExceeded:
+                pass
+
+        deadline.degrade(stage="ocr", fallback="page_redaction", page=page)
+        return OcrResult(text="", words=[])
+
+    def _retrieve_scaled_ocr(
+        self,
+        image: Image.Image,
+        page: int,
+        scale: float
+    ) -> OcrResult:
+        """
+        Retrieve the text of a scaled copy of a page and scale the
+        coordinates of its words back to the page.
+        """
+        scaled = image.resize((max(1, round(image.width * scale)),
+                               max(1, round(image.height * scale))))
+
+        result = self.ocr_provider.process_image(
+            image=scaled, page_increment=page)
+
+        words = []
+        for word in result.words:
+            if word.coordinates:
+                word = word.model_copy(update={"coordinates": Coordinates(
+                    left=round(word.coordinates.left / scale),
+                    top=round(word.coordinates.top / scale),
+                    width=round(word.coordinates.width / scale),
+                    height=round(word.coordinates.height / scale)
+                )})
+            words.append(word)
+
+        return result.model_copy(update={"words": words})
+
+    def _retrieve_ocr_in_workers(
+        self,
+        deadline: Optional[Deadline] = None
+    ) -> List[OcrResult]:
+        """
+        Retrieve the text of all pages in the worker processes, which only
+        receive the handles of the shared pages. Pages that do not finish
+        within the deadline are left without text to be redacted completely.
+        """
+        pool = self._get_pool()
+
+        futures = {}
+        for page, handle in enumerate(self._handles):
+            if not self.is_blank(page=page):
+                futures[page] = pool.submit(_process_ocr, handle, page)
+
+        result = []
+        for page in range(len(self._handles)):
+            if page not in futures:
+                result.append(OcrResult(text="", words=[]))
+            elif deadline is None:
+                result.append(futures[page].result())
+            else:
+                try:
+                    result.append(deadline.run("ocr", futures[page].result))
+                except DeadlineExceeded:
+                    futures[page].cancel()
+                    deadline.degrade(stage="ocr", fallback="page_redaction",
+                                     page=page)
+                    result.append(OcrResult(text="", words=[]))
+
+        return result
+
     def _initialize_ocr(self, provider: Optional[str] = None) -> None:
         """
         Intitialize an ocr provider. If no provider is passed, the first
@@ -125,6 +613,7 @@ class Document():
                 cls = getattr(module, ocr.cls)
 
                 self.ocr_provider = cls(config=ocr.config)
+                self.ocr_provider.metrics = self.metrics
                 return
 
             if self.language not in ocr.languages:
@@ -139,6 +628,7 @@ class Document():
                 cls = getattr(module, ocr.cls)
 
                 self.ocr_provider = cls(config=ocr.config)
+                self.ocr_provider.metrics = self.metrics
                 return
 
         raise Exception(
@@ -150,7 +640,56 @@ class Document():
         page: int,
         transformer: TransformerResult
     ) -> None:
-        draw = ImageDraw.Draw(self.images[page])
+        with self.metrics.timer("render"):
+            self.manipulate_image(
+                image=self.images[page], transformer=transformer)
+
+    def manipulate_pages(
+        self,
+        transformers: dict[int, TransformerResult]
+    ) -> None:
+        """
+        Apply the transformations to several pages at once, by page number.
+        Pages in shared memory are rendered in the worker processes.
+        """
+        if self._store is None:
+            for page, transformer in transformers.items():
+                self.manipulate_page(page=page, transformer=transformer)
+            return
+
+        with self.metrics.timer("render"):
+            pool = self._get_pool()
+
+            futures = [pool.submit(_process_render, self._handles[page],
+                                   transformer)
+                       for page, transformer in transformers.items()]
+
+            for future in futures:
+                future.result()
+
+    def redact_page(self, page: int) -> None:
+        """
+        Cover a whole page, e.g. if it could not be processed in time.
+        """
+        with self.metrics.timer("render"):
+            image = self.images[page]
+            draw = ImageDraw.Draw(image)
+            self.draw_rectangle(
+                draw=draw,
+                coordinates=Coordinates(left=0, top=0, width=image.width,
+                                        height=image.height),
+                color=self._config.document.highlighter_color
+            )
+
+    def manipulate_image(
+        self,
+        image: Image.Image,
+        transformer: TransformerResult
+    ) -> None:
+        """
+        Draw the applied transformations onto an image.
+        """
+        draw = ImageDraw.Draw(image)
 
         for transformation in transformer.transformations:
             if not transformation.applied:
@@ -229,3 +768,72 @@ class Document():
         )
 
 # ---------------------------------------------------------------------------- #
+
+# worker processes keep one document to run its ocr provider and to render
+# the pages they receive from the page store
+
+_worker: Optional[Document] = None
+
+
+def _import_pymupdf() -> Any:
+    """
+    Import PyMuPDF, which is only required to save PDF documents as PDF.
+    """
+    try:
+        import pymupdf
+    except ImportError:
+        try:
+            import fitz as pymupdf  # versions before 1.24
+        except ImportError:
+            raise Exception("Saving PDF documents as PDF requires PyMuPDF, "
+                            "please install it with 'pip install pymupdf'.")
+
+    return pymupdf
+
+
+def _initialize_worker(
+    language: str,
+    config: Config,
+    ocr_provider: Optional[str]
+) -> None:
+    """
+    Initialize the document of a worker process.
+    """
+    global _worker
+
+    document = config.document.model_copy(update={"processes": 1})
+
+    _worker = Document(
+        language=language,
+        config=config.model_copy(update={"document": document}),
+        ocr_provider=ocr_provider
+    )
+
+
+def _process_ocr(handle: PageHandle, page: int) -> OcrResult:
+    """
+    Retrieve the text of a shared page in a worker process.
+    """
+    assert _worker
+
+    return PageStore.attach(
+        handle=handle,
+        function=lambda image: _worker.ocr_provider.process_image(
+            image=image.convert("RGB") if image.mode == "RGBX" else image,
+            page_increment=page)
+    )
+
+
+def _process_render(handle: PageHandle, transformer: TransformerResult) -> None:
+    """
+    Render the transformations onto a shared page in a worker process.
+    """
+    assert _worker
+
+    PageStore.attach(
+        handle=handle,
+        function=lambda image: _worker.manipulate_image(
+            image=image, transformer=transformer)
+    )
+
+# ---------------------------------------------------------------------------- #
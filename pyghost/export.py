@@ -0,0 +1,135 @@
+# ---------------------------------------------------------------------------- #
+
+import os
+import pathlib
+import json
+from types import TracebackType
+from typing import IO, Any, List, Optional, Type
+
+# ---------------------------------------------------------------------------- #
+
+from .models import GhostResult, OcrResult
+
+# ---------------------------------------------------------------------------- #
+
+
+class JsonlExporter():
+    """
+    The JsonlExporter streams the results of a batch into a single JSON Lines
+    file: one compact record per page, keyed by file and page. The records
+    of a file are kept until the file is committed and then appended and
+    flushed at once, so a file that fails or is interrupted leaves no
+    records behind. The source and transformed texts can be left out to
+    keep the export small. Records that include the checksum of the source
+    file and its OCR result can be replayed later.
+    """
+    filename: pathlib.Path
+    include_text: bool
+    _file: IO[str]
+    _pending: List[str]
+
+    def __init__(
+        self,
+        filename: pathlib.Path,
+        include_text: bool = True,
+        append: bool = False
+    ) -> None:
+        """
+        Open the export file. When appending, a last record that has only
+        been written partially (by an interrupted batch) is removed.
+        """
+        self.filename = filename
+        self.include_text = include_text
+        self._pending = []
+
+        if append and filename.exists():
+            self._truncate_partial_record()
+
+        self._file = filename.open("a" if append else "w", encoding="utf-8")
+
+    def __enter__(self) -> "JsonlExporter":
+        return self
+
+    def __exit__(
+        self,
+        type: Optional[Type[BaseException]],
+        value: Optional[BaseException],
+        traceback: Optional[TracebackType]
+    ) -> None:
+        self.close()
+
+    def write(
+        self,
+        file: str,
+        page: int,
+        result: GhostResult,
+        checksum: Optional[str] = None,
+        ocr: Optional[OcrResult] = None
+    ) -> None:
+        """
+        Add the result of a page, it is written when the file is committed.
+        """
+        exclude: Any = None
+        if not self.include_text:
+            exclude = {"transformation": {"source_text", "transformed_text"}}
+
+        record = {
+            "file": file,
+            "page": page,
+            **result.model_dump(mode="json", exclude=exclude)
+        }
+
+        if checksum:
+            record["checksum"] = checksum
+
+        if ocr:
+            record["ocr"] = ocr.model_dump(mode="json")
+
+        self._pending.append(json.dumps(record, separators=(",", ":")))
+
+    def commit(self) -> None:
+        """
+        Append the records of the current file to the export.
+        """
+        if not self._pending:
+            return
+
+        self._file.write("".join(f"{record}\n" for record in self._pending))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = []
+
+    def discard(self) -> None:
+        """
+        Drop the records of the current file, e.g. because it failed.
+        """
+        self._pending = []
+
+    def close(self) -> None:
+        """
+        Commit the remaining records and close the export file.
+        """
+        self.commit()
+        self._file.close()
+
+    def _truncate_partial_record(self) -> None:
+        """
+        Cut the export file after its last complete record.
+        """
+        with self.filename.open("rb+") as file:
+            end = file.seek(0, os.SEEK_END)
+
+            position = end
+            while position > 0:
+                start = max(0, position - 65536)
+                file.seek(start)
+                index = file.read(position - start).rfind(b"\n")
+                if index >= 0:
+                    position = start + index + 1
+                    break
+                position = start
+
+            if position < end:
+                file.truncate(position)
+
+# ---------------------------------------------------------------------------- #
@@ -2,14 +2,22 @@
 
 import pathlib
 import json
+import bisect
 import logging
 import importlib
-from typing import List, Optional
+import re
+import concurrent.futures
+import contextvars
+from typing import Any, List, Optional, Tuple
 
 # ---------------------------------------------------------------------------- #
 
-from .models import Config, Match, TransformerResult, Word
-from .matchers import BaseMatcher
+from .models import Config, Match, OcrResult, Segment, TransformerResult, Word
+from .deadline import Deadline, DeadlineExceeded
+from .matchers import BaseMatcher, MatcherTimeout
+from .metrics import Metrics
+from .prefilter import Prefilter
+from .resolver import MatchResolver
 from .transformers import BaseTransformer
 
 # ---------------------------------------------------------------------------- #
@@ -21,95 +29,655 @@ class Ghost():
     find entities and the configures transformers to transform those
     entities into pseudononymized or anonymized text. It does that efficiently
     in the sense that it iiitializes matchers and transformers only once.
+    find_matches and transform_text do not modify their inputs and return new
+    objects on each call, so one instance can be shared between threads.
     """
     config: Config
     logger: logging.Logger
+    metrics: Metrics
     matchers: dict[str, BaseMatcher]
+    prefilters: dict[str, Prefilter]
+    resolver: MatchResolver
     transformer: BaseTransformer
+    fallback_transformer: Optional[BaseTransformer]
+    executor: Optional[concurrent.futures.Executor]
     language: str
+    _owns_executor: bool
 
     def __init__(
         self,
         language: str,
         config: Config,
-        transformer: Optional[str] = None
+        transformer: Optional[str] = None,
+        metrics: Optional[Metrics] = None,
+        executor: Optional[concurrent.futures.Executor] = None
     ):
         """
-        Initialize Ghost.
+        Initialize Ghost. Pass a Metrics instance to collect the timings and
+        counters of several Ghost and Document instances in one place. Pass
+        an executor (or set max_workers in the configuration) to run the
+        matchers concurrently.
         """
         self.config = config
         self.logger = logging.getLogger("pyghost.ghost")
+        self.metrics = metrics if metrics is not None else Metrics()
+
+        self.executor = executor
+        self._owns_executor = False
 
         self.matchers = {}
+        self.prefilters = {}
+        self.fallback_transformer = None
 
         self.language = language
 
+        self.resolver = MatchResolver(config=config.ghost.resolver)
+
         self.initialize_matchers()
         self.initialize_transformer(provider=transformer)
+        self.initialize_executor()
+
+    def set_metrics(self, metrics: Metrics) -> None:
+        """
+        Collect the metrics of Ghost, its matchers and its transformer in the
+        given instance.
+        """
+        self.metrics = metrics
+
+        for matcher in self.matchers.values():
+            matcher.metrics = metrics
+
+        self.transformer.metrics = metrics
+
+        if self.fallback_transformer is not None:
+            self.fallback_transformer.metrics = metrics
+
+    def __getstate__(self) -> dict[str, Any]:
+        """
+        Executors cannot be pickled, a restored Ghost creates its own.
+        """
+        state = self.__dict__.copy()
+        state["executor"] = None
+        state["_owns_executor"] = False
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        """
+        Restore Ghost and create a new executor if configured.
+        """
+        self.__dict__.update(state)
+        self.initialize_executor()
+
+    def after_fork(self) -> None:
+        """
+        Replace the executor in a forked process. Threads do not survive a
+        fork, so an executor inherited from the parent cannot be used.
+        """
+        if self._owns_executor:
+            self.executor = None
+            self._owns_executor = False
+            self.initialize_executor()
+
+    def close(self) -> None:
+        """
+        Close all matchers and shut down the executor if Ghost has created
+        it.
+        """
+        for matcher in self.matchers.values():
+            matcher.close()
+
+        if self.executor is not None and self._owns_executor:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+            self._owns_executor = False
 
     def find_matches(
         self,
         text: str,
-        words: List[Word]
+        words: List[Word],
+        segments: Optional[List[Segment]] = None,
+        expensive: bool = True
+    ) -> List[Match]:
+        """
+        Find matches in a text using all the configured matchers. Overlapping
+        matches are resolved into a set of non-overlapping matches. Pass the
+        layout segments of an OCR result to let matchers process them
+        separately. Set expensive to False to skip expensive matchers. If a
+        matcher cannot process the text completely, the whole text is
+        matched.
+        """
+        try:
+            matches = self.collect_matches(
+                text=text, segments=segments, expensive=expensive)
+        except MatcherTimeout as exception:
+            return self.redact_text(
+                text=text, words=words, reason=str(exception))
+
+        return self.finish_matches(text=text, words=words, matches=matches)
+
+    def redact_text(
+        self,
+        text: str,
+        words: List[Word],
+        reason: str
     ) -> List[Match]:
         """
-        Find matches in a text using all the configured matchers.
+        Return a single match that covers the whole text, so all its words
+        are transformed.
+        """
+        self.logger.warning(f"Redacting the whole text: {reason}")
+        self.metrics.increment("redacted_texts")
+
+        return self.finish_matches(text=text, words=words, matches=[
+            Match(
+                matcher="redaction",
+                label="redacted",
+                text=text,
+                start=0,
+                end=len(text)
+            )
+        ])
+
+    def find_document_matches(
+        self,
+        pages: List[OcrResult],
+        expensive: bool = True,
+        deadline: Optional[Deadline] = None
+    ) -> List[List[Match]]:
+        """
+        Find matches in all pages of a document. If propagation is enabled,
+        the texts found by any matcher on any page are searched on all pages,
+        so an entity that has been recognized once is found everywhere. With
+        a page budget, expensive matchers (like spacy) only process some of
+        the pages and propagation covers the rest. Pages without words are
+        skipped. Pass a deadline to limit the time of the matchers, and to
+        redact pages completely that a matcher cannot process completely
+        (otherwise, their whole text is matched).
+        """
+        if deadline is not None and deadline.enabled:
+            return self.find_document_matches_within(
+                pages=pages, deadline=deadline)
+
+        return self.collect_document_matches(
+            pages=pages, expensive=expensive, deadline=deadline)
+
+    def collect_document_matches(
+        self,
+        pages: List[OcrResult],
+        expensive: bool = True,
+        deadline: Optional[Deadline] = None
+    ) -> List[List[Match]]:
+        """
+        Find matches in all pages of a document, see find_document_matches.
         """
+        config = self.config.ghost.propagation
+
+        budget = set(range(len(pages)))
+        if config.enabled:
+            budget = self.get_budget_pages(pages=len(pages))
+
+        collected: List[List[Match]] = []
+        redacted: dict[int, str] = {}
+        for index, page in enumerate(pages):
+            if not page.words:
+                collected.append([])
+                continue
+
+            if index not in budget:
+                self.metrics.increment("budget_skipped_pages")
+
+            try:
+                collected.append(self.collect_matches(
+                    text=page.text, segments=page.segments,
+                    expensive=expensive and index in budget))
+            except MatcherTimeout as exception:
+                redacted[index] = str(exception)
+                collected.append([])
+
+                if deadline is not None:
+                    self.logger.warning(f"Redacting page {index}: "
+                                        f"{exception}")
+                    deadline.degrade(stage="matchers",
+                                     fallback="page_redaction", page=index)
+
+        if config.enabled:
+            with self.metrics.timer("propagation"):
+                propagation = self.get_propagation_pattern(
+                    matches=[match for matches in collected
+                             for match in matches])
+
+                if propagation is not None:
+                    (pattern, sources) = propagation
+
+                    for index, page in enumerate(pages):
+                        if index in redacted:
+                            continue
+
+                        propagated = self.propagate(
+                            text=page.text, pattern=pattern, sources=sources)
+                        self.metrics.increment("propagated_matches",
+                                               len(propagated))
+                        collected[index] += propagated
+
+        result = []
+        for index, page in enumerate(pages):
+            if not page.words or (index in redacted and deadline is not None):
+                result.append([])
+            elif index in redacted:
+                result.append(self.redact_text(
+                    text=page.text, words=page.words,
+                    reason=redacted[index]))
+            else:
+                result.append(self.finish_matches(
+                    text=page.text, words=page.words,
+                    matches=collected[index]))
+
+        return result
+
+    def find_document_matches_within(
+        self,
+        pages: List[OcrResult],
+        deadline: Deadline
+    ) -> List[List[Match]]:
+        """
+        Find matches in all pages of a document within the matchers' budget.
+        If the budget is exceeded, the matches are found again without
+        expensive matchers (e.g. only with regex patterns) with the rest of
+        the document's budget, and if that fails as well, all pages are left
+        without matches to be redacted completely.
+        """
+        try:
+            return deadline.run("matchers", self.collect_document_matches,
+                                pages=pages, deadline=deadline)
+        except DeadlineExceeded:
+            pass
+
+        if not deadline.expired():
+            deadline.degrade(stage="matchers", fallback="regex_only")
+            try:
+                return deadline.run(None, self.collect_document_matches,
+                                    pages=pages, expensive=False,
+                                    deadline=deadline)
+            except DeadlineExceeded:
+                pass
+
+        deadline.degrade(stage="matchers", fallback="page_redaction")
+        return [[] for _ in pages]
+
+    def get_budget_pages(self, pages: int) -> set[int]:
+        """
+        Return the pages that expensive matchers process: all pages without
+        a budget, otherwise the first pages or pages spread evenly over the
+        document.
+        """
+        config = self.config.ghost.propagation
+
+        if config.budget_pages is None or config.budget_pages >= pages:
+            return set(range(pages))
+
+        if config.budget_pages <= 0:
+            return set()
+
+        if config.budget_sample == "first":
+            return set(range(config.budget_pages))
+
+        step = pages / config.budget_pages
+        return {int(index * step) for index in range(config.budget_pages)}
+
+    def get_propagation_pattern(
+        self,
+        matches: List[Match]
+    ) -> Optional[Tuple[re.Pattern, dict[str, Match]]]:
+        """
+        Compile the texts of the matches into a single pattern that finds all
+        of them at once, as whole words and longest texts first. Return the
+        pattern and the first match of each text, or None if there is no
+        text to propagate.
+        """
+        config = self.config.ghost.propagation
+
+        sources: dict[str, Match] = {}
+        for match in matches:
+            text = match.text.strip()
+            if len(text) < config.min_length:
+                continue
+
+            if config.labels and match.label not in config.labels:
+                continue
+
+            key = text if config.case_sensitive else text.casefold()
+            if key not in sources:
+                sources[key] = match
+
+        if not sources:
+            return None
+
+        texts = sorted(sources, key=len, reverse=True)
+        pattern = re.compile(
+            r"(?<!\w)(?:" + "|".join(re.escape(text) for text in texts) +
+            r")(?!\w)",
+            flags=0 if config.case_sensitive else re.IGNORECASE)
+
+        self.logger.debug(f"Propagating {len(texts)} texts.")
+
+        return (pattern, sources)
+
+    def propagate(
+        self,
+        text: str,
+        pattern: re.Pattern,
+        sources: dict[str, Match]
+    ) -> List[Match]:
+        """
+        Find all occurrences of the propagated texts in a text. The matches
+        take the label of the match the text has been found by first.
+        """
+        config = self.config.ghost.propagation
+
+        result = []
+        for found in pattern.finditer(text):
+            key = found.group(0)
+            if not config.case_sensitive:
+                key = key.casefold()
+
+            source = sources[key]
+            result.append(
+                Match(
+                    matcher="propagation",
+                    label=source.label,
+                    text=found.group(0),
+                    start=found.start(),
+                    end=found.end(),
+                    model_label=source.model_label
+                )
+            )
+
+        return result
+
+    def collect_matches(
+        self,
+        text: str,
+        segments: Optional[List[Segment]] = None,
+        expensive: bool = True
+    ) -> List[Match]:
+        """
+        Run the matchers and return their matches in the order of the
+        configuration, without resolving overlaps. Set expensive to False to
+        skip expensive matchers.
+        """
+        with self.metrics.timer("matchers"):
+            results = self.run_matchers(
+                text=text, segments=segments, expensive=expensive)
+
         matches = []
-        for name, matcher in self.matchers.items():
-            self.logger.debug(f"Processing matcher '{name}'.")
+        for name in self.matchers:
+            matches += results.get(name, [])
+
+        return matches
 
-            new_matches = matcher.process(text=text)
-            matches += new_matches
+    def finish_matches(
+        self,
+        text: str,
+        words: List[Word],
+        matches: List[Match]
+    ) -> List[Match]:
+        """
+        Resolve overlapping matches and add the words they touch.
+        """
+        with self.metrics.timer("resolve"):
+            matches = self.resolver.resolve(text=text, matches=matches)
 
-            self.logger.debug(f"Found {len(new_matches)} matches.")
+        with self.metrics.timer("touched_words"):
+            matches = self.get_touched_words(matches=matches, words=words)
 
-        self.get_touched_words(matches=matches, words=words)
+        self.metrics.increment("words", len(words))
+        self.metrics.increment("matches", len(matches))
 
         return matches
 
+    def run_matchers(
+        self,
+        text: str,
+        segments: Optional[List[Segment]] = None,
+        expensive: bool = True
+    ) -> dict[str, List[Match]]:
+        """
+        Run all matchers on a text, one after another or concurrently if an
+        executor is available, and return their matches by name. The matchers
+        are independent of each other, their matches are merged in the order
+        of the configuration afterwards so the result does not depend on
+        which matcher finishes first. The matchers inherit the budget of the
+        calling stage.
+        """
+        names = [name for name, matcher in self.matchers.items()
+                 if expensive or not matcher.expensive]
+
+        if self.executor is None or len(names) < 2:
+            return {name: self.run_matcher(name=name, text=text,
+                                           segments=segments)
+                    for name in names}
+
+        futures = {name: self.executor.submit(
+            contextvars.copy_context().run, self.run_matcher, name, text,
+            segments) for name in names}
+
+        return {name: future.result() for name, future in futures.items()}
+
+    def run_matcher(
+        self,
+        name: str,
+        text: str,
+        segments: Optional[List[Segment]] = None
+    ) -> List[Match]:
+        """
+        Run a single matcher and measure its time.
+        """
+        self.logger.debug(f"Processing matcher '{name}'.")
+
+        if name in self.prefilters:
+            with self.metrics.timer(f"prefilter.{name}"):
+                passed = self.apply_prefilter(
+                    name=name, text=text, segments=segments)
+
+            if passed is None:
+                self.logger.debug(f"Skipping matcher '{name}', no segment "
+                                  f"passed its prefilter.")
+                return []
+
+            segments = passed
+
+        with self.metrics.timer(f"matcher.{name}"):
+            if segments:
+                matches = self.matchers[name].process_segments(
+                    text=text, segments=segments)
+            else:
+                matches = self.matchers[name].process(text=text)
+
+        self.logger.debug(f"Found {len(matches)} matches.")
+
+        return matches
+
+    def apply_prefilter(
+        self,
+        name: str,
+        text: str,
+        segments: Optional[List[Segment]] = None
+    ) -> Optional[List[Segment]]:
+        """
+        Evaluate the prefilter of a matcher on each segment of the level the
+        matcher processes (or the level of the prefilter, or the whole text
+        without segments). Return None if no segment passes, so the matcher
+        can be skipped. Otherwise, return the segments to process: only the
+        passing segments if the matcher processes segments separately, all
+        segments if it processes the whole text anyway (an empty list for a
+        text without segments).
+        """
+        prefilter = self.prefilters[name]
+        level = self.matchers[name].segment_level or prefilter.config.level
+
+        candidates = [segment for segment in segments or []
+                      if segment.level == level]
+        if not candidates:
+            candidates = [Segment(level=level, start=0, end=len(text))]
+
+        passed = []
+        for segment in candidates:
+            reason = prefilter.check(text=text[segment.start:segment.end])
+
+            if reason is None:
+                passed.append(segment)
+            else:
+                self.metrics.increment(f"prefilter.{name}.rejected.{reason}")
+
+        self.metrics.increment(f"prefilter.{name}.segments", len(candidates))
+        self.metrics.increment(f"prefilter.{name}.skipped",
+                               len(candidates) - len(passed))
+
+        if not passed:
+            return None
+
+        if not segments:
+            return []
+
+        if self.matchers[name].segment_level is None or \
+                len(passed) == len(candidates):
+            return segments
+
+        return passed
+
     def get_touched_words(
         self,
         matches: List[Match],
         words: List[Word]
-    ) -> None:
+    ) -> List[Match]:
         """
-        Add all words to the match that have been "touched" by it, i.e.
-        overlap with the match.
+        Return copies of the matches with all words that have been "touched"
+        by them, i.e. start or end inside the match.
         """
+        if any(words[index].start > words[index+1].start
+               for index in range(len(words)-1)):
+            words = sorted(words, key=lambda word: word.start)
+
+        starts = [word.start for word in words]
+        longest = max([word.end - word.start for word in words], default=0)
+
+        result = []
         for match in matches:
-            match.touched = []
-            for word in words:
+            touched = []
+
+            # only words that start in the match or at most one word length
+            # before it can touch it
+            first = bisect.bisect_left(starts, match.start - longest)
+            last = bisect.bisect_left(starts, match.end)
+
+            for word in words[first:last]:
                 if not ((word.start >= match.start
                          and word.start < match.end) or
                         (word.end > match.start
                          and word.end <= match.end)):
                     continue
 
-                match.touched.append(word.copy())
+                touched.append(word.model_copy())
 
-            self.logger.debug(f"Found {len(match.touched)} touched words for "
+            self.logger.debug(f"Found {len(touched)} touched words for "
                               f"match '{match.text}'")
 
+            result.append(match.model_copy(update={"touched": touched}))
+
+        return result
+
     def transform_text(
         self,
         text: str,
         matches: List[Match],
-        words: List[Word]
+        words: List[Word],
+        deadline: Optional[Deadline] = None,
+        page: Optional[int] = None
     ) -> TransformerResult:
         """
         Call the transformer to #todo
         """
-        result = self.transformer.process(
-            text=text, matches=matches, words=words)
+        if deadline is not None and deadline.enabled:
+            return self.transform_text_within(
+                text=text, matches=matches, words=words, deadline=deadline,
+                page=page)
+
+        with self.metrics.timer("transform"):
+            result = self.transformer.process(
+                text=text, matches=matches, words=words)
 
         return result
 
+    def transform_text_within(
+        self,
+        text: str,
+        matches: List[Match],
+        words: List[Word],
+        deadline: Deadline,
+        page: Optional[int] = None
+    ) -> TransformerResult:
+        """
+        Transform a text within the transformation budget. If the budget is
+        exceeded, the fallback transformer (labels by default) is used with
+        the rest of the document's budget, and if that fails as well, the
+        page is left without transformations to be redacted completely.
+        """
+        try:
+            return deadline.run("transform", self.transform_text, text=text,
+                                matches=matches, words=words)
+        except DeadlineExceeded:
+            pass
+
+        if not deadline.expired():
+            deadline.degrade(stage="transform", fallback="label_transformer",
+                             page=page)
+
+            transformer = self.get_fallback_transformer(
+                provider=deadline.config.fallback_transformer)
+
+            try:
+                with self.metrics.timer("transform"):
+                    return deadline.run(None, transformer.process, text=text,
+                                        matches=matches, words=words)
+            except DeadlineExceeded:
+                pass
+
+        deadline.degrade(stage="transform", fallback="page_redaction",
+                         page=page)
+        return TransformerResult(
+            source_text=text, transformed_text="", transformations=[])
+
+    def get_fallback_transformer(self, provider: str) -> BaseTransformer:
+        """
+        Return the fallback transformer, initialize it on first use.
+        """
+        if self.fallback_transformer is None:
+            for transformer in self.config.transformers:
+                if transformer.name != provider:
+                    continue
+
+                self.logger.debug(
+                    f"Initializing fallback transformer '{provider}'.")
+
+                module = importlib.import_module(transformer.module)
+                cls = getattr(module, transformer.cls)
+
+                self.fallback_transformer = cls(config=transformer.config)
+                self.fallback_transformer.metrics = self.metrics
+                break
+            else:
+                raise Exception(
+                    f"Fallback transformer '{provider}' not found. Please "
+                    f"check your configuration.")
+
+        return self.fallback_transformer
+
     def initialize_matchers(self) -> None:
         """
         Intitialize all active matchers once. 
         """
         self.matchers = {}
+        self.prefilters = {}
 
         for matcher in self.config.matchers:
             if matcher.name in self.matchers:
@@ -129,6 +697,11 @@ class Ghost():
                 name=matcher.name,
                 label=matcher.label,
                 config=matcher.config)
+            self.matchers[matcher.name].metrics = self.metrics
+
+            if matcher.prefilter is not None:
+                self.prefilters[matcher.name] = Prefilter(
+                    config=matcher.prefilter)
 
     def initialize_transformer(self, provider: Optional[str] = None) -> None:
         """
@@ -144,6 +717,7 @@ class Ghost():
                 cls = getattr(module, transformer.cls)
 
                 self.transformer = cls(config=transformer.config)
+                self.transformer.metrics = self.metrics
                 return
 
             if not provider:
@@ -156,10 +730,28 @@ class Ghost():
                 cls = getattr(module, transformer.cls)
 
                 self.transformer = cls(config=transformer.config)
+                self.transformer.metrics = self.metrics
                 return
 
         raise Exception(
             f"No suitable transformer found. "
             f"Please check your configuration.")
 
+    def initialize_executor(self) -> None:
+        """
+        Create a thread pool to run the matchers concurrently if max_workers
+        is configured and no executor has been passed.
+        """
+        if self.executor is not None or self.config.ghost.max_workers < 2:
+            return
+
+        if len(self.matchers) < 2:
+            return
+
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(self.config.ghost.max_workers,
+                            len(self.matchers)),
+            thread_name_prefix="pyghost-matcher")
+        self._owns_executor = True
+
 # ---------------------------------------------------------------------------- #
@@ -0,0 +1,222 @@
+# ---------------------------------------------------------------------------- #
+
+import pathlib
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from typing import Any, List, Literal, Optional
+
+# ---------------------------------------------------------------------------- #
+
+from .models import Config, ManifestEntry
+
+# ---------------------------------------------------------------------------- #
+
+
+def hash_file(filename: pathlib.Path) -> str:
+    """
+    Return the SHA-256 hash of a file's content.
+    """
+    digest = hashlib.sha256()
+    with filename.open("rb") as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+def hash_config(config: Config, **options: Any) -> str:
+    """
+    Return the SHA-256 hash of a configuration and additional options that
+    influence the output, like the language or the transformer.
+    """
+    # options that are switched off are left out, so adding a new switch
+    # keeps the hashes (and the progress) of existing manifests
+    options = {key: value for (key, value) in options.items()
+               if value is not False}
+
+    content = json.dumps(
+        {"config": config.model_dump(mode="json"), "options": options},
+        sort_keys=True,
+        default=str
+    )
+
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+# ---------------------------------------------------------------------------- #
+
+
+class Manifest():
+    """
+    The Manifest records the state of each input of a batch in a SQLite
+    database: the hash of its content and of the configuration, its output
+    files, and whether it is done or has failed. Every change is committed
+    immediately, so an interrupted batch can be resumed and only inputs
+    that are new, changed, or failed are processed again.
+    """
+    filename: pathlib.Path
+    _connection: sqlite3.Connection
+    _logger: logging.Logger
+
+    def __init__(self, filename: pathlib.Path) -> None:
+        """
+        Open (or create) a manifest.
+        """
+        self.filename = filename
+        self._logger = logging.getLogger("pyghost.manifest")
+
+        self._connection = sqlite3.connect(filename)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "input TEXT PRIMARY KEY, "
+            "content_hash TEXT NOT NULL, "
+            "config_hash TEXT NOT NULL, "
+            "outputs TEXT NOT NULL, "
+            "status TEXT NOT NULL, "
+            "error TEXT, "
+            "updated REAL NOT NULL)"
+        )
+        self._connection.commit()
+
+    def close(self) -> None:
+        """
+        Close the manifest.
+        """
+        self._connection.close()
+
+    def get(self, input: pathlib.Path) -> Optional[ManifestEntry]:
+        """
+        Return the entry of an input, if there is one.
+        """
+        row = self._connection.execute(
+            "SELECT input, content_hash, config_hash, outputs, status, "
+            "error, updated FROM entries WHERE input = ?",
+            (str(input),)
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        return self._to_entry(row=row)
+
+    def entries(
+        self,
+        status: Optional[Literal["started", "done", "failed"]] = None
+    ) -> List[ManifestEntry]:
+        """
+        Return all entries, optionally only those with a certain status.
+        """
+        query = "SELECT input, content_hash, config_hash, outputs, status, " \
+            "error, updated FROM entries"
+        parameters: tuple[str, ...] = ()
+        if status:
+            query += " WHERE status = ?"
+            parameters = (status,)
+
+        return [self._to_entry(row=row)
+                for row in self._connection.execute(query, parameters)]
+
+    def is_done(
+        self,
+        input: pathlib.Path,
+        content_hash: str,
+        config_hash: str
+    ) -> bool:
+        """
+        Check whether an input has already been processed with the same
+        content and configuration, and all of its outputs still exist.
+        """
+        entry = self.get(input=input)
+
+        if entry is None or entry.status != "done":
+            return False
+
+        if entry.content_hash != content_hash or \
+                entry.config_hash != config_hash:
+            return False
+
+        return all(pathlib.Path(output).is_file()
+                   for output in entry.outputs)
+
+    def start(
+        self,
+        input: pathlib.Path,
+        content_hash: str,
+        config_hash: str
+    ) -> None:
+        """
+        Record that the processing of an input has started.
+        """
+        self._write(input=input, content_hash=content_hash,
+                    config_hash=config_hash, outputs=[], status="started")
+
+    def finish(self, input: pathlib.Path, outputs: List[pathlib.Path]) -> None:
+        """
+        Record that an input has been processed successfully.
+        """
+        self._update(input=input, status="done",
+                     outputs=[str(output) for output in outputs])
+
+    def fail(self, input: pathlib.Path, error: str) -> None:
+        """
+        Record that the processing of an input has failed.
+        """
+        self._update(input=input, status="failed", error=error)
+
+    def _write(
+        self,
+        input: pathlib.Path,
+        content_hash: str,
+        config_hash: str,
+        outputs: List[str],
+        status: str
+    ) -> None:
+        """
+        Insert or replace the entry of an input.
+        """
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO entries (input, content_hash, "
+                "config_hash, outputs, status, error, updated) "
+                "VALUES (?, ?, ?, ?, ?, NULL, ?)",
+                (str(input), content_hash, config_hash, json.dumps(outputs),
+                 status, time.time())
+            )
+
+    def _update(
+        self,
+        input: pathlib.Path,
+        status: str,
+        outputs: Optional[List[str]] = None,
+        error: Optional[str] = None
+    ) -> None:
+        """
+        Update the status of an existing entry.
+        """
+        with self._connection:
+            self._connection.execute(
+                "UPDATE entries SET status = ?, "
+                "outputs = COALESCE(?, outputs), error = ?, updated = ? "
+                "WHERE input = ?",
+                (status, json.dumps(outputs) if outputs is not None else None,
+                 error, time.time(), str(input))
+            )
+
+    def _to_entry(self, row: tuple[Any, ...]) -> ManifestEntry:
+        """
+        Convert a database row into an entry.
+        """
+        return ManifestEntry(
+            input=row[0],
+            content_hash=row[1],
+            config_hash=row[2],
+            outputs=json.loads(row[3]),
+            status=row[4],
+            error=row[5],
+            updated=row[6]
+        )
+
+# ---------------------------------------------------------------------------- #
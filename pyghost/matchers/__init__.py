@@ -1,3 +1,21 @@
-from ._base import BaseMatcher
-from .regex import RegexMatcher
-from .spacy import SpacyMatcher
+import importlib
+from typing import Any
+
+from ._base import BaseMatcher, MatcherTimeout
+
+# the implementations are imported on first access, so that heavy
+# dependencies like spacy are only loaded if a configuration uses them
+_implementations = {
+    "RegexMatcher": ".regex",
+    "SpacyMatcher": ".spacy",
+}
+
+__all__ = ["BaseMatcher", "MatcherTimeout", *_implementations]
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _implementations:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+    module = importlib.import_module(_implementations[name], __name__)
+    return getattr(module, name)
@@ -6,7 +6,20 @@ from typing import Any, List, Optional
 
 # ---------------------------------------------------------------------------- #
 
-from ..models import Match
+from ..models import Match, Segment
+from ..budget import DeadlineExceeded
+from ..metrics import Metrics
+
+# ---------------------------------------------------------------------------- #
+
+
+class MatcherTimeout(DeadlineExceeded):
+    """
+    Raised by a matcher that cannot process a text completely within its own
+    time limits, e.g. a pattern that backtracks catastrophically. The text
+    must then be redacted completely.
+    """
+    pass
 
 # ---------------------------------------------------------------------------- #
 
@@ -25,9 +38,13 @@ class BaseMatcher():
 
     config: MatcherConfig
     logger: logging.Logger
+    metrics: Metrics
     name: str
     label: str
 
+    # expensive matchers can be limited to a budget of pages per document
+    expensive: bool = False
+
     def __init__(
         self,
         name: str,
@@ -39,6 +56,7 @@ class BaseMatcher():
         """
         self.config = self.MatcherConfig(**config)
         self.logger = logging.getLogger("pyghost.matchers")
+        self.metrics = Metrics()
         self.name = name
         self.label = label
 
@@ -48,4 +66,31 @@ class BaseMatcher():
         """
         return []
 
+    def process_segments(
+        self,
+        text: str,
+        segments: List[Segment]
+    ) -> List[Match]:
+        """
+        Overwrite this method to process a text that comes with layout
+        segments (blocks, paragraphs and lines), e.g. to process the segments
+        separately. By default, the whole text is processed.
+        """
+        return self.process(text=text)
+
+    @property
+    def segment_level(self) -> Optional[str]:
+        """
+        Overwrite this property to return the level of the layout segments
+        the matcher processes separately, if any.
+        """
+        return None
+
+    def close(self) -> None:
+        """
+        Overwrite this method to release resources or persist state when the
+        matcher is no longer needed.
+        """
+        pass
+
 # ---------------------------------------------------------------------------- #
@@ -1,21 +1,91 @@
 # ---------------------------------------------------------------------------- #
 
 import pydantic
+import logging
 import re
-from typing import Any, List, Optional
+import time
+from typing import Any, List, Literal, Optional
 
 # ---------------------------------------------------------------------------- #
 
-from ._base import BaseMatcher
+from ._base import BaseMatcher, MatcherTimeout
+from ..budget import DeadlineExceeded, get_timeout, is_expired
 from ..models import Match
 
 # ---------------------------------------------------------------------------- #
 
 
+# the parser of the re module is private and has been renamed in Python 3.11
+try:
+    from re import _constants as sre_constants  # type: ignore
+    from re import _parser as sre_parse  # type: ignore
+except ImportError:
+    try:
+        import sre_constants  # type: ignore
+        import sre_parse  # type: ignore
+    except ImportError:
+        sre_constants = None
+        sre_parse = None
+
+# ---------------------------------------------------------------------------- #
+
+
 class PatternConfig(pydantic.BaseModel):
     pattern: str
     group: int
-    compiled: Optional[re.Pattern] = None
+    compiled: Optional[Any] = None
+
+# ---------------------------------------------------------------------------- #
+
+
+def find_nested_quantifiers(pattern: str) -> List[str]:
+    """
+    Return the parts of a pattern that repeat a group which itself contains a
+    variable quantifier, like '(\\w+\\s?)+'. Such patterns can backtrack
+    exponentially on text that almost matches. Possessive quantifiers and
+    atomic groups do not backtrack and are not reported. If the parser of the
+    re module is not available, no parts are reported.
+    """
+    if sre_parse is None or sre_constants is None:
+        logging.getLogger("pyghost.matchers").debug(
+            "The parser of the re module is not available, patterns are not "
+            "checked for nested quantifiers.")
+        return []
+
+    repeats = (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT)
+    atomic = getattr(sre_constants, "ATOMIC_GROUP", None)
+
+    def children(value: Any) -> List[Any]:
+        if isinstance(value, sre_parse.SubPattern):
+            return [value]
+        if isinstance(value, (tuple, list)):
+            return [child for item in value for child in children(item)]
+        return []
+
+    def has_variable_repeat(subpattern: Any) -> bool:
+        for opcode, value in subpattern:
+            if atomic is not None and opcode == atomic:
+                continue
+            if opcode in repeats and value[1] > 1 and value[1] != value[0]:
+                return True
+            if any(has_variable_repeat(child) for child in children(value)):
+                return True
+        return False
+
+    found = []
+
+    def visit(subpattern: Any) -> None:
+        for opcode, value in subpattern:
+            if opcode in repeats and value[1] > 1 and \
+                    has_variable_repeat(value[2]):
+                found.append(str(value[2]))
+                continue
+            for child in children(value):
+                visit(child)
+
+    visit(sre_parse.parse(pattern))
+
+    return found
 
 # ---------------------------------------------------------------------------- #
 
@@ -27,6 +97,11 @@ class RegexMatcher(BaseMatcher):
     class MatcherConfig(pydantic.BaseModel):
         patterns: List[str | PatternConfig] = []
         patterns_file: Optional[str] = None  # todo
+        unsafe_patterns: Literal["allow", "warn", "reject"] = "warn"
+        backend: Literal["re", "regex"] = "re"
+        pattern_timeout: Optional[float] = None
+        text_timeout: Optional[float] = None
+        slow_pattern: float = 0.5
 
     compiled_patterns: List[PatternConfig]
 
@@ -52,6 +127,22 @@ class RegexMatcher(BaseMatcher):
         self.logger.debug(
             f"Compiling {len(self.config.patterns)} regex patterns.")
 
+        # the regex module can stop a pattern after a timeout, the re module
+        # cannot, so timeouts require it
+        backend: Any = re
+        if self.config.backend == "regex":
+            try:
+                import regex
+            except ImportError:
+                raise Exception(
+                    f"Matcher '{self.name}' uses the 'regex' backend, "
+                    f"please install it with 'pip install regex'.")
+            backend = regex
+        elif self.config.pattern_timeout is not None:
+            raise Exception(
+                f"Matcher '{self.name}' has a pattern_timeout, which "
+                f"requires the 'regex' backend.")
+
         self.compiled_patterns = []
         for pattern in self.config.patterns:
             if isinstance(pattern, str):
@@ -60,39 +151,126 @@ class RegexMatcher(BaseMatcher):
                     group=0
                 )
 
-            pattern.compiled = re.compile(pattern=pattern.pattern)
+            self._check_pattern(pattern=pattern.pattern)
+
+            pattern.compiled = backend.compile(pattern.pattern)
 
             self.compiled_patterns.append(pattern)
 
+    def _check_pattern(self, pattern: str) -> None:
+        """
+        Warn about or reject patterns with nested quantifiers.
+        """
+        assert isinstance(self.config, self.MatcherConfig)
+
+        if self.config.unsafe_patterns == "allow":
+            return
+
+        nested = find_nested_quantifiers(pattern=pattern)
+        if not nested:
+            return
+
+        message = (f"Pattern '{pattern}' of matcher '{self.name}' repeats "
+                   f"a group with a variable quantifier and can backtrack "
+                   f"catastrophically. Use a possessive quantifier, an "
+                   f"atomic group, or a more specific pattern.")
+
+        if self.config.unsafe_patterns == "reject":
+            raise Exception(message)
+
+        self.logger.warning(message)
+
     def process(self, text: str) -> List[Match]:
         """
-        Process all patterns.
+        Process all patterns. If a pattern times out or the text_timeout
+        runs out, the text has not been scanned completely and
+        MatcherTimeout is raised, so it can be redacted completely. Within
+        the budget of a stage, DeadlineExceeded is raised when it runs out.
+        The regex backend stops a running pattern, the re backend can only
+        stop between patterns.
         """
+        assert isinstance(self.config, self.MatcherConfig)
+
+        deadline = None
+        if self.config.text_timeout is not None:
+            deadline = time.perf_counter() + self.config.text_timeout
+
         result = []
         for pattern in self.compiled_patterns:
-            result += self._match_pattern(text=text, pattern=pattern)
+            timeout = self.config.pattern_timeout
+
+            if deadline is not None:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    self.metrics.increment("regex.timeouts")
+                    raise MatcherTimeout(
+                        f"Matcher '{self.name}' ran out of time after "
+                        f"{self.config.text_timeout:.2f}s on a text of "
+                        f"{len(text)} characters.")
+
+                # only the regex backend can stop a running pattern
+                if self.config.backend == "regex":
+                    timeout = remaining if timeout is None else \
+                        min(timeout, remaining)
+
+            budget = get_timeout(timeout=timeout)
+            if self.config.backend == "regex":
+                timeout = budget
+
+            start = time.perf_counter()
+            result += self._match_pattern(
+                text=text, pattern=pattern, timeout=timeout)
+            elapsed = time.perf_counter() - start
+
+            if elapsed >= self.config.slow_pattern:
+                self.logger.warning(
+                    f"Pattern '{pattern.pattern}' of matcher '{self.name}' "
+                    f"took {elapsed:.2f}s on a text of {len(text)} "
+                    f"characters.")
+                self.metrics.increment("regex.slow_patterns")
+                self.metrics.add_time(f"regex.slow.{self.name}", elapsed)
 
         return result
 
-    def _match_pattern(self, text: str, pattern: PatternConfig) -> List[Match]:
+    def _match_pattern(
+        self,
+        text: str,
+        pattern: PatternConfig,
+        timeout: Optional[float] = None
+    ) -> List[Match]:
         """
         Process a single pattern and find all matches.
         """
-        matches = re.finditer(pattern=pattern.pattern, string=text)
+        assert pattern.compiled
+
+        if timeout is None:
+            matches = pattern.compiled.finditer(text)
+        else:
+            matches = pattern.compiled.finditer(text, timeout=timeout)
 
         result = []
-        for match in matches:
-            text = match.group(pattern.group)
-
-            result.append(
-                Match(
-                    matcher=self.name,
-                    label=self.label,
-                    text=text,
-                    start=match.start(),
-                    end=match.end()
+        try:
+            for match in matches:
+                result.append(
+                    Match(
+                        matcher=self.name,
+                        label=self.label,
+                        text=match.group(pattern.group),
+                        start=match.start(),
+                        end=match.end()
+                    )
                 )
-            )
+        except TimeoutError:
+            if is_expired():
+                raise DeadlineExceeded(
+                    f"Pattern '{pattern.pattern}' of matcher '{self.name}' "
+                    f"did not finish within the budget.")
+
+            self.metrics.increment("regex.timeouts")
+            raise MatcherTimeout(
+                f"Pattern '{pattern.pattern}' of matcher '{self.name}' timed "
+                f"out after {timeout:.2f}s on a text of {len(text)} "
+                f"characters.")
 
         return result
 
@@ -1,13 +1,17 @@
 # ---------------------------------------------------------------------------- #
 
 import pydantic
+import pathlib
+import re
 import spacy
-from typing import Any, List, Optional
+import threading
+from typing import Any, List, Literal, Optional, Tuple
 
 # ---------------------------------------------------------------------------- #
 
 from ._base import BaseMatcher
-from ..models import Match
+from ..cache import Entity, SegmentCache
+from ..models import Match, Segment
 
 # ---------------------------------------------------------------------------- #
 
@@ -15,9 +19,13 @@ from ..models import Match
 class SpacyCacher():
 
     models: dict[str, spacy.Language]
+    segments: dict[str, SegmentCache]
+    lock: threading.Lock
 
     def __init__(self) -> None:
         self.models = {}
+        self.segments = {}
+        self.lock = threading.Lock()
 
 
 cache = SpacyCacher()
@@ -34,8 +42,23 @@ class SpacyMatcher(BaseMatcher):
     class MatcherConfig(pydantic.BaseModel):
         model: str
         labels: Optional[List[str]] = None
+        chunk_size: int = 100000
+        chunk_overlap: int = 200
+        chunk_boundary: Literal["sentence", "paragraph"] = "sentence"
+        n_process: int = 1
+        batch_size: int = 4
+        segment_cache: bool = False
+        segment_cache_size: int = 10000
+        segment_cache_file: Optional[str] = None
+        segment_boundary: Literal["line", "paragraph"] = "paragraph"
+        ocr_segments: Optional[Literal["block", "paragraph",
+                                       "line"]] = "paragraph"
 
     model: Optional[spacy.Language] = None
+    model_path: Optional[str] = None
+    segments: Optional[SegmentCache] = None
+
+    expensive = True
 
     def __init__(
         self,
@@ -46,19 +69,45 @@ class SpacyMatcher(BaseMatcher):
         super().__init__(name=name, label=label, config=config)
 
         self.model = None
+        self.model_path = None
+        self.segments = None
+        self._load_model()
+
+    def __getstate__(self) -> dict[str, Any]:
+        """
+        Pickle the matcher without its model and segment cache, but with the
+        pinned path the model was loaded from.
+        """
+        state = self.__dict__.copy()
+        state["model"] = None
+        state["segments"] = None
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        """
+        Restore a pickled matcher and load its model from the pinned path.
+        """
+        self.__dict__.update(state)
         self._load_model()
 
     def _load_model(self) -> None:
         """
-        Attempt to load a spacy model.
+        Attempt to load a spacy model. If the matcher has been restored from
+        a snapshot, the model is loaded directly from its pinned path.
         """
         assert isinstance(self.config, self.MatcherConfig)
 
+        location: str | pathlib.Path = self.config.model
+        if self.model_path and pathlib.Path(self.model_path).is_dir():
+            location = pathlib.Path(self.model_path)
+
         try:
-            if not self.config.model in cache.models:
-                self.logger.debug(
-                    f"Loading spacy model '{self.config.model}'.")
-                cache.models[self.config.model] = spacy.load(self.config.model)
+            with cache.lock:
+                if not self.config.model in cache.models:
+                    self.logger.debug(
+                        f"Loading spacy model '{self.config.model}' "
+                        f"from '{location}'.")
+                    cache.models[self.config.model] = spacy.load(location)
         except:
             raise Exception(f"The spacy model '{self.config.model}' is not "
                             f"installed. Use 'python -m spacy download "
@@ -66,20 +115,286 @@ class SpacyMatcher(BaseMatcher):
 
         self.model = cache.models[self.config.model]
 
+        if self.model.path:
+            self.model_path = str(self.model.path)
+
+        if self.config.segment_cache:
+            self._load_segment_cache()
+
+    def _load_segment_cache(self) -> None:
+        """
+        Attach the segment cache of the model. Matchers that use the same
+        model share one cache, as the entities are filtered by label only
+        after they have been retrieved from it. The cache keeps the size and
+        file of the first matcher, other settings are ignored with a
+        warning.
+        """
+        assert isinstance(self.config, self.MatcherConfig)
+
+        filename = None
+        if self.config.segment_cache_file:
+            filename = pathlib.Path(self.config.segment_cache_file)
+
+        with cache.lock:
+            if not self.config.model in cache.segments:
+                cache.segments[self.config.model] = SegmentCache(
+                    capacity=self.config.segment_cache_size,
+                    filename=filename
+                )
+
+        self.segments = cache.segments[self.config.model]
+
+        if self.segments.capacity != self.config.segment_cache_size or \
+                self.segments.filename != filename:
+            self.logger.warning(
+                f"The segment cache of the spacy model "
+                f"'{self.config.model}' is shared with another matcher and "
+                f"keeps its size {self.segments.capacity} and file "
+                f"'{self.segments.filename}'. The settings of matcher "
+                f"'{self.name}' are ignored.")
+
+    def close(self) -> None:
+        """
+        Save the segment cache if it has a file.
+        """
+        if self.segments is not None:
+            self.segments.save()
+
     def process(self, text: str) -> List[Match]:
         """
-        Use spacy to identify entities.
+        Use spacy to identify entities. If the segment cache is enabled, the
+        text is split into segments and only unknown segments are processed.
+        """
+        assert isinstance(self.config, self.MatcherConfig)
+
+        if self.model is None:
+            raise Exception("Invalid spacy model.")
+
+        if self.segments is not None:
+            return self._process_segments(
+                text=text, segments=self._split_segments(text=text))
+
+        return self._process_text(text=text)
+
+    def process_segments(
+        self,
+        text: str,
+        segments: List[Segment]
+    ) -> List[Match]:
+        """
+        Use spacy to identify entities in the layout segments of the
+        configured level (e.g. the paragraphs of an OCR result). The
+        segments are processed in batches instead of one long text.
         """
         assert isinstance(self.config, self.MatcherConfig)
 
         if self.model is None:
             raise Exception("Invalid spacy model.")
 
-        doc = self.model(text=text)
+        spans = [(segment.start, segment.end) for segment in segments
+                 if segment.level == self.config.ocr_segments]
+
+        if len(spans) == 0:
+            return self.process(text=text)
+
+        return self._process_segments(text=text, segments=spans)
+
+    @property
+    def segment_level(self) -> Optional[str]:
+        """
+        Return the level of the layout segments processed separately.
+        """
+        assert isinstance(self.config, self.MatcherConfig)
+
+        return self.config.ocr_segments
+
+    def _process_text(
+        self,
+        text: str,
+        all_labels: bool = False
+    ) -> List[Match]:
+        """
+        Identify the entities of a text. Texts longer than the configured
+        chunk size are split into overlapping chunks that are processed in
+        parallel and stitched back together.
+        """
+        assert isinstance(self.config, self.MatcherConfig)
+        assert self.model
+
+        if len(text) <= self.config.chunk_size:
+            doc = self.model(text=text)
+            return self._get_matches(doc=doc, all_labels=all_labels)
+
+        chunks = self._split_text(text=text)
+
+        self.logger.debug(f"Split text of length {len(text)} into "
+                          f"{len(chunks)} chunks.")
+
+        docs = self.model.pipe(
+            [text[start:end] for (start, end) in chunks],
+            n_process=self.config.n_process,
+            batch_size=self.config.batch_size
+        )
+
+        result = []
+        seen = set()
+        for index, doc in enumerate(docs):
+            (start, end) = chunks[index]
+
+            # every position of the text is owned by exactly one chunk: the
+            # border between two chunks lies in the middle of their overlap
+            lower = 0
+            if index > 0:
+                lower = (start + chunks[index-1][1]) // 2
+            upper = len(text)
+            if index < len(chunks) - 1:
+                upper = (chunks[index+1][0] + end) // 2
+
+            for match in self._get_matches(doc=doc, offset=start,
+                                           all_labels=all_labels):
+                if match.start < lower or match.start >= upper:
+                    continue
+
+                key = (match.start, match.end, match.model_label)
+                if key in seen:
+                    continue
+
+                seen.add(key)
+                result.append(match)
+
+        return result
+
+    def _process_segments(
+        self,
+        text: str,
+        segments: List[Tuple[int, int]]
+    ) -> List[Match]:
+        """
+        Identify the entities of a text segment by segment, given their
+        (start, end) offsets. Repeated segments are processed once. If the
+        segment cache is enabled, the entities of known segments are taken
+        from it and the entities of new segments are added to it. Unknown
+        segments are processed in batches, and the entities are rebased to
+        their offsets in the text.
+        """
+        assert isinstance(self.config, self.MatcherConfig)
+        assert self.model
+
+        # a new version of a model invalidates the persisted segments
+        model = f"{self.config.model}@{self.model.meta.get('version', '')}"
+
+        found: dict[str, List[Entity]] = {}
+        missing: dict[str, str] = {}
+        for (start, end) in segments:
+            key = SegmentCache.key(model=model, segment=text[start:end])
+
+            if key in found or key in missing:
+                continue
+
+            entities = None
+            if self.segments is not None:
+                entities = self.segments.get(key)
+
+            if entities is None:
+                missing[key] = text[start:end]
+            else:
+                found[key] = entities
+
+        if self.segments is not None:
+            self.metrics.increment("cache_hits.segments",
+                                   len(segments) - len(missing))
+            self.metrics.increment("cache_misses.segments", len(missing))
+
+        # long segments go through the chunking of _process_text
+        short = [key for key in missing
+                 if len(missing[key]) <= self.config.chunk_size]
+        docs = self.model.pipe(
+            [missing[key] for key in short],
+            batch_size=self.config.batch_size
+        )
+        for key, doc in zip(short, docs):
+            found[key] = [(entity.start_char, entity.end_char, entity.label_)
+                          for entity in doc.ents]
+
+        for key in missing:
+            if key not in found:
+                found[key] = [
+                    (match.start, match.end, match.model_label or "")
+                    for match in self._process_text(text=missing[key],
+                                                    all_labels=True)]
+
+            if self.segments is not None:
+                self.segments.put(key, found[key])
+
+        result = []
+        for (start, end) in segments:
+            key = SegmentCache.key(model=model, segment=text[start:end])
+
+            for (entity_start, entity_end, label) in found[key]:
+                if self.config.labels and label not in self.config.labels:
+                    continue
+
+                result.append(
+                    Match(
+                        matcher=self.name,
+                        label=self.label,
+                        text=text[start+entity_start:start+entity_end],
+                        start=start+entity_start,
+                        end=start+entity_end,
+                        model_label=label
+                    )
+                )
+
+        return result
+
+    def _split_segments(self, text: str) -> List[Tuple[int, int]]:
+        """
+        Split a text into lines or paragraphs and return the (start, end)
+        offsets of the non-empty ones, without surrounding whitespace.
+        """
+        assert isinstance(self.config, self.MatcherConfig)
+
+        if self.config.segment_boundary == "paragraph":
+            boundary = re.compile(r"\n\s*\n")
+        else:
+            boundary = re.compile(r"\n")
+
+        segments = []
+        start = 0
+        for found in boundary.finditer(text):
+            segments.append((start, found.start()))
+            start = found.end()
+        segments.append((start, len(text)))
+
+        result = []
+        for (start, end) in segments:
+            segment = text[start:end]
+            stripped = segment.strip()
+            if not stripped:
+                continue
+
+            start += len(segment) - len(segment.lstrip())
+            result.append((start, start + len(stripped)))
+
+        return result
+
+    def _get_matches(
+        self,
+        doc: Any,
+        offset: int = 0,
+        all_labels: bool = False
+    ) -> List[Match]:
+        """
+        Convert the entities of a spacy doc into matches, shifting their
+        offsets by the given amount. Unless all_labels is set, only entities
+        with the configured labels are returned.
+        """
+        assert isinstance(self.config, self.MatcherConfig)
 
         result = []
         for entity in doc.ents:
-            if self.config.labels and entity.label_ not in self.config.labels:
+            if self.config.labels and not all_labels and \
+                    entity.label_ not in self.config.labels:
                 continue
 
             result.append(
@@ -87,13 +402,55 @@ class SpacyMatcher(BaseMatcher):
                     matcher=self.name,
                     label=self.label,
                     text=entity.text,
-                    start=entity.start_char,
-                    end=entity.end_char,
+                    start=entity.start_char+offset,
+                    end=entity.end_char+offset,
                     model_label=entity.label_
                 )
             )
 
         return result
 
+    def _split_text(self, text: str) -> List[Tuple[int, int]]:
+        """
+        Split a text into overlapping chunks of at most chunk_size characters
+        and return their (start, end) offsets. Chunks end at a sentence or
+        paragraph boundary if possible, and at a whitespace otherwise.
+        """
+        assert isinstance(self.config, self.MatcherConfig)
+
+        size = self.config.chunk_size
+        overlap = min(self.config.chunk_overlap, size // 2)
+
+        if self.config.chunk_boundary == "paragraph":
+            boundary = re.compile(r"\n\s*\n")
+        else:
+            boundary = re.compile(r"[.!?]\s+|\n")
+
+        chunks = []
+        start = 0
+        while True:
+            end = start + size
+            if end >= len(text):
+                chunks.append((start, len(text)))
+                return chunks
+
+            # search the last boundary in the second half of the chunk
+            cut = None
+            for found in boundary.finditer(text, start + size // 2, end):
+                cut = found.end()
+
+            if cut is None:
+                whitespace = text.rfind(" ", start + size // 2, end)
+                cut = whitespace + 1 if whitespace >= 0 else end
+
+            chunks.append((start, cut))
+
+            # start the next chunk at a word boundary inside the overlap
+            next_start = cut - overlap
+            whitespace = text.find(" ", next_start, cut)
+            if whitespace >= 0:
+                next_start = whitespace + 1
+
+            start = max(next_start, chunks[-1][0] + 1)
 
 # ---------------------------------------------------------------------------- #
@@ -0,0 +1,164 @@
+# ---------------------------------------------------------------------------- #
+
+import contextlib
+import json
+import re
+import threading
+import time
+from typing import Any, Iterator
+
+# ---------------------------------------------------------------------------- #
+
+from .budget import is_abandoned
+
+# ---------------------------------------------------------------------------- #
+
+
+class Metrics():
+    """
+    The Metrics class collects the time spent in each processing stage and
+    counters like the number of pages, words, matches or cache hits. It is
+    safe to share one instance between threads. Stages that have been
+    abandoned after their deadline are not recorded.
+    """
+    stages: dict[str, dict[str, float]]
+    counters: dict[str, int]
+    _lock: threading.Lock
+
+    def __init__(self) -> None:
+        """
+        Initialize empty metrics.
+        """
+        self.stages = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict[str, Any]:
+        """
+        Pickle the metrics without their lock.
+        """
+        return self.snapshot()
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        """
+        Restore pickled metrics with a new lock.
+        """
+        self.stages = state["stages"]
+        self.counters = state["counters"]
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        """
+        Measure the time spent in a stage, e.g.
+
+            with metrics.timer("ocr"):
+                ...
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stage=stage, seconds=time.perf_counter() - start)
+
+    def add_time(self, stage: str, seconds: float) -> None:
+        """
+        Add a measured duration to a stage.
+        """
+        if is_abandoned():
+            return
+
+        with self._lock:
+            if stage not in self.stages:
+                self.stages[stage] = {
+                    "calls": 0,
+                    "total": 0.0,
+                    "min": seconds,
+                    "max": seconds
+                }
+
+            entry = self.stages[stage]
+            entry["calls"] += 1
+            entry["total"] += seconds
+            entry["min"] = min(entry["min"], seconds)
+            entry["max"] = max(entry["max"], seconds)
+
+    def increment(self, counter: str, value: int = 1) -> None:
+        """
+        Increment a counter.
+        """
+        if is_abandoned():
+            return
+
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        Return a copy of the current metrics.
+        """
+        with self._lock:
+            return {
+                "stages": {stage: dict(entry)
+                           for stage, entry in self.stages.items()},
+                "counters": dict(self.counters)
+            }
+
+    def merge(self, snapshot: dict[str, Any]) -> None:
+        """
+        Add the metrics of a snapshot to these metrics.
+        """
+        with self._lock:
+            for stage, other in snapshot["stages"].items():
+                if stage not in self.stages:
+                    self.stages[stage] = dict(other)
+                    continue
+
+                entry = self.stages[stage]
+                entry["calls"] += other["calls"]
+                entry["total"] += other["total"]
+                entry["min"] = min(entry["min"], other["min"])
+                entry["max"] = max(entry["max"], other["max"])
+
+            for counter, value in snapshot["counters"].items():
+                self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def reset(self) -> None:
+        """
+        Remove all collected metrics.
+        """
+        with self._lock:
+            self.stages = {}
+            self.counters = {}
+
+    def to_json(self) -> str:
+        """
+        Export the metrics as JSON.
+        """
+        return json.dumps(self.snapshot(), indent=4)
+
+    def to_prometheus(self, prefix: str = "pyghost") -> str:
+        """
+        Export the metrics in the Prometheus text exposition format.
+        """
+        snapshot = self.snapshot()
+
+        lines = [
+            f"# TYPE {prefix}_stage_seconds_total counter",
+            *[f'{prefix}_stage_seconds_total{{stage="{stage}"}} '
+              f'{entry["total"]}'
+              for stage, entry in snapshot["stages"].items()],
+            f"# TYPE {prefix}_stage_calls_total counter",
+            *[f'{prefix}_stage_calls_total{{stage="{stage}"}} '
+              f'{int(entry["calls"])}'
+              for stage, entry in snapshot["stages"].items()],
+        ]
+
+        for counter, value in snapshot["counters"].items():
+            name = f"{prefix}_{re.sub('[^a-zA-Z0-9_]', '_', counter)}_total"
+            lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+# ---------------------------------------------------------------------------- #
@@ -1,11 +1,21 @@
 # ---------------------------------------------------------------------------- #
 
 import pydantic
-from typing import Any, List, Optional
+from typing import Any, List, Literal, Optional
 
 # ---------------------------------------------------------------------------- #
 
 
+class PrefilterConfig(pydantic.BaseModel):
+    level: Literal["block", "paragraph", "line"] = "paragraph"
+    ignore_patterns: List[str] = []
+    min_letters: int = 0
+    capitalized: bool = False
+    patterns: List[str] = []
+    gazetteer: List[str] = []
+    gazetteer_file: Optional[str] = None
+
+
 class MatcherConfig(pydantic.BaseModel):
     name: str
     label: str
@@ -13,6 +23,7 @@ class MatcherConfig(pydantic.BaseModel):
     cls: str
     languages: List[str]
     config: dict[Any, Any] = {}
+    prefilter: Optional[PrefilterConfig] = None
 
 
 class TransformerConfig(pydantic.BaseModel):
@@ -30,15 +41,59 @@ class OcrConfig(pydantic.BaseModel):
     config: dict[Any, Any] = {}
 
 
+class BlankPageConfig(pydantic.BaseModel):
+    enabled: bool = False
+    size: int = 256
+    ink_contrast: int = 64
+    max_ink_coverage: float = 0.0005
+
+
 class DocumentConfig(pydantic.BaseModel):
     highlighter_color: str
     text_color: str
     max_font_size: int
     font: str
+    blank_pages: BlankPageConfig = BlankPageConfig()
+    processes: int = 1
+    ocr_concurrency: int = 1
+    ocr_batch_size: int = 1
+
+
+class ResolverConfig(pydantic.BaseModel):
+    policy: Literal["none", "longest", "matcher_priority",
+                    "label_priority"] = "longest"
+    matcher_priority: List[str] = []
+    label_priority: List[str] = []
+
+
+class PropagationConfig(pydantic.BaseModel):
+    enabled: bool = False
+    labels: List[str] = []
+    min_length: int = 3
+    case_sensitive: bool = True
+    budget_pages: Optional[int] = None
+    budget_sample: Literal["first", "spread"] = "first"
+
+
+class GhostConfig(pydantic.BaseModel):
+    resolver: ResolverConfig = ResolverConfig()
+    propagation: PropagationConfig = PropagationConfig()
+    max_workers: int = 1
+
+
+class DeadlineConfig(pydantic.BaseModel):
+    document: Optional[float] = None
+    ocr: Optional[float] = None
+    matchers: Optional[float] = None
+    transform: Optional[float] = None
+    ocr_scale: float = 0.5
+    fallback_transformer: str = "Label"
 
 
 class Config(pydantic.BaseModel):
     document: DocumentConfig
+    ghost: GhostConfig = GhostConfig()
+    deadline: DeadlineConfig = DeadlineConfig()
     ocr: List[OcrConfig] = []
     matchers: List[MatcherConfig] = []
     transformers: List[TransformerConfig] = []
@@ -62,9 +117,16 @@ class Word(pydantic.BaseModel):
     coordinates: Optional[Coordinates] = None
 
 
+class Segment(pydantic.BaseModel):
+    level: Literal["block", "paragraph", "line"]
+    start: int
+    end: int
+
+
 class OcrResult(pydantic.BaseModel):
     text: str
     words: List[Word]
+    segments: List[Segment] = []
 
 # ---------------------------------------------------------------------------- #
 
@@ -97,8 +159,38 @@ class TransformerResult(pydantic.BaseModel):
 # ---------------------------------------------------------------------------- #
 
 
+class Degradation(pydantic.BaseModel):
+    stage: Literal["ocr", "matchers", "transform"]
+    fallback: Literal["low_resolution_ocr", "regex_only",
+                      "label_transformer", "page_redaction"]
+    page: Optional[int] = None
+    elapsed: float
+
+
 class GhostResult(pydantic.BaseModel):
     matches: List[Match]
     transformation: TransformerResult
+    degradations: List[Degradation] = []
+
+
+class GhostRecord(pydantic.BaseModel):
+    file: str
+    page: int
+    checksum: Optional[str] = None
+    matches: List[Match]
+    ocr: Optional[OcrResult] = None
+    degradations: List[Degradation] = []
+
+# ---------------------------------------------------------------------------- #
+
+
+class ManifestEntry(pydantic.BaseModel):
+    input: str
+    content_hash: str
+    config_hash: str
+    outputs: List[str]
+    status: Literal["started", "done", "failed"]
+    error: Optional[str] = None
+    updated: float
 
 # ---------------------------------------------------------------------------- #
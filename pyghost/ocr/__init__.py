@@ -1,2 +1,21 @@
+import importlib
+from typing import Any
+
 from ._base import BaseOcr
-from .tesseract import TesseractOcr
+
+# the implementations are imported on first access, so that heavy
+# dependencies like pytesseract are only loaded if a configuration uses them
+_implementations = {
+    "TesseractOcr": ".tesseract",
+    "HttpOcr": ".remote",
+}
+
+__all__ = ["BaseOcr", *_implementations]
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _implementations:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+    module = importlib.import_module(_implementations[name], __name__)
+    return getattr(module, name)
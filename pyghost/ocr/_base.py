@@ -1,18 +1,28 @@
 # ---------------------------------------------------------------------------- #
 
 import pydantic
+import asyncio
 import logging
 from PIL import Image
-from typing import Any, List
+from typing import Any, List, Optional
 
 # ---------------------------------------------------------------------------- #
 
 from ..models import OcrResult
+from ..metrics import Metrics
 
 # ---------------------------------------------------------------------------- #
 
 
 class BaseOcr():
+    """
+    All OCR providers inherit from the BaseOcr class. Providers implement
+    process_image, and can overwrite process_images to recognize several
+    pages per call, or the async variants to keep many pages in flight. The
+    defaults fall back on each other: process_images calls process_image
+    for each page, the async variants run the synchronous methods in
+    threads.
+    """
 
     class OcrConfig(pydantic.BaseModel):
         """
@@ -23,10 +33,12 @@ class BaseOcr():
 
     config: OcrConfig
     logger: logging.Logger
+    metrics: Metrics
 
     def __init__(self, config: dict[Any, Any]) -> None:
         self.config = self.OcrConfig(**config)
         self.logger = logging.getLogger("pyghost.ocr")
+        self.metrics = Metrics()
 
     def process_image(
         self,
@@ -35,4 +47,54 @@ class BaseOcr():
     ) -> OcrResult:
         return OcrResult(text="", words=[])
 
+    def process_images(
+        self,
+        images: List[Image.Image],
+        page_increments: Optional[List[int]] = None
+    ) -> List[OcrResult]:
+        """
+        Overwrite this method to recognize several pages at once. The page
+        increments are the page numbers of the images (0, 1, ... by
+        default).
+        """
+        if page_increments is None:
+            page_increments = list(range(len(images)))
+
+        return [self.process_image(image=image, page_increment=page)
+                for image, page in zip(images, page_increments)]
+
+    async def process_image_async(
+        self,
+        image: Image.Image,
+        page_increment: int = 0
+    ) -> OcrResult:
+        """
+        Overwrite this method to recognize a page asynchronously. By default,
+        process_image runs in a thread.
+        """
+        return await asyncio.to_thread(self.process_image, image,
+                                       page_increment)
+
+    async def process_images_async(
+        self,
+        images: List[Image.Image],
+        page_increments: Optional[List[int]] = None
+    ) -> List[OcrResult]:
+        """
+        Overwrite this method to recognize several pages at once
+        asynchronously. By default, an overwritten process_images runs in a
+        thread, otherwise the pages are passed to process_image_async
+        concurrently.
+        """
+        if page_increments is None:
+            page_increments = list(range(len(images)))
+
+        if type(self).process_images is not BaseOcr.process_images:
+            return await asyncio.to_thread(self.process_images, images,
+                                           page_increments)
+
+        return list(await asyncio.gather(*[
+            self.process_image_async(image=image, page_increment=page)
+            for image, page in zip(images, page_increments)]))
+
 # ---------------------------------------------------------------------------- #
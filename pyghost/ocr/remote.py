@@ -0,0 +1,164 @@
+# ---------------------------------------------------------------------------- #
+
+import pydantic
+import asyncio
+import base64
+import io
+import json
+import urllib.request
+from PIL import Image
+from typing import Any, List, Optional
+
+# ---------------------------------------------------------------------------- #
+
+from ._base import BaseOcr
+from ..budget import DeadlineExceeded, get_timeout, is_expired
+from ..models import OcrResult
+
+# ---------------------------------------------------------------------------- #
+
+
+class HttpOcr(BaseOcr):
+    """
+    The HttpOcr sends pages to an OCR service over HTTP, e.g. a shared
+    Tesseract sidecar. Pages are sent in batches of up to batch_size images
+    per request, and the async variants keep several requests in flight.
+
+    The service receives a POST request with a JSON body
+    {"images": ["<base64 encoded image>", ...], "options": {...}} and
+    answers with {"results": [<OcrResult>, ...]} in the same order. The
+    pages of the words are set by the client. See benchmarks/ocr_server.py
+    for a stand-in service.
+    """
+
+    class OcrConfig(pydantic.BaseModel):
+        """
+        Use this pydantic model to define your matcher's config
+        parameters.
+        """
+        url: str = "http://127.0.0.1:8080/ocr"
+        timeout: float = 60.0
+        batch_size: int = 8
+        image_format: str = "PNG"
+        options: dict[str, Any] = {}
+
+    def process_image(
+        self,
+        image: Image.Image,
+        page_increment: int = 0
+    ) -> OcrResult:
+        return self.process_images(
+            images=[image], page_increments=[page_increment])[0]
+
+    def process_images(
+        self,
+        images: List[Image.Image],
+        page_increments: Optional[List[int]] = None
+    ) -> List[OcrResult]:
+        """
+        Recognize several pages with one request per batch.
+        """
+        assert isinstance(self.config, self.OcrConfig)
+
+        if page_increments is None:
+            page_increments = list(range(len(images)))
+
+        result = []
+        for start in range(0, len(images), self.config.batch_size):
+            end = start + self.config.batch_size
+            result += self._request(images=images[start:end],
+                                    page_increments=page_increments[start:end])
+
+        return result
+
+    async def process_images_async(
+        self,
+        images: List[Image.Image],
+        page_increments: Optional[List[int]] = None
+    ) -> List[OcrResult]:
+        """
+        Recognize several pages with concurrent requests, one per batch.
+        """
+        assert isinstance(self.config, self.OcrConfig)
+
+        if page_increments is None:
+            page_increments = list(range(len(images)))
+
+        batches = range(0, len(images), self.config.batch_size)
+        results = await asyncio.gather(*[
+            asyncio.to_thread(
+                self._request,
+                images[start:start + self.config.batch_size],
+                page_increments[start:start + self.config.batch_size])
+            for start in batches])
+
+        return [ocr for result in results for ocr in result]
+
+    def _request(
+        self,
+        images: List[Image.Image],
+        page_increments: List[int]
+    ) -> List[OcrResult]:
+        """
+        Send a batch of pages to the service and return their results. The
+        timeout is limited to the budget of the calling stage.
+        """
+        assert isinstance(self.config, self.OcrConfig)
+
+        body = json.dumps({
+            "images": [self._encode(image=image) for image in images],
+            "options": self.config.options
+        }).encode("utf-8")
+
+        request = urllib.request.Request(
+            self.config.url,
+            data=body,
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+
+        self.logger.debug(f"Sending {len(images)} page(s) to "
+                          f"'{self.config.url}'.")
+        self.metrics.increment("ocr_requests")
+
+        timeout = get_timeout(timeout=self.config.timeout)
+
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                content = json.loads(response.read())
+        except Exception as exception:
+            if is_expired():
+                raise DeadlineExceeded(
+                    f"OCR service at '{self.config.url}' did not answer "
+                    f"within {timeout:.2f} seconds.")
+            raise Exception(f"OCR service at '{self.config.url}' failed: "
+                            f"{exception}")
+
+        results = [OcrResult(**result) for result in content["results"]]
+
+        if len(results) != len(images):
+            raise Exception(f"OCR service at '{self.config.url}' returned "
+                            f"{len(results)} results for {len(images)} "
+                            f"pages.")
+
+        for result, page in zip(results, page_increments):
+            for word in result.words:
+                word.page = page
+
+        return results
+
+    def _encode(self, image: Image.Image) -> str:
+        """
+        Encode an image as base64.
+        """
+        assert isinstance(self.config, self.OcrConfig)
+
+        if image.mode not in ("L", "RGB"):
+            image = image.convert("RGB")
+
+        buffer = io.BytesIO()
+        image.save(buffer, format=self.config.image_format)
+
+        return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+# ---------------------------------------------------------------------------- #
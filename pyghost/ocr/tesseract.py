@@ -2,18 +2,27 @@
 
 import pydantic
 import pytesseract
+import concurrent.futures
+import contextvars
+import math
+import statistics
 from PIL import Image
-from typing import List
+from typing import List, Optional, Tuple
 
 # ---------------------------------------------------------------------------- #
 
 from ._base import BaseOcr
-from ..models import OcrResult, Word, Coordinates
+from ..budget import DeadlineExceeded, get_timeout, is_expired
+from ..models import OcrResult, Word, Coordinates, Segment
 
 # ---------------------------------------------------------------------------- #
 
 
 class TesseractOcr(BaseOcr):
+    """
+    The TesseractOcr recognizes text with Tesseract. Large images can be
+    split into overlapping tiles that are recognized in parallel.
+    """
 
     class OcrConfig(pydantic.BaseModel):
         """
@@ -21,6 +30,9 @@ class TesseractOcr(BaseOcr):
         parameters.
         """
         lang: str
+        tile_size: Optional[int] = None
+        tile_overlap: int = 300
+        tile_workers: int = 4
 
     class TesseractResult(pydantic.BaseModel):
         level: List[int]
@@ -36,6 +48,14 @@ class TesseractOcr(BaseOcr):
         conf: List[int]
         text: List[str]
 
+    class TesseractWord(pydantic.BaseModel):
+        text: str
+        position: Tuple[int, int, int, int]  # page, block, paragraph, line
+        left: int
+        top: int
+        width: int
+        height: int
+
     def process_image(
         self,
         image: Image.Image,
@@ -43,47 +63,425 @@ class TesseractOcr(BaseOcr):
     ) -> OcrResult:
         assert isinstance(self.config, self.OcrConfig)
 
-        boxes = pytesseract.image_to_data(
-            image, output_type=pytesseract.Output.DICT, lang=self.config.lang)
+        if self.config.tile_size and \
+                max(image.width, image.height) > self.config.tile_size:
+            words = self._process_tiles(image=image)
+        else:
+            words = self._get_words(result=self._recognize(image=image))
+
+        return self._build_result(words=words, page_increment=page_increment)
+
+    def _recognize(self, image: Image.Image) -> TesseractResult:
+        """
+        Call Tesseract on an image. Within a budget, Tesseract is killed when
+        the budget runs out.
+        """
+        assert isinstance(self.config, self.OcrConfig)
+
+        timeout = get_timeout()
 
-        result = self.TesseractResult(**boxes)
+        try:
+            boxes = pytesseract.image_to_data(
+                image, output_type=pytesseract.Output.DICT,
+                lang=self.config.lang, timeout=timeout or 0)
+        except RuntimeError as exception:
+            if timeout is not None and is_expired():
+                raise DeadlineExceeded(
+                    f"Tesseract did not finish within {timeout:.2f} "
+                    f"seconds.")
+            raise exception
 
+        return self.TesseractResult(**boxes)
+
+    def _get_words(
+        self,
+        result: TesseractResult,
+        left: int = 0,
+        top: int = 0
+    ) -> List[TesseractWord]:
+        """
+        Return the recognized words of a result in reading order, shifted by
+        the position of the tile they have been recognized in.
+        """
         words = []
-        doc_text = ""
-        start = 0
-        end = 0
         for index, text in enumerate(result.text):
 
             if len(text) == 0:
                 continue
 
-            if len(doc_text):
+            words.append(
+                self.TesseractWord(
+                    text=text,
+                    position=(result.page_num[index], result.block_num[index],
+                              result.par_num[index], result.line_num[index]),
+                    left=result.left[index] + left,
+                    top=result.top[index] + top,
+                    width=result.width[index],
+                    height=result.height[index]
+                )
+            )
+
+        return words
+
+    def _process_tiles(self, image: Image.Image) -> List[TesseractWord]:
+        """
+        Split an image into overlapping tiles, recognize them in parallel
+        and merge their words. Every position of the image is owned by
+        exactly one tile: the border between two tiles lies in the middle of
+        their overlap, and a word belongs to the tile that owns its center.
+        Words cut by the edge of a tile are therefore taken from the
+        neighbouring tile, as long as the overlap is wider than the words.
+        """
+        assert isinstance(self.config, self.OcrConfig)
+
+        columns = self._split_axis(length=image.width)
+        rows = self._split_axis(length=image.height)
+
+        tiles = [(column, row) for row in range(len(rows))
+                 for column in range(len(columns))]
+
+        self.logger.debug(f"Splitting image of size {image.width}x"
+                          f"{image.height} into {len(tiles)} tiles.")
+        self.metrics.increment("ocr_tiles", len(tiles))
+
+        def recognize(
+            tile: Tuple[int, int]
+        ) -> List[TesseractOcr.TesseractWord]:
+            (left, right) = columns[tile[0]]
+            (top, bottom) = rows[tile[1]]
+            result = self._recognize(
+                image=image.crop((left, top, right, bottom)))
+            return self._get_words(result=result, left=left, top=top)
+
+        # tesseract runs in a separate process, so threads are sufficient,
+        # and they inherit the budget of the calling stage
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.config.tile_workers) as pool:
+            futures = [pool.submit(contextvars.copy_context().run,
+                                   recognize, tile) for tile in tiles]
+            results = [future.result() for future in futures]
+
+        owned: List[List[TesseractOcr.TesseractWord]] = []
+        for (column, row), found in zip(tiles, results):
+            (left, right) = self._owned_range(axis=columns, index=column,
+                                              length=image.width)
+            (top, bottom) = self._owned_range(axis=rows, index=row,
+                                              length=image.height)
+
+            owned.append([word for word in found
+                          if left <= word.left + word.width / 2 < right and
+                          top <= word.top + word.height / 2 < bottom])
+
+        return self._merge_tiles(tiles=tiles, words=owned)
+
+    def _split_axis(self, length: int) -> List[Tuple[int, int]]:
+        """
+        Split an axis into tiles of tile_size pixels that overlap by at least
+        tile_overlap pixels, spread evenly so the last tile ends at the end.
+        """
+        assert isinstance(self.config, self.OcrConfig)
+        assert self.config.tile_size
+
+        size = self.config.tile_size
+        overlap = min(self.config.tile_overlap, size // 2)
+
+        if length <= size:
+            return [(0, length)]
+
+        count = math.ceil((length - overlap) / (size - overlap))
+        step = (length - size) / (count - 1)
+
+        return [(round(index * step), round(index * step) + size)
+                for index in range(count)]
+
+    def _owned_range(
+        self,
+        axis: List[Tuple[int, int]],
+        index: int,
+        length: int
+    ) -> Tuple[float, float]:
+        """
+        Return the part of an axis that a tile owns.
+        """
+        lower = 0.0
+        if index > 0:
+            lower = (axis[index][0] + axis[index-1][1]) / 2
+
+        upper = float(length)
+        if index < len(axis) - 1:
+            upper = (axis[index+1][0] + axis[index][1]) / 2
+
+        return (lower, upper)
+
+    def _merge_tiles(
+        self,
+        tiles: List[Tuple[int, int]],
+        words: List[List[TesseractWord]]
+    ) -> List[TesseractWord]:
+        """
+        Merge the words of the tiles (given by column and row) and keep the
+        blocks, paragraphs and lines Tesseract has found in each tile. The
+        part of a block that a tile owns is a fragment. Fragments of
+        neighbouring tiles that continue each other across the border
+        between the tiles form one block, lines cut by the border are joined,
+        and so are paragraphs. The blocks are then put into reading order.
+        """
+        found = [word for tile in words for word in tile]
+        if len(found) == 0:
+            return []
+
+        height = statistics.median(word.height for word in found) or 1
+
+        fragments: dict[Tuple[int, int], List[TesseractOcr.TesseractWord]] = {}
+        for index, tile in enumerate(words):
+            for word in tile:
+                fragments.setdefault(
+                    (index, word.position[1]), []).append(word)
+
+        keys = list(fragments)
+        boxes = {key: self._get_box(words=fragments[key]) for key in keys}
+
+        parent = {key: key for key in keys}
+
+        def find(key: Tuple[int, int]) -> Tuple[int, int]:
+            while parent[key] != key:
+                key = parent[key]
+            return key
+
+        for first in keys:
+            for second in keys:
+                (column, row) = tiles[first[0]]
+                if tiles[second[0]] not in ((column, row + 1),
+                                            (column + 1, row)):
+                    continue
+
+                vertical = tiles[second[0]] == (column, row + 1)
+                if self._continues(first=boxes[first], second=boxes[second],
+                                   height=height, vertical=vertical):
+                    parent[find(second)] = find(first)
+
+        blocks: dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+        for key in keys:
+            blocks.setdefault(find(key), []).append(key)
+
+        groups = list(blocks.values())
+        order = self._order_boxes(boxes=[
+            self._get_box(words=[word for key in group
+                                 for word in fragments[key]])
+            for group in groups])
+
+        result = []
+        paragraph = 0
+        line = 0
+        for block, index in enumerate(order, start=1):
+            lines = self._join_lines(
+                group=groups[index], fragments=fragments, tiles=tiles)
+
+            previous = None
+            for words_of_line in lines:
+                # a line continues the paragraph of the previous line if they
+                # share a paragraph of a tile, or if they come from stacked
+                # tiles and are as close as lines of a paragraph
+                paragraphs = {word.position[:3] for word in words_of_line}
+                top = min(word.top for word in words_of_line)
+
+                if previous is None or not (
+                        paragraphs & previous[0] or
+                        (not {key[0] for key in paragraphs} &
+                         {key[0] for key in previous[0]} and
+                         top - previous[1] < height)):
+                    paragraph += 1
+                previous = (paragraphs, max(word.top + word.height
+                                            for word in words_of_line))
+
+                line += 1
+                for word in sorted(words_of_line, key=lambda word: word.left):
+                    result.append(word.model_copy(
+                        update={"position": (1, block, paragraph, line)}))
+
+        return result
+
+    def _join_lines(
+        self,
+        group: List[Tuple[int, int]],
+        fragments: dict[Tuple[int, int], List[TesseractWord]],
+        tiles: List[Tuple[int, int]]
+    ) -> List[List[TesseractWord]]:
+        """
+        Return the lines of a block from top to bottom. The parts of a line
+        that side-by-side tiles own are joined. The words keep the tile and
+        the paragraph they have been found in as their position, as (tile,
+        block, paragraph, line).
+        """
+        parts: dict[Tuple[int, ...], List[TesseractOcr.TesseractWord]] = {}
+        for key in group:
+            for word in fragments[key]:
+                parts.setdefault((key[0], *word.position[1:]), []).append(
+                    word.model_copy(update={"position": (
+                        key[0], *word.position[1:])}))
+
+        def center(words: List[TesseractOcr.TesseractWord]) -> float:
+            return statistics.mean(word.top + word.height / 2
+                                   for word in words)
+
+        # the lines are built from top to bottom, so only the last lines
+        # can be close enough to a part
+        lines: List[List[TesseractOcr.TesseractWord]] = []
+        for part in sorted(parts.values(), key=center):
+            tile = part[0].position[0]
+            size = statistics.median(word.height for word in part)
+
+            for words_of_line in reversed(lines):
+                distance = center(part) - center(words_of_line)
+                if distance > size:
+                    lines.append(part)
+                    break
+
+                if distance <= size / 2 and \
+                        all(word.position[0] != tile and
+                            tiles[word.position[0]][1] == tiles[tile][1]
+                            for word in words_of_line):
+                    words_of_line += part
+                    break
+            else:
+                lines.append(part)
+
+        lines.sort(key=center)
+
+        return lines
+
+    def _continues(
+        self,
+        first: Tuple[int, int, int, int],
+        second: Tuple[int, int, int, int],
+        height: float,
+        vertical: bool
+    ) -> bool:
+        """
+        Return whether a fragment continues another one across the border
+        of their tiles, given as (left, top, right, bottom): below it if
+        vertical, to its right otherwise. The fragments must overlap across
+        the border and be as close as the lines or words of a block.
+        """
+        (left, top, right, bottom) = first
+
+        if vertical:
+            overlap = min(right, second[2]) - max(left, second[0])
+            size = min(right - left, second[2] - second[0])
+            gap = second[1] - bottom
+        else:
+            overlap = min(bottom, second[3]) - max(top, second[1])
+            size = min(bottom - top, second[3] - second[1])
+            gap = second[0] - right
+
+        return overlap > size / 2 and gap < 2 * height
+
+    def _get_box(
+        self,
+        words: List[TesseractWord]
+    ) -> Tuple[int, int, int, int]:
+        """
+        Return the bounding box of words as (left, top, right, bottom).
+        """
+        return (min(word.left for word in words),
+                min(word.top for word in words),
+                max(word.left + word.width for word in words),
+                max(word.top + word.height for word in words))
+
+    def _order_boxes(
+        self,
+        boxes: List[Tuple[int, int, int, int]]
+    ) -> List[int]:
+        """
+        Return the indices of blocks in reading order with a recursive XY
+        cut: the blocks are split at vertical gaps into columns first (left
+        to right), and at horizontal gaps into rows otherwise (top to
+        bottom).
+        """
+        def cut(indices: List[int]) -> List[int]:
+            if len(indices) <= 1:
+                return indices
+
+            for axis in (0, 1):
+                ordered = sorted(indices, key=lambda index: boxes[index][axis])
+
+                groups = [[ordered[0]]]
+                end = boxes[ordered[0]][axis + 2]
+                for index in ordered[1:]:
+                    if boxes[index][axis] >= end:
+                        groups.append([])
+                    groups[-1].append(index)
+                    end = max(end, boxes[index][axis + 2])
+
+                if len(groups) > 1:
+                    return [index for group in groups
+                            for index in cut(group)]
+
+            return sorted(indices,
+                          key=lambda index: (boxes[index][1], boxes[index][0]))
+
+        return cut(list(range(len(boxes))))
+
+    def _build_result(
+        self,
+        words: List[TesseractWord],
+        page_increment: int = 0
+    ) -> OcrResult:
+        """
+        Build the text, words and layout segments of a page from the words
+        in reading order.
+        """
+        # words of a line are separated by a space, lines by a newline, and
+        # paragraphs and blocks by an empty line
+        levels = (("block", 2), ("paragraph", 3), ("line", 4))
+
+        result = []
+        segments: List[Segment] = []
+        current: dict[str, Segment] = {}
+        position: Optional[Tuple[int, ...]] = None
+        doc_text = ""
+        for word in words:
+            previous = position
+            position = word.position
+
+            if previous and previous[:3] != position[:3]:
+                doc_text += "\n\n"
+            elif previous and previous != position:
+                doc_text += "\n"
+            elif previous:
                 doc_text += " "
-                start += 1
 
-            doc_text += text
-            end = start+len(text)
+            start = len(doc_text)
+            doc_text += word.text
+            end = len(doc_text)
 
-            words.append(
+            for level, depth in levels:
+                if previous is None or previous[:depth] != position[:depth]:
+                    current[level] = Segment(level=level, start=start,
+                                             end=end)
+                    segments.append(current[level])
+                else:
+                    current[level].end = end
+
+            result.append(
                 Word(
-                    text=text,
+                    text=word.text,
                     start=start,
                     end=end,
-                    page=result.page_num[index]+page_increment,
+                    page=position[0]+page_increment,
                     coordinates=Coordinates(
-                        left=result.left[index],
-                        top=result.top[index],
-                        width=result.width[index],
-                        height=result.height[index]
+                        left=word.left,
+                        top=word.top,
+                        width=word.width,
+                        height=word.height
                     )
                 )
             )
 
-            start += len(text)
-
         ocr = OcrResult(
             text=doc_text,
-            words=words
+            words=result,
+            segments=segments
         )
 
         return ocr
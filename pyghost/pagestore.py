@@ -0,0 +1,202 @@
+# ---------------------------------------------------------------------------- #
+
+import pydantic
+import logging
+import sys
+from multiprocessing import shared_memory
+from PIL import Image
+from typing import Any, Callable, List, Literal, TypeVar
+
+# ---------------------------------------------------------------------------- #
+
+T = TypeVar("T")
+
+# ---------------------------------------------------------------------------- #
+
+
+class PageHandle(pydantic.BaseModel):
+    """
+    A lightweight reference to a page in a PageStore that can be passed to
+    other processes instead of the page itself.
+    """
+    name: str
+    mode: Literal["L", "RGBA", "RGBX"]
+    width: int
+    height: int
+
+    @property
+    def channels(self) -> int:
+        return 1 if self.mode == "L" else 4
+
+    @property
+    def size(self) -> int:
+        return self.width * self.height * self.channels
+
+# ---------------------------------------------------------------------------- #
+
+
+class PageStore():
+    """
+    The PageStore keeps the pixels of decoded pages in shared memory, so that
+    OCR and rendering workers in other processes can use them without
+    copying: a 300 dpi A4 page has about 25 MB that would otherwise be
+    pickled to each worker and back. The pages are stored in the layout Pillow
+    uses internally (RGB pages as RGBX), so both the owner and the workers
+    can wrap the buffers as images or NumPy arrays. Changes made by a worker,
+    e.g. redactions, are immediately visible to the owner.
+    """
+    _memory: dict[str, shared_memory.SharedMemory]
+    _logger: logging.Logger
+
+    def __init__(self) -> None:
+        """
+        Initialize an empty store.
+        """
+        self._memory = {}
+        self._logger = logging.getLogger("pyghost.pagestore")
+
+    def __enter__(self) -> "PageStore":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        """
+        Return the number of stored pages.
+        """
+        return len(self._memory)
+
+    def put(self, image: Image.Image) -> PageHandle:
+        """
+        Copy a page into shared memory and return its handle.
+        """
+        import numpy
+
+        if image.mode not in ("L", "RGBA", "RGBX"):
+            image = image.convert("RGB").convert("RGBX")
+
+        handle = PageHandle(
+            name="",
+            mode=image.mode,
+            width=image.width,
+            height=image.height
+        )
+
+        memory = shared_memory.SharedMemory(
+            create=True, size=max(handle.size, 1))
+        handle.name = memory.name
+        self._memory[memory.name] = memory
+
+        self.array(handle=handle)[...] = numpy.asarray(image)
+
+        return handle
+
+    def image(self, handle: PageHandle) -> Image.Image:
+        """
+        Return a page as an image that shares the memory of the store.
+        """
+        return self._wrap_image(
+            memory=self._memory[handle.name], handle=handle)
+
+    def array(self, handle: PageHandle) -> Any:
+        """
+        Return a page as a NumPy array that shares the memory of the store.
+        """
+        return self._wrap_array(
+            memory=self._memory[handle.name], handle=handle)
+
+    def release(self, handle: PageHandle) -> None:
+        """
+        Remove a page from the store. Images and arrays of the page must not
+        be used afterwards.
+        """
+        self._release(name=handle.name)
+
+    def close(self) -> None:
+        """
+        Remove all pages from the store.
+        """
+        for name in list(self._memory):
+            self._release(name=name)
+
+    def _release(self, name: str) -> None:
+        """
+        Close and unlink the shared memory of a page.
+        """
+        memory = self._memory.pop(name)
+
+        try:
+            memory.close()
+        except BufferError:
+            # the memory stays mapped until the last view is garbage
+            # collected, unlinking only removes its name
+            self._logger.debug(f"Page '{name}' is still in use.")
+
+        memory.unlink()
+
+    @staticmethod
+    def attach(
+        handle: PageHandle,
+        function: Callable[[Any], T],
+        as_array: bool = False
+    ) -> T:
+        """
+        Attach to a page in another process, call a function with the page
+        as an image (or a NumPy array) that shares the memory of the store,
+        and detach again. The function must not keep a reference to the page.
+        """
+        # python 3.13+ can skip the resource tracker, which would otherwise
+        # consider the memory leaked when a worker exits
+        options: dict[str, Any] = {}
+        if sys.version_info >= (3, 13):
+            options["track"] = False
+
+        memory = shared_memory.SharedMemory(name=handle.name, **options)
+        try:
+            if as_array:
+                return function(PageStore._wrap_array(
+                    memory=memory, handle=handle))
+
+            return function(PageStore._wrap_image(
+                memory=memory, handle=handle))
+        finally:
+            memory.close()
+
+    @staticmethod
+    def _wrap_image(
+        memory: shared_memory.SharedMemory,
+        handle: PageHandle
+    ) -> Image.Image:
+        """
+        Wrap shared memory as a writable image without copying.
+        """
+        assert memory.buf is not None
+
+        image = Image.frombuffer(
+            handle.mode, (handle.width, handle.height), memory.buf,
+            "raw", handle.mode, 0, 1)
+
+        # pillow marks images from buffers as read-only and would copy them
+        # before drawing, the shared memory is writable though
+        image.readonly = 0
+
+        return image
+
+    @staticmethod
+    def _wrap_array(
+        memory: shared_memory.SharedMemory,
+        handle: PageHandle
+    ) -> Any:
+        """
+        Wrap shared memory as a NumPy array without copying.
+        """
+        import numpy
+
+        shape: List[int] = [handle.height, handle.width]
+        if handle.channels > 1:
+            shape.append(handle.channels)
+
+        return numpy.ndarray(shape, dtype=numpy.uint8, buffer=memory.buf)
+
+# ---------------------------------------------------------------------------- #
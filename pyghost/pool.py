@@ -0,0 +1,282 @@
+# ---------------------------------------------------------------------------- #
+
+import pathlib
+import concurrent.futures
+import gc
+import logging
+import multiprocessing
+import os
+from typing import Any, Iterable, Iterator, Optional
+
+# ---------------------------------------------------------------------------- #
+
+from .deadline import Deadline
+from .document import Document
+from .ghost import Ghost
+from .models import Config, GhostResult
+from .text import Text
+
+# ---------------------------------------------------------------------------- #
+
+# the resources of all open pools in the parent process, forked workers
+# inherit them and pick those of their pool
+_pools: dict[int, tuple[Ghost, Document]] = {}
+
+# the resources of the pool a worker process belongs to
+_worker: dict[str, Any] = {}
+
+# ---------------------------------------------------------------------------- #
+
+
+class GhostWorkerPool():
+    """
+    The GhostWorkerPool processes texts and documents in worker processes
+    that share the loaded configuration, spacy models and fakes with the
+    parent process. Instead of initializing them in every worker, they are
+    loaded once in the parent and the workers are forked afterwards, so the
+    memory pages of the models are shared copy-on-write.
+
+    Python writes to objects when the garbage collector examines them, which
+    copies the pages they live on. The garbage collector is therefore
+    disabled while the resources are loaded (so no freed gaps are left
+    between them), and all objects are frozen right before the workers are
+    forked, so the collectors of the workers never touch them. Reference
+    counting still copies the pages of objects the workers use, but most of
+    the memory of a model lies in large arrays that are only read.
+
+    The pool requires the 'fork' start method, i.e. Linux or macOS.
+    """
+    language: str
+    config: Config
+    workers: int
+    logger: logging.Logger
+    _executor: Optional[concurrent.futures.ProcessPoolExecutor]
+
+    def __init__(
+        self,
+        language: str,
+        config: Config,
+        workers: Optional[int] = None,
+        transformer: Optional[str] = None,
+        ocr_provider: Optional[str] = None
+    ) -> None:
+        """
+        Load Ghost and Document and fork the workers. By default, one worker
+        per CPU is started.
+        """
+        if "fork" not in multiprocessing.get_all_start_methods():
+            raise Exception("The GhostWorkerPool requires the 'fork' start "
+                            "method, which is not available on this "
+                            "platform.")
+
+        self.language = language
+        self.config = config
+        self.workers = workers or os.cpu_count() or 1
+        self.logger = logging.getLogger("pyghost.pool")
+        self._executor = None
+
+        enabled = gc.isenabled()
+        gc.disable()
+
+        try:
+            ghost = Ghost(
+                language=language,
+                config=config,
+                transformer=transformer
+            )
+            ghost.transformer.preload()
+
+            document = Document(
+                language=language,
+                config=config,
+                ocr_provider=ocr_provider
+            )
+
+            _pools[id(self)] = (ghost, document)
+
+            self._fork()
+        finally:
+            if enabled:
+                gc.enable()
+
+    def __enter__(self) -> "GhostWorkerPool":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def _fork(self) -> None:
+        """
+        Freeze all objects and fork the workers.
+        """
+        self.logger.debug(f"Forking {self.workers} workers.")
+
+        gc.freeze()
+
+        try:
+            self._executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("fork"),
+                initializer=_initialize_worker,
+                initargs=(id(self),)
+            )
+
+            # workers are forked on the first task, the objects must stay
+            # frozen until then
+            self._executor.submit(os.getpid).result()
+        finally:
+            gc.unfreeze()
+
+    def submit_text(
+        self,
+        text: str
+    ) -> "concurrent.futures.Future[GhostResult]":
+        """
+        Pseudonymize or anonymize a text in a worker.
+        """
+        return self._get_executor().submit(_process_text, text)
+
+    def map_texts(
+        self,
+        texts: Iterable[str],
+        chunksize: int = 1
+    ) -> Iterator[GhostResult]:
+        """
+        Pseudonymize or anonymize texts in the workers and return their
+        results in order. Send several texts to a worker at once with
+        chunksize if the texts are short.
+        """
+        return self._get_executor().map(_process_text, texts,
+                                        chunksize=chunksize)
+
+    def submit_document(
+        self,
+        filename: pathlib.Path,
+        output: Optional[pathlib.Path] = None
+    ) -> "concurrent.futures.Future[dict[int, GhostResult]]":
+        """
+        Pseudonymize or anonymize a document in a worker. Its results are
+        returned by page (without blank pages), and its pages are saved to
+        output if it is given.
+        """
+        return self._get_executor().submit(_process_document, filename,
+                                           output)
+
+    def map_documents(
+        self,
+        filenames: Iterable[pathlib.Path],
+        output: Optional[pathlib.Path] = None
+    ) -> Iterator[dict[int, GhostResult]]:
+        """
+        Pseudonymize or anonymize documents in the workers and return their
+        results in order. The pages of each document are saved to output
+        with the stem of the document appended, like the doc command does.
+        """
+        futures = [
+            self.submit_document(
+                filename=filename,
+                output=output.with_stem(f"{output.stem}_{filename.stem}")
+                if output else None)
+            for filename in filenames
+        ]
+
+        return (future.result() for future in futures)
+
+    def close(self) -> None:
+        """
+        Shut down the workers and release the resources of the pool.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+        resources = _pools.pop(id(self), None)
+        if resources is not None:
+            resources[0].close()
+            resources[1].close()
+
+    def _get_executor(self) -> concurrent.futures.ProcessPoolExecutor:
+        """
+        Return the executor or raise an exception if the pool is closed.
+        """
+        if self._executor is None:
+            raise Exception("The GhostWorkerPool has been closed.")
+
+        return self._executor
+
+# ---------------------------------------------------------------------------- #
+
+
+def _initialize_worker(key: int) -> None:
+    """
+    Pick the resources of the pool in a forked worker process.
+    """
+    gc.enable()
+
+    (ghost, document) = _pools[key]
+    ghost.after_fork()
+
+    _worker["ghost"] = ghost
+    _worker["document"] = document
+
+
+def _process_text(text: str) -> GhostResult:
+    """
+    Pseudonymize or anonymize a text in a worker process.
+    """
+    ghost = _worker["ghost"]
+
+    words = Text().get_words(text=text)
+
+    matches = ghost.find_matches(text=text, words=words)
+
+    transformation = ghost.transform_text(
+        text=text, matches=matches, words=words)
+
+    return GhostResult(matches=matches, transformation=transformation)
+
+
+def _process_document(
+    filename: pathlib.Path,
+    output: Optional[pathlib.Path]
+) -> dict[int, GhostResult]:
+    """
+    Pseudonymize or anonymize a document in a worker process.
+    """
+    ghost = _worker["ghost"]
+    document = _worker["document"]
+
+    deadline = Deadline(config=ghost.config.deadline, metrics=ghost.metrics)
+
+    document.load(filename=filename, deadline=deadline)
+
+    found = ghost.find_document_matches(pages=document.ocr,
+                                        deadline=deadline)
+
+    results = {}
+    transformations = {}
+    for page, ocr in enumerate(document.ocr):
+        if document.is_blank(page=page):
+            continue
+
+        transformation = ghost.transform_text(
+            text=ocr.text, matches=found[page], words=ocr.words,
+            deadline=deadline, page=page)
+
+        results[page] = GhostResult(
+            matches=found[page], transformation=transformation,
+            degradations=deadline.get_degradations(page=page))
+        transformations[page] = transformation
+
+    if output is not None:
+        document.manipulate_pages(transformers=transformations)
+
+        for page in transformations:
+            if deadline.is_redacted(page=page):
+                document.redact_page(page=page)
+
+        document.save(filename=output)
+
+    return results
+
+# ---------------------------------------------------------------------------- #
@@ -0,0 +1,134 @@
+# ---------------------------------------------------------------------------- #
+
+import pathlib
+import re
+import logging
+from typing import List, Optional
+
+# ---------------------------------------------------------------------------- #
+
+from .models import PrefilterConfig
+
+# ---------------------------------------------------------------------------- #
+
+
+class Prefilter():
+    """
+    A Prefilter decides with cheap checks whether an expensive matcher (like
+    spacy) can find anything in a segment of text. The checks run as a
+    cascade, cheapest first, and the first failing check rejects the
+    segment:
+
+    1. Text matching the ignore patterns (e.g. text that has already been
+       redacted) is removed; an empty segment is rejected.
+    2. Segments with fewer than min_letters letters (e.g. numeric tables)
+       are rejected.
+    3. If capitalized is set, segments without a capitalized word are
+       rejected.
+    4. If patterns or a gazetteer are configured, segments without a hit of
+       either are rejected.
+    """
+    config: PrefilterConfig
+    _ignore: Optional[re.Pattern]
+    _patterns: Optional[re.Pattern]
+    _gazetteer: Optional[re.Pattern]
+    _words: re.Pattern
+    _logger: logging.Logger
+
+    def __init__(self, config: PrefilterConfig) -> None:
+        """
+        Compile the patterns and load the gazetteer.
+        """
+        self.config = config
+        self._logger = logging.getLogger("pyghost.prefilter")
+
+        self._ignore = self._compile(patterns=config.ignore_patterns)
+        self._patterns = self._compile(patterns=config.patterns)
+
+        entries = list(config.gazetteer)
+        if config.gazetteer_file:
+            entries += self._load_gazetteer(
+                filename=pathlib.Path(config.gazetteer_file))
+
+        # the entries are matched as whole words, longest entries first
+        self._gazetteer = None
+        if entries:
+            entries = sorted(set(entries), key=len, reverse=True)
+            self._gazetteer = re.compile(
+                r"(?<!\w)(?:" + "|".join(re.escape(entry)
+                                         for entry in entries) + r")(?!\w)",
+                flags=re.IGNORECASE)
+
+        self._words = re.compile(r"(?<!\w)\w")
+
+    def check(self, text: str) -> Optional[str]:
+        """
+        Return None if a segment passes the prefilter, or the name of the
+        check that has rejected it ('empty', 'letters', 'capitalized', or
+        'hits').
+        """
+        if self._ignore is not None:
+            text = self._ignore.sub(" ", text)
+
+        if not text.strip():
+            return "empty"
+
+        if self.config.min_letters > 0:
+            letters = 0
+            for character in text:
+                if character.isalpha():
+                    letters += 1
+                    if letters >= self.config.min_letters:
+                        break
+            else:
+                return "letters"
+
+        if self.config.capitalized and \
+                not any(word.group(0).isupper()
+                        for word in self._words.finditer(text)):
+            return "capitalized"
+
+        if self._patterns is None and self._gazetteer is None:
+            return None
+
+        if self._patterns is not None and self._patterns.search(text):
+            return None
+
+        if self._gazetteer is not None and self._gazetteer.search(text):
+            return None
+
+        return "hits"
+
+    def _compile(self, patterns: List[str]) -> Optional[re.Pattern]:
+        """
+        Compile patterns into a single pattern that finds any of them.
+        """
+        if not patterns:
+            return None
+
+        try:
+            return re.compile("|".join(f"(?:{pattern})"
+                                       for pattern in patterns))
+        except re.error as exception:
+            raise Exception(f"Invalid prefilter pattern: {exception}")
+
+    def _load_gazetteer(self, filename: pathlib.Path) -> List[str]:
+        """
+        Load a gazetteer file with one entry per line.
+        """
+        if not filename.is_file():
+            filename = pathlib.Path(__file__).parent / filename
+
+        try:
+            with filename.open("r", encoding="utf-8") as file:
+                entries = [line.strip() for line in file if line.strip()]
+        except Exception as exception:
+            raise Exception(f"Unable to read the gazetteer at "
+                            f"'{filename}': {exception}")
+
+        self._logger.debug(f"Loaded {len(entries)} gazetteer entries from "
+                           f"'{filename}'.")
+
+        return entries
+
+# ---------------------------------------------------------------------------- #
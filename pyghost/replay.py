@@ -0,0 +1,220 @@
+# ---------------------------------------------------------------------------- #
+
+import pathlib
+import json
+import re
+import logging
+from typing import List, Optional
+
+# ---------------------------------------------------------------------------- #
+
+from .document import Document
+from .ghost import Ghost
+from .models import GhostRecord, GhostResult, Word
+
+# ---------------------------------------------------------------------------- #
+
+
+def read_records(filename: pathlib.Path) -> List[GhostRecord]:
+    """
+    Read the records of an export: all lines of a JSON Lines export, or a
+    single page of a JSON export (whose page is taken from the suffix of the
+    filename, e.g. 'matches_document_3.json').
+    """
+    try:
+        if filename.suffix.lower() == ".jsonl":
+            with filename.open("r", encoding="utf-8") as file:
+                return [GhostRecord(**json.loads(line))
+                        for line in file if line.strip()]
+
+        with filename.open("r", encoding="utf-8") as file:
+            result = GhostResult(**json.load(file))
+    except Exception as exception:
+        raise Exception(f"Unable to read the export at '{filename}': "
+                        f"{exception}")
+
+    page = re.search(r"_(\d+)$", filename.stem)
+    if page is None:
+        raise Exception(f"Unable to determine the page of the export at "
+                        f"'{filename}'.")
+
+    return [GhostRecord(file="", page=int(page.group(1)),
+                        matches=result.matches)]
+
+# ---------------------------------------------------------------------------- #
+
+
+class Replay():
+    """
+    The Replay class re-renders a document from previously exported matches
+    (and optionally OCR results) without running OCR or any matcher. Only the
+    transformer and the rendering of the pages are executed again, e.g. to
+    change colors, fonts, or the transformer.
+    """
+    ghost: Ghost
+    document: Document
+    _logger: logging.Logger
+
+    def __init__(self, ghost: Ghost, document: Document) -> None:
+        """
+        Initialize the replay.
+        """
+        self.ghost = ghost
+        self.document = document
+        self._logger = logging.getLogger("pyghost.replay")
+
+    def select(
+        self,
+        filename: pathlib.Path,
+        records: List[GhostRecord],
+        checksum: Optional[str] = None
+    ) -> List[GhostRecord]:
+        """
+        Select the records that belong to a document: the records exported
+        from the same path or, if there are none, from a file with the same
+        name in exactly one other directory. Records without a file name
+        (from JSON exports) belong to any document.
+
+        Resumed batches append the records of a file again if it has been
+        changed or interrupted. Only the latest record of each page is kept,
+        and if the checksum of the file is given, only records of its
+        current content are considered (as long as there are any).
+        """
+        path = filename.resolve()
+
+        selected = [record for record in records if record.file and
+                    pathlib.Path(record.file).resolve() == path]
+
+        if not selected:
+            selected = [record for record in records if record.file and
+                        pathlib.Path(record.file).name == filename.name]
+
+            files = sorted({record.file for record in selected})
+            if len(files) > 1:
+                raise Exception(
+                    f"The export contains results of several files named "
+                    f"'{filename.name}' ({', '.join(files)}), none of them "
+                    f"at '{filename}'. Please replay the documents from "
+                    f"the paths they have been exported from.")
+
+            if files:
+                self._logger.info(f"Replaying the results of '{files[0]}' "
+                                  f"on '{filename}'.")
+
+        selected += [record for record in records if not record.file]
+
+        if checksum and any(record.checksum == checksum
+                            for record in selected):
+            selected = [record for record in selected
+                        if record.checksum in (None, checksum)]
+
+        latest = {record.page: record for record in selected}
+        return [latest[page] for page in sorted(latest)]
+
+    def validate(
+        self,
+        filename: pathlib.Path,
+        records: List[GhostRecord],
+        checksum: Optional[str] = None
+    ) -> List[str]:
+        """
+        Check whether the records fit the loaded document and return a list
+        of problems.
+        """
+        problems = []
+
+        if len(records) == 0:
+            problems.append(f"The export contains no results for "
+                            f"'{filename.name}'.")
+
+        pages = set()
+        for record in records:
+            if record.checksum and checksum and record.checksum != checksum:
+                problems.append(f"Page {record.page} has been exported from "
+                                f"a file with different content.")
+
+            if record.page < 0 or record.page >= len(self.document.images):
+                problems.append(f"Page {record.page} does not exist, the "
+                                f"document has {len(self.document.images)} "
+                                f"page(s).")
+                continue
+
+            if record.page in pages:
+                problems.append(f"Page {record.page} has been exported more "
+                                f"than once.")
+            pages.add(record.page)
+
+            (width, height) = self.document.images[record.page].size
+            for word in self.get_words(record=record):
+                if not word.coordinates:
+                    continue
+
+                if word.coordinates.left < 0 or word.coordinates.top < 0 or \
+                        word.coordinates.left + word.coordinates.width > \
+                        width or \
+                        word.coordinates.top + word.coordinates.height > \
+                        height:
+                    problems.append(f"The word '{word.text}' on page "
+                                    f"{record.page} lies outside of the "
+                                    f"page ({width}x{height}).")
+
+        return problems
+
+    def run(
+        self,
+        filename: pathlib.Path,
+        records: List[GhostRecord],
+        checksum: Optional[str] = None
+    ) -> None:
+        """
+        Load a document without OCR, validate the records, and apply the
+        transformations of the exported matches to its pages.
+        """
+        records = self.select(
+            filename=filename, records=records, checksum=checksum)
+
+        self.document.load(filename=filename, ocr=False)
+
+        problems = self.validate(
+            filename=filename, records=records, checksum=checksum)
+        if problems:
+            raise Exception(
+                f"The export does not match the document '{filename}': " +
+                " ".join(problems))
+
+        transformations = {}
+        for record in records:
+            words = self.get_words(record=record)
+            text = record.ocr.text if record.ocr else \
+                " ".join(word.text for word in words)
+
+            transformations[record.page] = self.ghost.transform_text(
+                text=text, matches=record.matches, words=words)
+
+            self._logger.debug(f"Replaying {len(record.matches)} matches on "
+                               f"page {record.page}.")
+
+        self.document.manipulate_pages(transformers=transformations)
+
+        # pages that were not processed in time have been covered completely
+        for record in records:
+            if any(degradation.fallback == "page_redaction"
+                   for degradation in record.degradations):
+                self.document.redact_page(page=record.page)
+
+    def get_words(self, record: GhostRecord) -> List[Word]:
+        """
+        Return the words of a record: the exported OCR words if available,
+        the words touched by the matches otherwise.
+        """
+        if record.ocr:
+            return record.ocr.words
+
+        words = {}
+        for match in record.matches:
+            for word in match.touched:
+                words[(word.start, word.end)] = word
+
+        return [words[key] for key in sorted(words)]
+
+# ---------------------------------------------------------------------------- #
@@ -0,0 +1,178 @@
+# ---------------------------------------------------------------------------- #
+
+import bisect
+import logging
+from typing import List, Tuple
+
+# ---------------------------------------------------------------------------- #
+
+from .models import Match, ResolverConfig
+
+# ---------------------------------------------------------------------------- #
+
+
+class MatchResolver():
+    """
+    The MatchResolver turns the matches of all matchers into one set of
+    non-overlapping matches. Matches are sorted by their start and swept
+    into clusters of overlapping matches. Within a cluster, matches are
+    ranked by the configured policy: the best match is kept and the others
+    are trimmed to the whole words that are not yet covered, so no matched
+    word is lost or transformed twice.
+    """
+    config: ResolverConfig
+    logger: logging.Logger
+
+    def __init__(self, config: ResolverConfig) -> None:
+        """
+        Initialize the resolver.
+        """
+        self.config = config
+        self.logger = logging.getLogger("pyghost.resolver")
+
+    def resolve(self, text: str, matches: List[Match]) -> List[Match]:
+        """
+        Resolve overlapping matches. The result is sorted by start.
+        """
+        if self.config.policy == "none" or len(matches) < 2:
+            return matches
+
+        # ties are broken by the order of the matchers
+        ordered = sorted(enumerate(matches),
+                         key=lambda item: (item[1].start, -item[1].end))
+
+        result: List[Match] = []
+        cluster: List[Tuple[int, Match]] = []
+        cluster_end = -1
+        for (position, match) in ordered:
+            if cluster and match.start >= cluster_end:
+                result += self._resolve_cluster(text=text, cluster=cluster)
+                cluster = []
+
+            if not cluster:
+                cluster_end = match.end
+
+            cluster.append((position, match))
+            cluster_end = max(cluster_end, match.end)
+
+        result += self._resolve_cluster(text=text, cluster=cluster)
+
+        self.logger.debug(f"Resolved {len(matches)} matches into "
+                          f"{len(result)} non-overlapping matches.")
+
+        return result
+
+    def _resolve_cluster(
+        self,
+        text: str,
+        cluster: List[Tuple[int, Match]]
+    ) -> List[Match]:
+        """
+        Resolve a cluster of (transitively) overlapping matches. The covered
+        spans are kept as sorted lists of starts and ends, so the spans a
+        match overlaps are found by bisection.
+        """
+        if len(cluster) == 1:
+            return [cluster[0][1]]
+
+        starts: List[int] = []
+        ends: List[int] = []
+        result = []
+        for (position, match) in sorted(cluster, key=self._rank):
+            # the spans that overlap or touch the match
+            first = bisect.bisect_left(ends, match.start)
+            last = bisect.bisect_right(starts, match.end)
+
+            start = match.start
+            for index in range(first, last):
+                if ends[index] <= start or starts[index] >= match.end:
+                    continue
+
+                if starts[index] > start:
+                    result += self._trim(text=text, match=match,
+                                         start=start, end=starts[index])
+
+                start = max(start, ends[index])
+
+            if start < match.end:
+                result += self._trim(text=text, match=match,
+                                     start=start, end=match.end)
+
+            if first < last:
+                starts[first:last] = [min(starts[first], match.start)]
+                ends[first:last] = [max(ends[last-1], match.end)]
+            else:
+                starts.insert(first, match.start)
+                ends.insert(first, match.end)
+
+        return sorted(result, key=lambda match: match.start)
+
+    def _rank(self, item: Tuple[int, Match]) -> Tuple[int, int, int]:
+        """
+        Return the sort key of a match, lower keys win.
+        """
+        (position, match) = item
+        length = match.end - match.start
+
+        if self.config.policy == "matcher_priority":
+            return (self._priority(self.config.matcher_priority,
+                                   match.matcher), -length, position)
+
+        if self.config.policy == "label_priority":
+            return (self._priority(self.config.label_priority,
+                                   match.label), -length, position)
+
+        return (-length, position, 0)
+
+    def _priority(self, priorities: List[str], name: str) -> int:
+        """
+        Return the position of a name in a priority list. Unlisted names
+        come last.
+        """
+        if name in priorities:
+            return priorities.index(name)
+
+        return len(priorities)
+
+    def _trim(
+        self,
+        text: str,
+        match: Match,
+        start: int,
+        end: int
+    ) -> List[Match]:
+        """
+        Return a copy of a match restricted to the span from start to end,
+        or nothing if the span only contains whitespace. Where the span has
+        been cut by a better match, it is trimmed to the whole words outside
+        of that match, so no word is transformed by both matches.
+        """
+        if start == match.start and end == match.end:
+            return [match]
+
+        if start > match.start:
+            while start < end and not text[start-1].isspace() and \
+                    not text[start].isspace():
+                start += 1
+
+        if end < match.end:
+            while end > start and not text[end-1].isspace() and \
+                    not text[end].isspace():
+                end -= 1
+
+        while start < end and text[start].isspace():
+            start += 1
+
+        while end > start and text[end-1].isspace():
+            end -= 1
+
+        if start == end:
+            return []
+
+        return [match.model_copy(update={
+            "text": text[start:end],
+            "start": start,
+            "end": end
+        })]
+
+# ---------------------------------------------------------------------------- #
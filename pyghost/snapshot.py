@@ -0,0 +1,143 @@
+# ---------------------------------------------------------------------------- #
+
+import pathlib
+import pickle
+import logging
+from typing import Optional
+
+# ---------------------------------------------------------------------------- #
+
+from .document import Document
+from .ghost import Ghost
+from .models import Config
+
+# ---------------------------------------------------------------------------- #
+
+SNAPSHOT_FORMAT = 1
+
+# ---------------------------------------------------------------------------- #
+
+
+class Snapshot():
+    """
+    A Snapshot holds a ready-to-use Ghost and Document for one language:
+    the validated configuration, the initialized matchers (with compiled
+    regex patterns and the pinned paths of their spacy models), the
+    transformer with its length-indexed fakes, and the OCR provider. It is
+    compiled once and saved to a single file, so that workers can restore it
+    instead of initializing everything from the configuration.
+
+    Snapshots are pickle files. Only load snapshots from trusted sources.
+    """
+    language: str
+    config: Config
+    ghost: Ghost
+    document: Document
+    _logger: logging.Logger
+
+    def __init__(
+        self,
+        language: str,
+        config: Config,
+        ghost: Ghost,
+        document: Document
+    ) -> None:
+        """
+        Initialize the snapshot.
+        """
+        self.language = language
+        self.config = config
+        self.ghost = ghost
+        self.document = document
+        self._logger = logging.getLogger("pyghost.snapshot")
+
+    @classmethod
+    def compile(
+        cls,
+        language: str,
+        config: Config,
+        transformer: Optional[str] = None,
+        ocr_provider: Optional[str] = None
+    ) -> "Snapshot":
+        """
+        Initialize a Ghost and a Document from a configuration and load all
+        their resources.
+        """
+        ghost = Ghost(
+            language=language,
+            config=config,
+            transformer=transformer
+        )
+        ghost.transformer.preload()
+
+        document = Document(
+            language=language,
+            config=config,
+            ocr_provider=ocr_provider
+        )
+
+        return cls(
+            language=language,
+            config=config,
+            ghost=ghost,
+            document=document
+        )
+
+    def select(
+        self,
+        transformer: Optional[str] = None,
+        ocr_provider: Optional[str] = None
+    ) -> None:
+        """
+        Switch the restored Ghost to another transformer and the Document to
+        another OCR provider of the compiled configuration.
+        """
+        if transformer:
+            self.ghost.initialize_transformer(provider=transformer)
+            self.ghost.transformer.preload()
+
+        if ocr_provider:
+            self.document._ocr_provider_name = ocr_provider
+            self.document._initialize_ocr(provider=ocr_provider)
+
+    def save(self, filename: pathlib.Path) -> None:
+        """
+        Save the snapshot to a file.
+        """
+        self._logger.debug(f"Saving snapshot to '{filename}'.")
+
+        with filename.open("wb") as file:
+            pickle.dump({
+                "format": SNAPSHOT_FORMAT,
+                "language": self.language,
+                "config": self.config,
+                "ghost": self.ghost,
+                "document": self.document
+            }, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, filename: pathlib.Path) -> "Snapshot":
+        """
+        Load a snapshot from a file.
+        """
+        try:
+            with filename.open("rb") as file:
+                content = pickle.load(file)
+        except Exception as exception:
+            raise Exception(f"Unable to read the snapshot at '{filename}': "
+                            f"{exception}")
+
+        if not isinstance(content, dict) or \
+                content.get("format") != SNAPSHOT_FORMAT:
+            raise Exception(f"The snapshot at '{filename}' has been compiled "
+                            f"by an incompatible version of pyghost. Please "
+                            f"compile it again.")
+
+        return cls(
+            language=content["language"],
+            config=content["config"],
+            ghost=content["ghost"],
+            document=content["document"]
+        )
+
+# ---------------------------------------------------------------------------- #
@@ -0,0 +1,328 @@
+# ---------------------------------------------------------------------------- #
+
+import pathlib
+import bisect
+import collections
+import csv
+import logging
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+# ---------------------------------------------------------------------------- #
+
+from .ghost import Ghost
+from .matchers import MatcherTimeout
+from .models import Match, Segment
+from .text import Text
+
+# ---------------------------------------------------------------------------- #
+
+
+class Table():
+    """
+    The Table class pseudonymizes or anonymizes columns of tables, e.g. the
+    name and free-text columns of a claims export. Tables are streamed in
+    chunks of rows, so they do not need to fit into memory. Every distinct
+    value is processed only once: its result is cached and reused for all
+    repetitions, and the distinct values of a chunk are matched together as
+    one batch. The transformer's memory keeps the pseudonyms consistent
+    across the whole table.
+    """
+    ghost: Ghost
+    columns: List[str]
+    chunk_size: int
+    cache_size: int
+    logger: logging.Logger
+    _results: collections.OrderedDict[str, str]
+
+    # the separator between the values of a batch, matches that span it are
+    # clipped to the values
+    SEPARATOR = "\n\n"
+
+    def __init__(
+        self,
+        ghost: Ghost,
+        columns: List[str],
+        chunk_size: int = 10000,
+        cache_size: int = 100000
+    ) -> None:
+        """
+        Initialize the table processor with the names of the columns to
+        process. At most cache_size distinct values are remembered, the least
+        recently used are processed again when they reappear.
+        """
+        self.ghost = ghost
+        self.columns = columns
+        self.chunk_size = chunk_size
+        self.cache_size = cache_size
+        self.logger = logging.getLogger("pyghost.table")
+        self._results = collections.OrderedDict()
+
+    def process(self, source: pathlib.Path, target: pathlib.Path) -> int:
+        """
+        Process a CSV or Parquet file (depending on the suffix of the source)
+        and return the number of rows.
+        """
+        if source.suffix.lower() == ".parquet":
+            return self.process_parquet(source=source, target=target)
+
+        return self.process_csv(source=source, target=target)
+
+    def process_csv(
+        self,
+        source: pathlib.Path,
+        target: pathlib.Path,
+        delimiter: str = ",",
+        encoding: str = "utf-8"
+    ) -> int:
+        """
+        Process a CSV file with a header row and return the number of rows.
+        """
+        rows = 0
+        with source.open("r", encoding=encoding, newline="") as infile, \
+                target.open("w", encoding=encoding, newline="") as outfile:
+            reader = csv.reader(infile, delimiter=delimiter)
+            writer = csv.writer(outfile, delimiter=delimiter)
+
+            header = next(reader, None)
+            if header is None:
+                return 0
+            writer.writerow(header)
+
+            indices = self.get_indices(header=header)
+
+            for chunk in self.get_chunks(rows=reader):
+                values = [row[index] if index < len(row) else ""
+                          for row in chunk for index in indices]
+
+                transformed = iter(self.transform_values(values=values))
+
+                for row in chunk:
+                    for index in indices:
+                        if index < len(row):
+                            row[index] = next(transformed)
+                        else:
+                            next(transformed)
+
+                writer.writerows(chunk)
+                rows += len(chunk)
+
+                self.logger.debug(f"Processed {rows} rows of '{source}'.")
+
+        return rows
+
+    def process_parquet(
+        self,
+        source: pathlib.Path,
+        target: pathlib.Path
+    ) -> int:
+        """
+        Process a Parquet file batch by batch and return the number of rows.
+        Only string columns can be processed.
+        """
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise Exception("Parquet files require pyarrow, please install "
+                            "it with 'pip install pyarrow'.")
+
+        parquet = pyarrow.parquet.ParquetFile(source)
+        schema = parquet.schema_arrow
+
+        indices = self.get_indices(header=schema.names)
+        for index in indices:
+            field = schema.field(index)
+            if not (pyarrow.types.is_string(field.type) or
+                    pyarrow.types.is_large_string(field.type)):
+                raise Exception(f"Column '{field.name}' of '{source}' is not "
+                                f"a string column.")
+
+        rows = 0
+        with pyarrow.parquet.ParquetWriter(target, schema) as writer:
+            for batch in parquet.iter_batches(batch_size=self.chunk_size):
+                table = pyarrow.Table.from_batches([batch], schema=schema)
+
+                for index in indices:
+                    field = schema.field(index)
+                    values = self.transform_values(
+                        values=table.column(index).to_pylist())
+                    table = table.set_column(
+                        index, field, pyarrow.array(values, type=field.type))
+
+                writer.write_table(table)
+                rows += table.num_rows
+
+                self.logger.debug(f"Processed {rows} rows of '{source}'.")
+
+        return rows
+
+    def get_indices(self, header: List[str]) -> List[int]:
+        """
+        Return the indices of the configured columns.
+        """
+        missing = [column for column in self.columns
+                   if column not in header]
+        if missing:
+            raise Exception(f"The table has no column(s) "
+                            f"{', '.join(missing)}.")
+
+        return [header.index(column) for column in self.columns]
+
+    def get_chunks(
+        self,
+        rows: Iterable[List[str]]
+    ) -> Iterator[List[List[str]]]:
+        """
+        Split rows into chunks of chunk_size rows.
+        """
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+
+        if chunk:
+            yield chunk
+
+    def transform_values(self, values: List[Any]) -> List[Any]:
+        """
+        Pseudonymize or anonymize a batch of cell values. Values that are not
+        strings (e.g. missing values) or empty are returned unchanged, all
+        others are processed once and then taken from the cache.
+        """
+        distinct = list(dict.fromkeys(
+            value for value in values
+            if isinstance(value, str) and value.strip() and
+            value not in self._results))
+
+        self.ghost.metrics.increment("table.values", len(values))
+        self.ghost.metrics.increment("table.processed_values", len(distinct))
+
+        # values of this batch must not be evicted before they are used
+        results = dict(zip(distinct, self.process_batch(values=distinct)))
+
+        for value, result in results.items():
+            self._results[value] = result
+
+        transformed = []
+        for value in values:
+            if not isinstance(value, str) or not value.strip():
+                transformed.append(value)
+            elif value in results:
+                transformed.append(results[value])
+            else:
+                self._results.move_to_end(value)
+                transformed.append(self._results[value])
+
+        while len(self._results) > self.cache_size:
+            self._results.popitem(last=False)
+
+        return transformed
+
+    def process_batch(self, values: List[str]) -> List[str]:
+        """
+        Process distinct values. The values are joined into one text with
+        one segment per value, so regex matchers run once per batch and spacy
+        matchers process the values in batches. The matches are then split
+        back into the values, which are transformed one by one. If a matcher
+        cannot process the batch completely, the values are matched one by
+        one, and only the values it cannot process are redacted completely.
+        """
+        if len(values) == 0:
+            return []
+
+        text, bounds = self.join_values(values=values)
+
+        # every value is a block, paragraph and line, so it is a segment of
+        # whatever level the matchers are configured for
+        segments = [Segment(level=level, start=start, end=end)
+                    for start, end in bounds
+                    for level in ("block", "paragraph", "line")]
+
+        found: Optional[List[List[Match]]] = None
+        try:
+            matches = self.ghost.collect_matches(text=text, segments=segments)
+            found = self.split_matches(matches=matches, bounds=bounds)
+        except MatcherTimeout as exception:
+            self.logger.warning(f"{exception} Matching the values of the "
+                                f"batch one by one.")
+
+        result = []
+        for index, value in enumerate(values):
+            words = Text().get_words(text=value)
+
+            if found is None:
+                value_matches = self.ghost.find_matches(
+                    text=value, words=words)
+            else:
+                value_matches = self.ghost.finish_matches(
+                    text=value, words=words, matches=found[index])
+
+            transformation = self.ghost.transform_text(
+                text=value, matches=value_matches, words=words)
+
+            result.append(transformation.transformed_text)
+
+        return result
+
+    def join_values(
+        self,
+        values: List[str]
+    ) -> Tuple[str, List[Tuple[int, int]]]:
+        """
+        Join values into one text and return it with the start and end of
+        each value.
+        """
+        bounds = []
+        position = 0
+        for value in values:
+            bounds.append((position, position + len(value)))
+            position += len(value) + len(self.SEPARATOR)
+
+        return (self.SEPARATOR.join(values), bounds)
+
+    def split_matches(
+        self,
+        matches: List[Match],
+        bounds: List[Tuple[int, int]]
+    ) -> List[List[Match]]:
+        """
+        Assign the matches of a joined text to its values and make their
+        offsets relative to the value. A match that runs across the
+        separator into other values (e.g. a pattern that matches whitespace)
+        is clipped to each value it covers.
+        """
+        starts = [start for start, _ in bounds]
+
+        result: List[List[Match]] = [[] for _ in bounds]
+        for match in matches:
+            index = max(bisect.bisect_right(starts, match.start) - 1, 0)
+
+            while index < len(bounds) and bounds[index][0] < match.end:
+                (start, end) = bounds[index]
+                (clipped_start, clipped_end) = (max(match.start, start),
+                                                min(match.end, end))
+                index += 1
+
+                if clipped_start >= clipped_end:
+                    continue
+
+                if (clipped_start, clipped_end) != (match.start, match.end):
+                    self.logger.debug(f"Clipping match '{match.text}' that "
+                                      f"spans several values.")
+
+                text = match.text[clipped_start - match.start:
+                                  clipped_end - match.start]
+                if not text.strip():
+                    continue
+
+                result[index - 1].append(match.model_copy(update={
+                    "text": text,
+                    "start": clipped_start - start,
+                    "end": clipped_end - start
+                }))
+
+        return result
+
+# ---------------------------------------------------------------------------- #
@@ -1,3 +1,21 @@
+import importlib
+from typing import Any
+
 from ._base import BaseTransformer
-from .label import LabelTransformer
-from .faker import FakerTransformer
+
+# the implementations are imported on first access, so that only the
+# transformers a configuration uses are loaded
+_implementations = {
+    "LabelTransformer": ".label",
+    "FakerTransformer": ".faker",
+}
+
+__all__ = ["BaseTransformer", *_implementations]
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _implementations:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+    module = importlib.import_module(_implementations[name], __name__)
+    return getattr(module, name)
@@ -3,11 +3,14 @@
 
 import pydantic
 import logging
-from typing import Any, List, Optional, Tuple
+import threading
+from typing import Any, Callable, List, Optional, Tuple
 
 # ---------------------------------------------------------------------------- #
 
+from ..budget import is_abandoned
 from ..models import Match, Transformation, TransformerResult, Word
+from ..metrics import Metrics
 
 # ---------------------------------------------------------------------------- #
 
@@ -15,7 +18,8 @@ from ..models import Match, Transformation, TransformerResult, Word
 class BaseTransformer():
     """
     All transformers inherit from the BaseTransformer class. It provides basic
-    config management and the interface to the pseudomizer.
+    config management and the interface to the pseudomizer. The memory is
+    guarded by a lock, so a transformer can be shared between threads.
     """
     class TransformerConfig(pydantic.BaseModel):
         """
@@ -26,8 +30,10 @@ class BaseTransformer():
 
     config: TransformerConfig
     logger: logging.Logger
+    metrics: Metrics
 
     memory: dict[str, dict[str, str]]
+    _lock: threading.RLock
 
     def __init__(
         self,
@@ -38,7 +44,31 @@ class BaseTransformer():
         """
         self.config = self.TransformerConfig(**config)
         self.logger = logging.getLogger("pyghost.transformers")
+        self.metrics = Metrics()
         self.memory = {}
+        self._lock = threading.RLock()
+
+    def __getstate__(self) -> dict[str, Any]:
+        """
+        Pickle the transformer without its lock.
+        """
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        """
+        Restore a pickled transformer with a new lock.
+        """
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    def preload(self) -> None:
+        """
+        Overwrite this method to load your transformer's resources upfront
+        instead of on first use.
+        """
+        pass
 
     def create_transformations(
         self,
@@ -56,8 +86,9 @@ class BaseTransformer():
         words: List[Word]
     ) -> TransformerResult:
         """
-        Merge overlappig transformations, call create_transformations and apply
-        them to the text. Only overwrite this in special cases.
+        Call create_transformations and apply them to the text. Overlapping
+        matches are expected to be resolved by Ghost beforehand. Only
+        overwrite this in special cases.
         """
         transformations = self.create_transformations(matches=matches)
 
@@ -91,22 +122,53 @@ class BaseTransformer():
         replacement: str
     ) -> None:
         """
-        Add a text belonging to a certain label to memory.
+        Add a text belonging to a certain label to memory. Abandoned stages
+        do not write, so their replacements are not reused.
         """
-        if label not in self.memory:
-            self.memory[label] = {}
-        self.memory[label][text] = replacement
+        if is_abandoned():
+            return
+
+        with self._lock:
+            if label not in self.memory:
+                self.memory[label] = {}
+            self.memory[label][text] = replacement
 
     def from_memory(self, label: str, text: str) -> str | None:
         """
         Retrieve a text belonging to a certain label from memory.
         """
-        if label in self.memory:
-            if text in self.memory[label]:
-                return self.memory[label][text]
+        with self._lock:
+            if label in self.memory:
+                if text in self.memory[label]:
+                    self.metrics.increment("cache_hits.transformer")
+                    return self.memory[label][text]
 
         return None
 
+    def memorize(
+        self,
+        label: str,
+        text: str,
+        create: Callable[[], str]
+    ) -> str:
+        """
+        Retrieve a text belonging to a certain label from memory or create
+        and remember its replacement. This is atomic, so concurrent calls
+        always agree on the same replacement.
+        """
+        with self._lock:
+            replacement = self.from_memory(label=label, text=text)
+
+            if replacement is None:
+                replacement = create()
+                self.add_to_memory(
+                    label=label,
+                    text=text,
+                    replacement=replacement
+                )
+
+            return replacement
+
     def apply_transformations(
         self,
         text: str,
@@ -114,33 +176,60 @@ class BaseTransformer():
         words: List[Word]
     ) -> str:
         """
-        Apply a list of transformations to a text.
+        Apply a list of transformations to a text. Only the first
+        transformation of each word is applied, the words themselves are not
+        modified. The words are separated like in the text, e.g. by line
+        breaks, or by a space if their offsets do not fit the text.
         """
+        replacements: dict[Tuple[int, int, int, str], Transformation] = {}
+        for transformation in transformations:
+            word = transformation.word
+            key = (word.page, word.start, word.end, word.text)
+            if key not in replacements:
+                replacements[key] = transformation
+
+        source = text
+        previous: Optional[Word] = None
+
         text = ""
         for word in words:
-            if len(text) > 0:
-                text += " "
+            if previous is not None:
+                text += self.get_separator(
+                    text=source, previous=previous, word=word)
+            previous = word
 
-            transformed = False
-            for transformation in transformations:
-                if transformation.word != word:
-                    # this will skip already transformed words, since
-                    # then the original word will have changed
-                    continue
+            transformation = replacements.get(
+                (word.page, word.start, word.end, word.text))
 
-                self.logger.debug(f"Applying transformation "
-                                  f"'{transformation.replacement}' "
-                                  f"to word '{word.text}'.")
+            if transformation is None or transformation.word != word:
+                text += word.text
+                continue
 
-                word.text = transformation.replacement
+            self.logger.debug(f"Applying transformation "
+                              f"'{transformation.replacement}' "
+                              f"to word '{word.text}'.")
 
-                text += transformation.replacement
-                transformation.applied = True
-                transformed = True
-
-            if not transformed:
-                text += word.text
+            text += transformation.replacement
+            transformation.applied = True
 
         return text
 
+    def get_separator(self, text: str, previous: Word, word: Word) -> str:
+        """
+        Return the whitespace between two consecutive words of a text, or a
+        space if the words cannot be found at their offsets.
+        """
+        if previous.end > word.start or word.end > len(text):
+            return " "
+
+        if text[previous.start:previous.end] != previous.text or \
+                text[word.start:word.end] != word.text:
+            return " "
+
+        separator = text[previous.end:word.start]
+        if len(separator) == 0 or not separator.isspace():
+            return " "
+
+        return separator
+
 # ---------------------------------------------------------------------------- #
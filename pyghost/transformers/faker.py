@@ -31,7 +31,7 @@ class FakerTransformer(BaseTransformer):
         random_preserve: str = "@ .,+-_()#\r\t\n"
         memory: bool = False
 
-    fakes: dict[str, List[str]]
+    fakes: dict[str, dict[int, List[str]]]
 
     def __init__(
         self,
@@ -56,20 +56,17 @@ class FakerTransformer(BaseTransformer):
                 (clean_text, suffix) = self.get_suffix(word.text)
 
                 if self.config.memory:
-                    replacement = self.from_memory(
-                        label=match.label, text=clean_text)
+                    replacement = self.memorize(
+                        label=match.label,
+                        text=clean_text,
+                        create=lambda: self.get_fake(
+                            label=match.label,
+                            text=clean_text)
+                    )
                 else:
-                    replacement = None
-
-                if replacement is None:
                     replacement = self.get_fake(
                         label=match.label,
                         text=clean_text)
-                    self.add_to_memory(
-                        label=match.label,
-                        text=clean_text,
-                        replacement=replacement
-                    )
 
                 transformations.append(
                     Transformation(
@@ -86,41 +83,52 @@ class FakerTransformer(BaseTransformer):
 
         self.load_file(label=label)
 
-        if label not in self.fakes:
-            return self.randomize_text(text=text)
-
-        if len(self.fakes[label]) == 0:
-            return self.randomize_text(text=text)
-
-        candidates = []
-        for candidate in self.fakes[label]:
-            if len(candidate) == len(text):
-                candidates.append(candidate)
+        candidates = self.fakes[label].get(len(text), [])
 
         if len(candidates) < self.config.min_candidates:
             return self.randomize_text(text=text)
 
         return random.choice(candidates)
 
+    def preload(self) -> None:
+        """
+        Load all configured faker files upfront.
+        """
+        assert isinstance(self.config, self.TransformerConfig)
+
+        for label in self.config.files:
+            self.load_file(label=label)
+
     def load_file(self, label: str) -> None:
+        """
+        Load the fakes of a label and index them by their length.
+        """
         assert isinstance(self.config, self.TransformerConfig)
 
         if label in self.fakes:
             return
 
-        if label not in self.config.files:
-            self.fakes[label] = []
-            return
+        with self._lock:
+            if label in self.fakes:
+                return
+
+            if label not in self.config.files:
+                self.fakes[label] = {}
+                return
+
+            filename = pathlib.Path(self.config.files[label])
+            if not filename.is_file():
+                filename = pathlib.Path(__file__).parent / \
+                    pathlib.Path(self.config.files[label])
 
-        filename = pathlib.Path(self.config.files[label])
-        if not filename.is_file():
-            filename = pathlib.Path(__file__).parent / \
-                pathlib.Path(self.config.files[label])
+            self.logger.debug(f"Loading faker file '{filename}'...")
 
-        self.logger.debug(f"Loading faker file '{filename}'...")
+            fakes: dict[int, List[str]] = {}
+            with filename.open("r") as file:
+                for fake in file.read().splitlines():
+                    fakes.setdefault(len(fake), []).append(fake)
 
-        with filename.open("r") as file:
-            self.fakes[label] = file.read().splitlines()
+            self.fakes[label] = fakes
 
     def randomize_text(self, text: str) -> str:
         """
@@ -41,16 +41,11 @@ class LabelTransformer(BaseTransformer):
             for index, word in enumerate(match.touched):
                 (clean_text, suffix) = self.get_suffix(word.text)
 
-                replacement = self.from_memory(
-                    label=match.label, text=clean_text)
-
-                if replacement is None:
-                    replacement = match.label
-                    self.add_to_memory(
-                        label=match.label,
-                        text=clean_text,
-                        replacement=replacement
-                    )
+                replacement = self.memorize(
+                    label=match.label,
+                    text=clean_text,
+                    create=lambda: match.label
+                )
 
                 transformations.append(
                     Transformation(
@@ -12,9 +12,16 @@ dependencies = [
     "pydantic",
     "pdf2image",
     "pillow",
+    "numpy",
     "pytesseract"
 ]
 
+extras = {
+    "regex": ["regex"],
+    "parquet": ["pyarrow"],
+    "pdf": ["pymupdf"]
+}
+
 data_files = [("pyghost",  ["pyghost/config/default.json",
                             "pyghost/data/fake-email-en.txt",
                             "pyghost/data/fake-location-en.txt",
@@ -30,6 +37,7 @@ setup(
     author_email=author_email,
     packages=find_packages(),
     install_requires=dependencies if dependencies else [],
+    extras_require=extras,
     include_package_data=True,
     data_files=data_files
 )
@@ -0,0 +1,85 @@
+# ---------------------------------------------------------------------------- #
+
+import pytest
+import spacy
+from typing import Any, Callable, List, Optional
+
+# ---------------------------------------------------------------------------- #
+
+from pyghost.models import Config
+
+# ---------------------------------------------------------------------------- #
+
+PERSONS = ["John Doe", "Jane Doe", "Bar Baz"]
+
+# ---------------------------------------------------------------------------- #
+
+
+@pytest.fixture(scope="session")
+def spacy_model(tmp_path_factory: pytest.TempPathFactory) -> str:
+    """
+    Save a small spacy pipeline that recognizes a few persons with an entity
+    ruler, so the tests do not depend on a downloaded model.
+    """
+    nlp = spacy.blank("en")
+    ruler = nlp.add_pipe("entity_ruler")
+    ruler.add_patterns([{"label": "PERSON", "pattern": person}  # type: ignore
+                        for person in PERSONS])
+
+    path = tmp_path_factory.mktemp("spacy") / "persons"
+    nlp.to_disk(path)
+
+    return str(path)
+
+
+@pytest.fixture
+def make_config() -> Callable[..., Config]:
+    """
+    Return a function that creates a configuration with the given matchers
+    and transformers (a label transformer by default).
+    """
+    def make(
+        matchers: List[dict[str, Any]],
+        transformers: Optional[List[dict[str, Any]]] = None,
+        font: Optional[str] = None,
+        **sections: Any
+    ) -> Config:
+        return Config(
+            document={
+                "highlighter_color": "#000000",
+                "text_color": "#ffffff",
+                "max_font_size": 100,
+                "font": font or "./fonts/Roboto-Regular.ttf"
+            },
+            matchers=[{"module": "pyghost.matchers",
+                       "languages": ["en"], **matcher}
+                      for matcher in matchers],
+            transformers=transformers or [{
+                "name": "Label", "module": "pyghost.transformers",
+                "cls": "LabelTransformer"}],
+            **sections
+        )
+
+    return make
+
+
+@pytest.fixture
+def person_matcher(spacy_model: str) -> dict[str, Any]:
+    """
+    Return the configuration of a spacy matcher for the test persons.
+    """
+    return {"name": "PersonMatcher", "label": "person",
+            "cls": "SpacyMatcher",
+            "config": {"model": spacy_model, "labels": ["PERSON"]}}
+
+
+@pytest.fixture
+def email_matcher() -> dict[str, Any]:
+    """
+    Return the configuration of a regex matcher for emails.
+    """
+    return {"name": "EmailMatcher", "label": "email", "cls": "RegexMatcher",
+            "config": {"patterns": [
+                "[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\\.[A-Za-z]{2,}"]}}
+
+# ---------------------------------------------------------------------------- #
@@ -0,0 +1,80 @@
+# ---------------------------------------------------------------------------- #
+
+import pytest
+import time
+from typing import Any, Callable
+
+# ---------------------------------------------------------------------------- #
+
+from pyghost.budget import get_timeout, is_abandoned
+from pyghost.deadline import Deadline, DeadlineExceeded
+from pyghost.ghost import Ghost
+from pyghost.metrics import Metrics
+from pyghost.models import Config, DeadlineConfig, OcrResult
+from pyghost.text import Text
+
+# ---------------------------------------------------------------------------- #
+
+
+def test_abandoned_stage_does_not_write_metrics() -> None:
+    """
+    A stage that keeps running after its deadline does not record metrics.
+    """
+    metrics = Metrics()
+    deadline = Deadline(config=DeadlineConfig(matchers=0.1), metrics=metrics)
+
+    def stage() -> None:
+        time.sleep(0.3)
+        assert is_abandoned()
+        metrics.increment("late")
+
+    with pytest.raises(DeadlineExceeded):
+        deadline.run("matchers", stage)
+
+    time.sleep(0.4)
+
+    assert "late" not in metrics.snapshot()["counters"]
+
+
+def test_stage_receives_budget() -> None:
+    """
+    A stage can limit its own timeouts to the time left.
+    """
+    deadline = Deadline(config=DeadlineConfig(ocr=0.5))
+
+    timeout = deadline.run("ocr", lambda: get_timeout(timeout=60.0))
+
+    assert timeout is not None and 0 < timeout <= 0.5
+    assert get_timeout(timeout=60.0) == 60.0
+
+
+def test_regex_backend_stops_at_deadline(
+    make_config: Callable[..., Config]
+) -> None:
+    """
+    A catastrophic pattern of the regex backend is stopped when the budget
+    of the matchers runs out, and the page is redacted.
+    """
+    pytest.importorskip("regex")
+
+    matcher: dict[str, Any] = {
+        "name": "SlowMatcher", "label": "slow", "cls": "RegexMatcher",
+        "config": {"patterns": ["(a|aa)+$"], "backend": "regex",
+                   "unsafe_patterns": "allow"}}
+    ghost = Ghost(language="en", config=make_config([matcher]))
+
+    text = "a" * 40 + "b"
+    page = OcrResult(text=text, words=Text().get_words(text=text))
+    deadline = Deadline(config=DeadlineConfig(document=1.0, matchers=0.3),
+                        metrics=ghost.metrics)
+
+    start = time.monotonic()
+    matches = ghost.find_document_matches(pages=[page], deadline=deadline)
+
+    assert time.monotonic() - start < 1.5
+    assert matches == [[]]
+    assert [degradation.fallback for degradation in deadline.degradations] \
+        == ["regex_only", "page_redaction"]
+    assert deadline.is_redacted(page=0)
+
+# ---------------------------------------------------------------------------- #
@@ -0,0 +1,231 @@
+# ---------------------------------------------------------------------------- #
+
+import pathlib
+import pytest
+import random
+import time
+from PIL import Image, ImageDraw
+from typing import Callable, List
+
+# ---------------------------------------------------------------------------- #
+
+from pyghost.deadline import Deadline
+from pyghost.document import Document
+from pyghost.models import Config, Coordinates, DeadlineConfig, OcrResult, \
+    Transformation, TransformerResult, Word
+from pyghost.ocr import BaseOcr
+
+# ---------------------------------------------------------------------------- #
+
+
+class SlowOcr(BaseOcr):
+    """
+    An OCR provider that takes a second for pages wider than 50 pixels.
+    """
+
+    def process_image(
+        self,
+        image: Image.Image,
+        page_increment: int = 0
+    ) -> OcrResult:
+        if image.width > 50:
+            time.sleep(1.0)
+
+        return OcrResult(text=f"{page_increment}:{image.width}", words=[])
+
+
+class RecordingOcr(BaseOcr):
+    """
+    An OCR provider that records the pages it has been called for.
+    """
+    pages: List[int]
+
+    def __init__(self) -> None:
+        super().__init__(config={})
+        self.pages = []
+
+    def process_image(
+        self,
+        image: Image.Image,
+        page_increment: int = 0
+    ) -> OcrResult:
+        self.pages.append(page_increment)
+        return OcrResult(text=f"page {page_increment}", words=[])
+
+# ---------------------------------------------------------------------------- #
+
+
+def make_document(config: Config) -> Document:
+    """
+    Return a document with a recording OCR provider.
+    """
+    document = Document(language="en", config=config)
+    document.ocr_provider = RecordingOcr()
+    return document
+
+
+def get_scan(text: bool, noise: int = 0) -> Image.Image:
+    """
+    Return a grayish scan with some noise and, if text is set, a few lines
+    of thin strokes.
+    """
+    generator = random.Random(0)
+
+    image = Image.new("L", (1240, 1754), 235)
+    pixels = image.load()
+    for _ in range(noise):
+        pixels[generator.randrange(1240), generator.randrange(1754)] = \
+            generator.randrange(200, 255)
+
+    if text:
+        draw = ImageDraw.Draw(image)
+        for line in range(5):
+            draw.text((100, 200 + line * 40), "Lorem ipsum dolor sit amet",
+                      fill=20)
+
+    return image
+
+
+@pytest.fixture
+def ocr_config(make_config: Callable[..., Config]) -> Config:
+    """
+    Return a configuration with an OCR provider.
+    """
+    return make_config([], ocr=[{
+        "name": "TesseractEN", "module": "pyghost.ocr",
+        "cls": "TesseractOcr", "languages": ["en"],
+        "config": {"lang": "eng"}}])
+
+# ---------------------------------------------------------------------------- #
+
+
+def test_blank_pages(ocr_config: Config) -> None:
+    """
+    Pages without ink are blank, noise of the scan is not ink, a few lines
+    of text are.
+    """
+    ocr_config.document.blank_pages.enabled = True
+    document = make_document(config=ocr_config)
+
+    assert document._is_blank_image(image=Image.new("RGB", (800, 600),
+                                                    "white"))
+    assert document._is_blank_image(image=get_scan(text=False, noise=5000))
+    assert not document._is_blank_image(image=get_scan(text=True))
+    assert not document._is_blank_image(image=get_scan(text=True,
+                                                       noise=5000))
+
+
+def test_blank_pages_skip_ocr(
+    ocr_config: Config,
+    tmp_path: pathlib.Path
+) -> None:
+    """
+    Blank pages are not passed to the OCR provider, unless the detection is
+    disabled.
+    """
+    filename = tmp_path / "blank.png"
+    get_scan(text=False, noise=5000).save(filename)
+
+    document = make_document(config=ocr_config)
+    document.load(filename=filename)
+
+    assert document.blank == [False]
+    assert [result.text for result in document.ocr] == ["page 0"]
+
+    ocr_config.document.blank_pages.enabled = True
+    document = make_document(config=ocr_config)
+    document.load(filename=filename)
+
+    assert document.blank == [True]
+    assert document.ocr == [OcrResult(text="", words=[])]
+    assert isinstance(document.ocr_provider, RecordingOcr)
+    assert document.ocr_provider.pages == []
+    assert document.metrics.snapshot()["counters"]["blank_pages"] == 1
+
+
+def test_async_ocr_falls_back(ocr_config: Config) -> None:
+    """
+    Pages of concurrent OCR requests that exceed the OCR budget are
+    recognized at a lower resolution, and the time of the requests is
+    charged to the budget.
+    """
+    ocr_config.document.ocr_concurrency = 2
+
+    document = Document(language="en", config=ocr_config)
+    document.ocr_provider = SlowOcr(config={})
+    document.images = [Image.new("RGB", (80, 80)),
+                       Image.new("RGB", (40, 40))]
+    document.blank = [False, False]
+
+    deadline = Deadline(config=DeadlineConfig(ocr=0.3))
+    document._retrieve_ocr(deadline=deadline)
+
+    assert [result.text for result in document.ocr] == ["0:40", "1:40"]
+    assert [(degradation.fallback, degradation.page)
+            for degradation in deadline.degradations] == \
+        [("low_resolution_ocr", 0)]
+    assert deadline.expired(stage="ocr")
+
+
+
+def test_save_pdf(ocr_config: Config, tmp_path: pathlib.Path) -> None:
+    """
+    A PDF keeps its pages, the applied transformations are redacted with
+    their replacement on top, and redacted pages are covered completely.
+    """
+    pymupdf = pytest.importorskip("pymupdf")
+
+    source = tmp_path / "letter.pdf"
+    pdf = pymupdf.open()
+    for text in ["Dear John Doe,", "Secret"]:
+        pdf.new_page(width=300, height=200).insert_text(
+            (50, 100), text, fontsize=12)
+    pdf.save(source)
+    pdf.close()
+
+    # the pages are rasterized at twice the size of the PDF
+    document = make_document(config=ocr_config)
+    document.filename = source
+    document.images = [Image.new("RGB", (600, 400), "white")] * 2
+
+    with pymupdf.open(source) as pdf:
+        words = {word[4]: word[:4] for word in pdf[0].get_text("words")}
+
+    transformations = []
+    for text, applied in [("John", True), ("Doe,", False)]:
+        (x0, y0, x1, y1) = words[text]
+        transformations.append(Transformation(
+            word=Word(text=text, start=0, end=len(text), page=0,
+                      coordinates=Coordinates(
+                          left=round(x0 * 2), top=round(y0 * 2),
+                          width=round((x1 - x0) * 2),
+                          height=round((y1 - y0) * 2))),
+            replacement="Max", applied=applied))
+
+    target = document.save_pdf(
+        filename=tmp_path / "redacted.pdf",
+        transformers={0: TransformerResult(
+            source_text="Dear John Doe,", transformed_text="Dear Max Doe,",
+            transformations=transformations)},
+        redacted=[1])
+
+    with pymupdf.open(target) as pdf:
+        assert pdf.page_count == 2
+        assert pdf[0].get_text(sort=True).split() == ["Dear", "Max", "Doe,"]
+        assert pdf[1].get_text().strip() == ""
+
+
+def test_save_pdf_requires_pdf(
+    ocr_config: Config,
+    tmp_path: pathlib.Path
+) -> None:
+    """
+    Only documents loaded from a PDF can be saved as PDF.
+    """
+    document = make_document(config=ocr_config)
+    document.filename = tmp_path / "letter.png"
+
+    with pytest.raises(Exception, match="Only PDF documents"):
+        document.save_pdf(filename=tmp_path / "letter.pdf", transformers={})
+
+# ---------------------------------------------------------------------------- #
@@ -0,0 +1,126 @@
+# ---------------------------------------------------------------------------- #
+
+import pathlib
+import pytest
+from typing import Any, Callable, List
+
+# ---------------------------------------------------------------------------- #
+
+import pyghost.__main__
+from pyghost.export import JsonlExporter
+from pyghost.manifest import hash_config
+from pyghost.models import Config, GhostResult, TransformerResult
+from pyghost.replay import read_records
+
+# ---------------------------------------------------------------------------- #
+
+PAGES = 3
+
+# ---------------------------------------------------------------------------- #
+
+
+def export_pages(exporter: JsonlExporter, filename: pathlib.Path,
+                 crash: int = PAGES) -> None:
+    """
+    Export empty results for the pages of a file, and crash before a page.
+    """
+    for page in range(PAGES):
+        if page == crash:
+            raise KeyboardInterrupt()
+
+        exporter.write(file=str(filename), page=page, result=GhostResult(
+            matches=[], transformation=TransformerResult(
+                source_text="", transformed_text="", transformations=[])))
+
+# ---------------------------------------------------------------------------- #
+
+
+def test_resume_after_crash(
+    make_config: Callable[..., Config],
+    email_matcher: dict[str, Any],
+    tmp_path: pathlib.Path,
+    monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    A document that crashes in the middle leaves no records in a .jsonl
+    export, so the resumed batch exports each page exactly once.
+    """
+    configfile = tmp_path / "config.json"
+    configfile.write_text(make_config(
+        [email_matcher],
+        ocr=[{"name": "TesseractEN", "module": "pyghost.ocr",
+              "cls": "TesseractOcr", "languages": ["en"],
+              "config": {"lang": "eng"}}]).model_dump_json())
+
+    documents = [tmp_path / f"{name}.png" for name in ("first", "second")]
+    for filename in documents:
+        filename.write_bytes(filename.name.encode())
+
+    export = tmp_path / "matches.jsonl"
+
+    def run(crash: int) -> None:
+        def process(filename: pathlib.Path, exporter: JsonlExporter,
+                    **kwargs: Any) -> List[pathlib.Path]:
+            export_pages(exporter=exporter, filename=filename,
+                         crash=crash if filename == documents[1] else PAGES)
+            return []
+
+        monkeypatch.setattr(pyghost.__main__, "process_document", process)
+        pyghost.__main__.doc(
+            language="en", documents=documents, config=configfile,
+            export_matches=export, manifest=tmp_path / "manifest.db")
+
+    with pytest.raises(KeyboardInterrupt):
+        run(crash=1)
+
+    assert [record.file for record in read_records(filename=export)] == \
+        [str(documents[0])] * PAGES
+
+    run(crash=PAGES)
+
+    assert [(record.file, record.page)
+            for record in read_records(filename=export)] == \
+        [(str(filename), page) for filename in documents
+         for page in range(PAGES)]
+
+
+def test_partial_record_is_removed(tmp_path: pathlib.Path) -> None:
+    """
+    Appending to an export removes a record that has only been written
+    partially.
+    """
+    export = tmp_path / "matches.jsonl"
+
+    with JsonlExporter(filename=export) as exporter:
+        export_pages(exporter=exporter, filename=pathlib.Path("first.png"))
+
+    with export.open("a", encoding="utf-8") as file:
+        file.write('{"file":"second.png","page":0,"mat')
+
+    with JsonlExporter(filename=export, append=True) as exporter:
+        export_pages(exporter=exporter, filename=pathlib.Path("second.png"))
+
+    assert [(record.file, record.page)
+            for record in read_records(filename=export)] == \
+        [(name, page) for name in ("first.png", "second.png")
+         for page in range(PAGES)]
+
+
+def test_config_hash_ignores_switched_off_options(
+    make_config: Callable[..., Config],
+    email_matcher: dict[str, Any]
+) -> None:
+    """
+    Switches that are off do not change the hash of a configuration, so
+    manifests written before a switch was added stay valid.
+    """
+    config = make_config([email_matcher])
+
+    assert hash_config(config=config, language="en", output=None,
+                       vector_pdf=False) == \
+        hash_config(config=config, language="en", output=None)
+    assert hash_config(config=config, language="en", output=None,
+                       vector_pdf=True) != \
+        hash_config(config=config, language="en", output=None)
+
+# ---------------------------------------------------------------------------- #
@@ -0,0 +1,198 @@
+# ---------------------------------------------------------------------------- #
+
+import pytest
+import time
+from typing import Any, Callable, List
+
+# ---------------------------------------------------------------------------- #
+
+from pyghost.deadline import Deadline
+from pyghost.ghost import Ghost
+from pyghost.models import Config, DeadlineConfig, Match, OcrResult
+from pyghost.text import Text
+
+# ---------------------------------------------------------------------------- #
+
+LETTER = [
+    "Dear John Doe, Bar Baz wrote to me at bar@example.com.",
+    "JOHN DOE and John Does are not John Doe's brothers.",
+    "Kind regards, Bar Baz and John Doe",
+]
+
+# ---------------------------------------------------------------------------- #
+
+
+def get_pages(texts: List[str]) -> List[OcrResult]:
+    """
+    Return the OCR results of pages with the given texts.
+    """
+    return [OcrResult(text=text, words=Text().get_words(text=text))
+            for text in texts]
+
+
+def spans(matches: List[Match]) -> List[tuple[str, str, str]]:
+    """
+    Return the matchers, labels and texts of matches.
+    """
+    return [(match.matcher, match.label, match.text) for match in matches]
+
+
+@pytest.fixture
+def make_ghost(
+    make_config: Callable[..., Config],
+    person_matcher: dict[str, Any],
+    email_matcher: dict[str, Any]
+) -> Callable[..., Ghost]:
+    """
+    Return a function that creates a Ghost with the person and email
+    matchers and the given propagation settings.
+    """
+    def make(**propagation: Any) -> Ghost:
+        return Ghost(language="en", config=make_config(
+            [person_matcher, email_matcher],
+            ghost={"propagation": {"enabled": True, **propagation}}))
+
+    return make
+
+# ---------------------------------------------------------------------------- #
+
+
+def test_propagation(make_ghost: Callable[..., Ghost]) -> None:
+    """
+    Texts found on a page are found on pages where no matcher has found
+    them, as whole words, with the label of their source and the words they
+    touch.
+    """
+    ghost = make_ghost(budget_pages=1)
+
+    matches = ghost.find_document_matches(pages=get_pages(LETTER))
+
+    assert spans(matches[0]) == [("PersonMatcher", "person", "John Doe"),
+                                 ("PersonMatcher", "person", "Bar Baz"),
+                                 ("EmailMatcher", "email", "bar@example.com")]
+    assert spans(matches[1]) == [("propagation", "person", "John Doe")]
+    assert spans(matches[2]) == [("propagation", "person", "Bar Baz"),
+                                 ("propagation", "person", "John Doe")]
+
+    assert [[word.text for word in match.touched]
+            for match in matches[1]] == [["John", "Doe's"]]
+    assert ghost.metrics.snapshot()["counters"]["budget_skipped_pages"] == 2
+
+
+def test_propagation_settings(make_ghost: Callable[..., Ghost]) -> None:
+    """
+    Propagation can ignore the case, skip short texts, and be limited to
+    some labels.
+    """
+    pages = get_pages(LETTER)
+
+    matches = make_ghost(budget_pages=1, case_sensitive=False)\
+        .find_document_matches(pages=pages)
+    assert [match.text for match in matches[1]] == ["JOHN DOE", "John Doe"]
+
+    matches = make_ghost(budget_pages=1, min_length=8)\
+        .find_document_matches(pages=pages)
+    assert [match.text for match in matches[2]] == ["John Doe"]
+
+    matches = make_ghost(budget_pages=1, labels=["email"])\
+        .find_document_matches(pages=pages)
+    assert matches[1] == [] and matches[2] == []
+
+
+def test_budget_pages(make_ghost: Callable[..., Ghost]) -> None:
+    """
+    The expensive matchers process all pages without a budget, otherwise
+    the first pages or pages spread over the document.
+    """
+    assert make_ghost().get_budget_pages(pages=10) == set(range(10))
+    assert make_ghost(budget_pages=3).get_budget_pages(pages=10) == \
+        {0, 1, 2}
+    assert make_ghost(budget_pages=3, budget_sample="spread")\
+        .get_budget_pages(pages=10) == {0, 3, 6}
+    assert make_ghost(budget_pages=0).get_budget_pages(pages=10) == set()
+    assert make_ghost(budget_pages=20).get_budget_pages(pages=10) == \
+        set(range(10))
+
+    # a page outside of the budget only gets the regex matches
+    matches = make_ghost(budget_pages=1, budget_sample="first")\
+        .find_document_matches(pages=get_pages(LETTER[::-1]))
+    assert spans(matches[2]) == [("propagation", "person", "John Doe"),
+                                 ("propagation", "person", "Bar Baz"),
+                                 ("EmailMatcher", "email", "bar@example.com")]
+
+
+def test_matchers_fall_back_to_regex(
+    make_ghost: Callable[..., Ghost],
+    monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    If the expensive matchers exceed the budget of the matchers, the pages
+    are matched again without them.
+    """
+    ghost = make_ghost()
+    matcher = ghost.matchers["PersonMatcher"]
+
+    process_segments = matcher.process_segments
+    process = matcher.process
+
+    def slow(function: Callable[..., List[Match]]) -> Callable[..., Any]:
+        def call(**kwargs: Any) -> List[Match]:
+            time.sleep(0.5)
+            return function(**kwargs)
+        return call
+
+    monkeypatch.setattr(matcher, "process_segments", slow(process_segments))
+    monkeypatch.setattr(matcher, "process", slow(process))
+
+    deadline = Deadline(config=DeadlineConfig(document=5.0, matchers=0.2),
+                        metrics=ghost.metrics)
+    matches = ghost.find_document_matches(pages=get_pages(LETTER),
+                                          deadline=deadline)
+
+    assert [spans(page) for page in matches] == [
+        [("EmailMatcher", "email", "bar@example.com")], [], []]
+    assert [degradation.fallback for degradation in deadline.degradations] \
+        == ["regex_only"]
+    assert not deadline.is_redacted(page=0)
+
+
+def test_transform_falls_back_to_labels(
+    make_config: Callable[..., Config],
+    email_matcher: dict[str, Any],
+    monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    If the transformer exceeds the budget of the transformation, the
+    fallback transformer replaces the matches with their labels.
+    """
+    ghost = Ghost(language="en", config=make_config(
+        [email_matcher], transformers=[
+            {"name": "FakerEN", "module": "pyghost.transformers",
+             "cls": "FakerTransformer",
+             "config": {"files": {"email": "../data/fake-email-en.txt"}}},
+            {"name": "Label", "module": "pyghost.transformers",
+             "cls": "LabelTransformer"}]))
+
+    process = ghost.transformer.process
+
+    def slow(**kwargs: Any) -> Any:
+        time.sleep(0.5)
+        return process(**kwargs)
+
+    monkeypatch.setattr(ghost.transformer, "process", slow)
+
+    text = "Mail bar@example.com"
+    words = Text().get_words(text=text)
+    deadline = Deadline(config=DeadlineConfig(document=5.0, transform=0.2),
+                        metrics=ghost.metrics)
+
+    result = ghost.transform_text(
+        text=text, matches=ghost.find_matches(text=text, words=words),
+        words=words, deadline=deadline, page=0)
+
+    assert result.transformed_text == "Mail <email>"
+    assert [(degradation.fallback, degradation.page)
+            for degradation in deadline.degradations] == \
+        [("label_transformer", 0)]
+
+# ---------------------------------------------------------------------------- #
@@ -0,0 +1,26 @@
+# ---------------------------------------------------------------------------- #
+
+import importlib
+import pytest
+
+# ---------------------------------------------------------------------------- #
+
+
+@pytest.mark.parametrize("package, names", [
+    ("pyghost.matchers", ["BaseMatcher", "RegexMatcher", "SpacyMatcher"]),
+    ("pyghost.ocr", ["BaseOcr", "TesseractOcr", "HttpOcr"]),
+    ("pyghost.transformers", ["BaseTransformer", "LabelTransformer",
+                              "FakerTransformer"]),
+])
+def test_star_import(package: str, names: list[str]) -> None:
+    """
+    A star import exports the lazily imported implementations.
+    """
+    namespace: dict[str, object] = {}
+    exec(f"from {package} import *", namespace)
+
+    module = importlib.import_module(package)
+    for name in names:
+        assert namespace[name] is getattr(module, name)
+
+# ---------------------------------------------------------------------------- #
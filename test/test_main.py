@@ -0,0 +1,95 @@
+# ---------------------------------------------------------------------------- #
+
+import json
+import pathlib
+import pytest
+from typing import Any, Callable, List
+
+# ---------------------------------------------------------------------------- #
+
+import pyghost.__main__
+import pyghost.matchers.spacy
+from pyghost.models import Config
+
+# ---------------------------------------------------------------------------- #
+
+
+def test_failed_document_metrics(
+    make_config: Callable[..., Config],
+    email_matcher: dict[str, Any],
+    tmp_path: pathlib.Path,
+    monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    The metrics of a failed document are not added to the breakdown of the
+    next document.
+    """
+    configfile = tmp_path / "config.json"
+    configfile.write_text(make_config(
+        [email_matcher],
+        ocr=[{"name": "TesseractEN", "module": "pyghost.ocr",
+              "cls": "TesseractOcr", "languages": ["en"],
+              "config": {"lang": "eng"}}]).model_dump_json())
+
+    documents = [tmp_path / f"{name}.png" for name in ("first", "second")]
+    for filename in documents:
+        filename.write_bytes(filename.name.encode())
+
+    def process(ghost: Any, filename: pathlib.Path,
+                **kwargs: Any) -> List[pathlib.Path]:
+        ghost.metrics.increment("pages")
+        if filename == documents[0]:
+            raise Exception("Broken document.")
+        return []
+
+    monkeypatch.setattr(pyghost.__main__, "process_document", process)
+
+    profile = tmp_path / "profile.json"
+    with pytest.raises(pyghost.__main__.typer.Exit):
+        pyghost.__main__.doc(
+            language="en", documents=documents, config=configfile,
+            manifest=tmp_path / "manifest.db", profile=profile)
+
+    breakdown = json.loads(profile.read_text())
+    assert [breakdown[str(filename)]["counters"]["pages"]
+            for filename in documents] == [1, 1]
+
+
+def test_segment_cache_saved_on_error(
+    make_config: Callable[..., Config],
+    person_matcher: dict[str, Any],
+    tmp_path: pathlib.Path,
+    monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    The segment cache is saved even if a document raises.
+    """
+    monkeypatch.setattr(pyghost.matchers.spacy.cache, "segments", {})
+
+    cachefile = tmp_path / "segments.json"
+    person_matcher["config"].update(
+        {"segment_cache": True, "segment_cache_file": str(cachefile)})
+
+    configfile = tmp_path / "config.json"
+    configfile.write_text(make_config(
+        [person_matcher],
+        ocr=[{"name": "TesseractEN", "module": "pyghost.ocr",
+              "cls": "TesseractOcr", "languages": ["en"],
+              "config": {"lang": "eng"}}]).model_dump_json())
+
+    filename = tmp_path / "letter.png"
+    filename.write_bytes(b"letter")
+
+    def process(ghost: Any, **kwargs: Any) -> List[pathlib.Path]:
+        ghost.find_matches(text="Dear John Doe", words=[])
+        raise Exception("Broken document.")
+
+    monkeypatch.setattr(pyghost.__main__, "process_document", process)
+
+    with pytest.raises(Exception, match="Broken document."):
+        pyghost.__main__.doc(language="en", documents=[filename],
+                             config=configfile)
+
+    assert len(json.loads(cachefile.read_text())) == 1
+
+# ---------------------------------------------------------------------------- #
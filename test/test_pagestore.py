@@ -0,0 +1,94 @@
+# ---------------------------------------------------------------------------- #
+
+import concurrent.futures
+import multiprocessing
+import numpy
+import pytest
+from PIL import Image, ImageDraw
+from typing import Any
+
+# ---------------------------------------------------------------------------- #
+
+from pyghost.pagestore import PageHandle, PageStore
+
+# ---------------------------------------------------------------------------- #
+
+
+def get_page(mode: str) -> Image.Image:
+    """
+    Return a page with some content in the given mode.
+    """
+    image = Image.new("RGB", (120, 80), "white")
+    ImageDraw.Draw(image).rectangle((10, 10, 50, 30), fill=(200, 40, 10))
+    return image.convert(mode)
+
+
+def redact(handle: PageHandle) -> int:
+    """
+    Draw a black box onto a shared page in a worker process and return the
+    sum of its pixels.
+    """
+    def draw(image: Image.Image) -> None:
+        ImageDraw.Draw(image).rectangle((60, 40, 100, 70), fill="black")
+
+    PageStore.attach(handle=handle, function=draw)
+
+    return PageStore.attach(handle=handle, as_array=True,
+                            function=lambda array: int(array.sum()))
+
+# ---------------------------------------------------------------------------- #
+
+
+@pytest.mark.parametrize("mode", ["RGB", "L", "RGBA"])
+def test_round_trip(mode: str) -> None:
+    """
+    A page put into the store is returned unchanged, as an image and as an
+    array that share the memory of the store.
+    """
+    page = get_page(mode=mode)
+
+    with PageStore() as store:
+        handle = store.put(image=page)
+        assert len(store) == 1
+
+        image = store.image(handle=handle)
+        assert image.size == page.size
+        assert numpy.array_equal(numpy.asarray(image.convert(page.mode)),
+                                 numpy.asarray(page))
+
+        store.array(handle=handle)[0, 0] = 0
+        assert numpy.asarray(image)[0, 0].max() == 0
+
+        del image
+
+    assert len(store) == 0
+
+
+def test_worker_changes_are_shared() -> None:
+    """
+    Changes that a worker process makes to a shared page are visible to the
+    owner, without copying the page.
+    """
+    try:
+        context: Any = multiprocessing.get_context("fork")
+    except ValueError:
+        pytest.skip("The fork start method is not available.")
+
+    with PageStore() as store:
+        handle = store.put(image=get_page(mode="RGB"))
+
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=1, mp_context=context) as pool:
+            total = pool.submit(redact, handle).result()
+
+        array = store.array(handle=handle)
+        assert int(array.sum()) == total
+        assert (array[40:71, 60:101, :3] == 0).all()
+
+        del array
+
+    # the page is gone once the store is closed
+    with pytest.raises(FileNotFoundError):
+        PageStore.attach(handle=handle, function=lambda image: None)
+
+# ---------------------------------------------------------------------------- #
@@ -0,0 +1,135 @@
+# ---------------------------------------------------------------------------- #
+
+import os
+import pathlib
+import pytest
+from PIL import Image
+from typing import Any, Callable
+
+# ---------------------------------------------------------------------------- #
+
+from pyghost.ghost import Ghost
+from pyghost.models import Config, OcrResult
+from pyghost.ocr import BaseOcr
+from pyghost.pool import GhostWorkerPool, _pools
+from pyghost.text import Text
+
+# ---------------------------------------------------------------------------- #
+
+TEXTS = [
+    "Dear John Doe,",
+    "please write to bar@example.com.",
+    "Nothing to see here.",
+    "Regards, Jane Doe",
+]
+
+# ---------------------------------------------------------------------------- #
+
+
+class LetterOcr(BaseOcr):
+    """
+    An OCR provider that reads the first text on every page.
+    """
+
+    def process_image(
+        self,
+        image: Image.Image,
+        page_increment: int = 0
+    ) -> OcrResult:
+        return OcrResult(text=TEXTS[0], words=Text().get_words(text=TEXTS[0]))
+
+# ---------------------------------------------------------------------------- #
+
+
+@pytest.fixture
+def config(
+    make_config: Callable[..., Config],
+    person_matcher: dict[str, Any],
+    email_matcher: dict[str, Any]
+) -> Config:
+    """
+    Return a configuration with the person and email matchers and the
+    letter OCR provider.
+    """
+    return make_config([person_matcher, email_matcher], ocr=[{
+        "name": "LetterOCR", "module": "test_pool", "cls": "LetterOcr",
+        "languages": ["en"], "config": {}}])
+
+
+@pytest.fixture
+def pool(config: Config) -> Any:
+    """
+    Return a pool with two workers.
+    """
+    with GhostWorkerPool(language="en", config=config, workers=2) as pool:
+        yield pool
+
+# ---------------------------------------------------------------------------- #
+
+
+def test_map_texts(config: Config, pool: GhostWorkerPool) -> None:
+    """
+    The workers return the results of the parent process in order.
+    """
+    ghost = Ghost(language="en", config=config)
+
+    expected = []
+    for text in TEXTS:
+        words = Text().get_words(text=text)
+        matches = ghost.find_matches(text=text, words=words)
+        expected.append(ghost.transform_text(
+            text=text, matches=matches, words=words).transformed_text)
+
+    for chunksize in [1, 3]:
+        results = list(pool.map_texts(TEXTS, chunksize=chunksize))
+        assert [result.transformation.transformed_text
+                for result in results] == expected
+        assert [[match.label for match in result.matches]
+                for result in results] == \
+            [["person"], ["email"], [], ["person"]]
+
+
+def test_submit_text(pool: GhostWorkerPool) -> None:
+    """
+    A text is processed in a forked worker.
+    """
+    assert pool._get_executor().submit(os.getpid).result() != os.getpid()
+
+    result = pool.submit_text("Dear John Doe,").result()
+
+    assert [match.text for match in result.matches] == ["John Doe"]
+    assert "John Doe" not in result.transformation.transformed_text
+
+
+def test_documents(pool: GhostWorkerPool, tmp_path: pathlib.Path) -> None:
+    """
+    Documents are loaded, read and pseudonymized in the workers, their
+    results are returned by page.
+    """
+    filenames = []
+    for name in ["first", "second"]:
+        filenames.append(tmp_path / f"{name}.png")
+        Image.new("RGB", (200, 100), "white").save(filenames[-1])
+
+    results = pool.submit_document(filename=filenames[0]).result()
+    assert list(results) == [0]
+    assert [match.text for match in results[0].matches] == ["John Doe"]
+
+    results = list(pool.map_documents(filenames=filenames))
+    assert [list(result) for result in results] == [[0], [0]]
+
+
+def test_close(config: Config) -> None:
+    """
+    A closed pool releases its resources and refuses new tasks.
+    """
+    pool = GhostWorkerPool(language="en", config=config, workers=1)
+    assert id(pool) in _pools
+
+    pool.close()
+
+    assert id(pool) not in _pools
+    with pytest.raises(Exception, match="has been closed"):
+        pool.submit_text("Dear John Doe,")
+
+# ---------------------------------------------------------------------------- #
@@ -0,0 +1,106 @@
+# ---------------------------------------------------------------------------- #
+
+import pathlib
+import pytest
+from typing import Any, Callable
+
+# ---------------------------------------------------------------------------- #
+
+from pyghost.ghost import Ghost
+from pyghost.models import Config, Segment
+from pyghost.text import Text
+
+# ---------------------------------------------------------------------------- #
+
+TEXT = "My name is John Doe and my email is john.doe@example.com."
+
+# ---------------------------------------------------------------------------- #
+
+
+def test_prefilter_without_segments(
+    make_config: Callable[..., Config],
+    person_matcher: dict[str, Any]
+) -> None:
+    """
+    A text without segments (like in the text command) that passes the
+    prefilter must still be processed by the matcher.
+    """
+    person_matcher["prefilter"] = {"min_letters": 3, "capitalized": True}
+    ghost = Ghost(language="en", config=make_config([person_matcher]))
+
+    words = Text().get_words(text=TEXT)
+
+    for segments in (None, []):
+        matches = ghost.find_matches(text=TEXT, words=words,
+                                     segments=segments)
+
+        assert [match.text for match in matches] == ["John Doe"]
+
+
+def test_prefilter_rejects_text(
+    make_config: Callable[..., Config],
+    person_matcher: dict[str, Any]
+) -> None:
+    """
+    A text that fails the prefilter skips the matcher.
+    """
+    person_matcher["prefilter"] = {"min_letters": 100}
+    ghost = Ghost(language="en", config=make_config([person_matcher]))
+
+    matches = ghost.find_matches(text=TEXT, words=Text().get_words(text=TEXT))
+
+    assert matches == []
+    assert ghost.metrics.snapshot()["counters"][
+        "prefilter.PersonMatcher.rejected.letters"] == 1
+
+
+def test_prefilter_passes_segments(
+    make_config: Callable[..., Config],
+    person_matcher: dict[str, Any]
+) -> None:
+    """
+    Only the paragraphs that pass the prefilter are processed.
+    """
+    person_matcher["prefilter"] = {"capitalized": True}
+    ghost = Ghost(language="en", config=make_config([person_matcher]))
+
+    text = "call jane doe\n\nJohn Doe"
+    segments = [Segment(level="paragraph", start=0, end=13),
+                Segment(level="paragraph", start=15, end=23)]
+
+    matches = ghost.find_matches(text=text, words=Text().get_words(text=text),
+                                 segments=segments)
+
+    assert [match.text for match in matches] == ["John Doe"]
+    assert ghost.metrics.snapshot()["counters"][
+        "prefilter.PersonMatcher.skipped"] == 1
+
+
+def test_prefilter_gazetteer_file(
+    make_config: Callable[..., Config],
+    person_matcher: dict[str, Any],
+    tmp_path: pathlib.Path,
+    monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    A relative gazetteer file is read from the working directory, only
+    paragraphs with one of its entries are processed.
+    """
+    (tmp_path / "names.txt").write_text("Doe\n\nSmith\n", encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+
+    person_matcher["prefilter"] = {"gazetteer_file": "names.txt"}
+    ghost = Ghost(language="en", config=make_config([person_matcher]))
+
+    text = "Jane Roe\n\nJohn Doe"
+    segments = [Segment(level="paragraph", start=0, end=8),
+                Segment(level="paragraph", start=10, end=18)]
+
+    matches = ghost.find_matches(text=text, words=Text().get_words(text=text),
+                                 segments=segments)
+
+    assert [match.text for match in matches] == ["John Doe"]
+    assert ghost.metrics.snapshot()["counters"][
+        "prefilter.PersonMatcher.rejected.hits"] == 1
+
+# ---------------------------------------------------------------------------- #
@@ -0,0 +1,102 @@
+# ---------------------------------------------------------------------------- #
+
+import pytest
+from typing import Any, Callable
+
+# ---------------------------------------------------------------------------- #
+
+from pyghost.deadline import Deadline
+from pyghost.ghost import Ghost
+from pyghost.matchers.regex import find_nested_quantifiers
+from pyghost.models import Config, DeadlineConfig, OcrResult
+from pyghost.table import Table
+from pyghost.text import Text
+
+# ---------------------------------------------------------------------------- #
+
+SLOW = "a" * 40 + "b"
+
+# ---------------------------------------------------------------------------- #
+
+
+@pytest.fixture
+def slow_matcher() -> dict[str, Any]:
+    """
+    Return the configuration of a matcher with a catastrophic pattern and a
+    pattern timeout.
+    """
+    pytest.importorskip("regex")
+
+    return {"name": "SlowMatcher", "label": "slow", "cls": "RegexMatcher",
+            "config": {"patterns": ["(a|aa)+$"], "backend": "regex",
+                       "unsafe_patterns": "allow", "pattern_timeout": 0.2}}
+
+
+def test_nested_quantifiers() -> None:
+    """
+    Groups with a variable quantifier that are repeated are reported, unless
+    they are atomic.
+    """
+    assert len(find_nested_quantifiers(pattern="(\\w+\\s?)+@")) == 1
+    assert find_nested_quantifiers(pattern="(?>\\w+\\s?)+@") == []
+    assert find_nested_quantifiers(pattern="[A-Z]{2}[0-9]{2}(?:[ ]?"
+                                           "[0-9]{4}){4}") == []
+
+
+def test_timeout_redacts_text(
+    make_config: Callable[..., Config],
+    slow_matcher: dict[str, Any]
+) -> None:
+    """
+    A text that a pattern cannot scan in time is redacted as a whole.
+    """
+    ghost = Ghost(language="en", config=make_config([slow_matcher]))
+
+    text = f"Call {SLOW} now"
+    words = Text().get_words(text=text)
+
+    matches = ghost.find_matches(text=text, words=words)
+
+    assert [match.label for match in matches] == ["redacted"]
+    assert ghost.transform_text(
+        text=text, matches=matches, words=words).transformed_text == \
+        "<redacted> <redacted> <redacted>"
+
+
+def test_timeout_redacts_page(
+    make_config: Callable[..., Config],
+    slow_matcher: dict[str, Any]
+) -> None:
+    """
+    A page that a pattern cannot scan in time is redacted completely and
+    recorded as a degradation, the other pages are matched as usual.
+    """
+    ghost = Ghost(language="en", config=make_config([slow_matcher]))
+
+    pages = [OcrResult(text=text, words=Text().get_words(text=text))
+             for text in (SLOW, "hello aaa")]
+    deadline = Deadline(config=DeadlineConfig(), metrics=ghost.metrics)
+
+    matches = ghost.find_document_matches(pages=pages, deadline=deadline)
+
+    assert matches[0] == []
+    assert [match.text for match in matches[1]] == ["aaa"]
+    assert deadline.is_redacted(page=0)
+    assert not deadline.is_redacted(page=1)
+
+
+def test_timeout_in_table(
+    make_config: Callable[..., Config],
+    slow_matcher: dict[str, Any]
+) -> None:
+    """
+    If a batch of table values times out, only the value that times out on
+    its own is redacted.
+    """
+    ghost = Ghost(language="en", config=make_config([slow_matcher]))
+
+    assert Table(ghost=ghost, columns=["text"]).transform_values(
+        values=["hello aaa", SLOW, "bye"]) == \
+        ["hello <slow>", "<redacted>", "bye"]
+
+# ---------------------------------------------------------------------------- #
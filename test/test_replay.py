@@ -0,0 +1,123 @@
+# ---------------------------------------------------------------------------- #
+
+import pathlib
+import pytest
+from PIL import Image
+from typing import Callable, List, Optional
+
+# ---------------------------------------------------------------------------- #
+
+from pyghost.document import Document
+from pyghost.ghost import Ghost
+from pyghost.models import Config, GhostRecord
+from pyghost.replay import Replay
+
+# ---------------------------------------------------------------------------- #
+
+
+@pytest.fixture
+def replayer(make_config: Callable[..., Config]) -> Replay:
+    """
+    Return a replay without matchers.
+    """
+    config = make_config(
+        [], ocr=[{"name": "TesseractEN", "module": "pyghost.ocr",
+                  "cls": "TesseractOcr", "languages": ["en"],
+                  "config": {"lang": "eng"}}])
+
+    return Replay(ghost=Ghost(language="en", config=config),
+                  document=Document(language="en", config=config))
+
+
+def get_records(
+    *files: pathlib.Path,
+    pages: int = 1,
+    checksum: Optional[str] = None
+) -> List[GhostRecord]:
+    """
+    Return records for the pages of each file.
+    """
+    return [GhostRecord(file=str(file), page=page, matches=[],
+                        checksum=checksum)
+            for file in files for page in range(pages)]
+
+# ---------------------------------------------------------------------------- #
+
+
+def test_select_by_path(replayer: Replay, tmp_path: pathlib.Path) -> None:
+    """
+    Files with the same name in different directories get their own
+    records.
+    """
+    first = tmp_path / "a" / "scan.png"
+    second = tmp_path / "b" / "scan.png"
+    records = get_records(first, second)
+
+    assert replayer.select(filename=first, records=records) == records[:1]
+    assert replayer.select(filename=second, records=records) == records[1:]
+
+
+def test_select_by_name(replayer: Replay, tmp_path: pathlib.Path) -> None:
+    """
+    A moved file gets the records of the file with its name, unless the
+    name is ambiguous.
+    """
+    moved = tmp_path / "moved" / "scan.png"
+
+    records = get_records(tmp_path / "a" / "scan.png")
+    assert replayer.select(filename=moved, records=records) == records
+
+    records = get_records(tmp_path / "a" / "scan.png",
+                          tmp_path / "b" / "scan.png")
+    with pytest.raises(Exception, match="several files named 'scan.png'"):
+        replayer.select(filename=moved, records=records)
+
+
+def test_select_resumed_batch(
+    replayer: Replay,
+    tmp_path: pathlib.Path
+) -> None:
+    """
+    A file that has been exported again by a resumed batch is replayed with
+    one record per page.
+    """
+    filename = tmp_path / "scan.png"
+    records = get_records(filename, pages=2, checksum="old") + \
+        get_records(filename, pages=2, checksum="old")
+
+    replayer.document.images = [Image.new("RGB", (100, 100))] * 2
+    selected = replayer.select(
+        filename=filename, records=records, checksum="old")
+
+    assert selected == records[2:]
+    assert replayer.validate(
+        filename=filename, records=selected, checksum="old") == []
+
+
+def test_select_changed_file(
+    replayer: Replay,
+    tmp_path: pathlib.Path
+) -> None:
+    """
+    A file that has been changed and processed again is replayed with the
+    records of its current content.
+    """
+    filename = tmp_path / "scan.png"
+    old = get_records(filename, pages=2, checksum="old")
+    new = get_records(filename, pages=1, checksum="new")
+
+    replayer.document.images = [Image.new("RGB", (100, 100))]
+    selected = replayer.select(
+        filename=filename, records=old + new + old[:1], checksum="new")
+
+    assert selected == new
+    assert replayer.validate(
+        filename=filename, records=selected, checksum="new") == []
+
+    # an unknown content is still reported
+    selected = replayer.select(
+        filename=filename, records=old + new, checksum="other")
+    assert replayer.validate(
+        filename=filename, records=selected, checksum="other") != []
+
+# ---------------------------------------------------------------------------- #
@@ -0,0 +1,85 @@
+# ---------------------------------------------------------------------------- #
+
+import time
+from typing import List
+
+# ---------------------------------------------------------------------------- #
+
+from pyghost.models import Match, ResolverConfig
+from pyghost.resolver import MatchResolver
+
+# ---------------------------------------------------------------------------- #
+
+
+def make_match(text: str, start: int, end: int, label: str) -> Match:
+    """
+    Return a match of a span of a text.
+    """
+    return Match(label=label, matcher=label, text=text[start:end],
+                 start=start, end=end)
+
+
+def spans(matches: List[Match]) -> List[tuple[str, str]]:
+    """
+    Return the labels and texts of matches.
+    """
+    return [(match.label, match.text) for match in matches]
+
+# ---------------------------------------------------------------------------- #
+
+
+def test_losers_keep_whole_words() -> None:
+    """
+    A match that is cut by a better match within a word keeps only the
+    whole words outside of the better match.
+    """
+    text = "Call JohnDoe Smith now"
+    resolver = MatchResolver(config=ResolverConfig(
+        policy="label_priority", label_priority=["person"]))
+
+    person = make_match(text, 5, 9, "person")
+    name = make_match(text, 5, 18, "name")
+
+    assert spans(resolver.resolve(text=text, matches=[name, person])) == \
+        [("person", "John"), ("name", "Smith")]
+
+
+def test_fragments_within_a_word_are_dropped() -> None:
+    """
+    A fragment that is only part of a covered word is dropped.
+    """
+    text = "Contact JohnDoe now"
+    resolver = MatchResolver(config=ResolverConfig(
+        policy="label_priority", label_priority=["person"]))
+
+    person = make_match(text, 8, 12, "person")
+    name = make_match(text, 8, 15, "name")
+
+    assert spans(resolver.resolve(text=text, matches=[name, person])) == \
+        [("person", "John")]
+
+
+def test_dense_cluster() -> None:
+    """
+    A dense cluster of overlapping matches is resolved into the uncovered
+    words in reasonable time.
+    """
+    count = 20000
+    text = " ".join(f"w{index:05d}" for index in range(count))
+    resolver = MatchResolver(config=ResolverConfig(policy="longest"))
+
+    # matches of one to three words, each overlapping the next
+    matches = [make_match(text, index * 7, index * 7 + 6 + (index % 3) * 7,
+                          "word")
+               for index in range(count - 2)]
+
+    started = time.perf_counter()
+    result = resolver.resolve(text=text, matches=matches)
+
+    assert time.perf_counter() - started < 5
+    assert " ".join(match.text for match in result) == \
+        text[:max(match.end for match in matches)]
+    assert all(first.end < second.start
+               for first, second in zip(result, result[1:]))
+
+# ---------------------------------------------------------------------------- #
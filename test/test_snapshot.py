@@ -0,0 +1,64 @@
+# ---------------------------------------------------------------------------- #
+
+import pathlib
+import pytest
+from typing import Any, Callable
+
+# ---------------------------------------------------------------------------- #
+
+from pyghost.__main__ import load_snapshot
+from pyghost.models import Config
+from pyghost.snapshot import Snapshot
+from pyghost.transformers import FakerTransformer, LabelTransformer
+
+# ---------------------------------------------------------------------------- #
+
+
+@pytest.fixture
+def snapshotfile(
+    make_config: Callable[..., Config],
+    email_matcher: dict[str, Any],
+    tmp_path: pathlib.Path
+) -> pathlib.Path:
+    """
+    Compile a snapshot with two transformers and save it.
+    """
+    config = make_config(
+        [email_matcher],
+        transformers=[
+            {"name": "Label", "module": "pyghost.transformers",
+             "cls": "LabelTransformer"},
+            {"name": "FakerEN", "module": "pyghost.transformers",
+             "cls": "FakerTransformer",
+             "config": {"files": {"email": "../data/fake-email-en.txt"}}}],
+        ocr=[{"name": "TesseractEN", "module": "pyghost.ocr",
+              "cls": "TesseractOcr", "languages": ["en"],
+              "config": {"lang": "eng"}}])
+
+    filename = tmp_path / "en.snapshot"
+    Snapshot.compile(language="en", config=config).save(filename=filename)
+
+    return filename
+
+
+def test_snapshot_transformer(snapshotfile: pathlib.Path) -> None:
+    """
+    A restored snapshot switches to the requested transformer.
+    """
+    restored = load_snapshot(snapshotfile=snapshotfile, language="en")
+    assert isinstance(restored.ghost.transformer, LabelTransformer)
+
+    restored = load_snapshot(snapshotfile=snapshotfile, language="en",
+                             transformer="FakerEN")
+    assert isinstance(restored.ghost.transformer, FakerTransformer)
+
+
+def test_snapshot_rejects_config(snapshotfile: pathlib.Path) -> None:
+    """
+    A configuration cannot be combined with a snapshot.
+    """
+    with pytest.raises(Exception, match="--config cannot be used"):
+        load_snapshot(snapshotfile=snapshotfile, language="en",
+                      configfile=pathlib.Path("config.json"))
+
+# ---------------------------------------------------------------------------- #
@@ -0,0 +1,135 @@
+# ---------------------------------------------------------------------------- #
+
+import logging
+import pytest
+import spacy
+from typing import Any, List, Tuple
+
+# ---------------------------------------------------------------------------- #
+
+import pyghost.matchers.spacy
+from pyghost.matchers.spacy import SpacyMatcher
+
+# ---------------------------------------------------------------------------- #
+
+NAMES = ["John Doe", "Jane Doe", "Bar Baz"]
+
+# ---------------------------------------------------------------------------- #
+
+
+@pytest.fixture(scope="module")
+def names_model(tmp_path_factory: pytest.TempPathFactory) -> str:
+    """
+    Save a spacy pipeline that recognizes the names and, on its own, the
+    last name 'Doe'. A chunk that starts in the middle of a name finds a
+    partial match that must not be stitched into the result.
+    """
+    nlp = spacy.blank("en")
+    ruler = nlp.add_pipe("entity_ruler")
+    ruler.add_patterns([{"label": "PERSON", "pattern": name}  # type: ignore
+                        for name in NAMES + ["Doe"]])
+
+    path = tmp_path_factory.mktemp("spacy") / "names"
+    nlp.to_disk(path)
+
+    return str(path)
+
+
+def get_text(sentences: int = 60) -> str:
+    """
+    Return a text with names at many different offsets, in sentences and
+    paragraphs of varying length.
+    """
+    parts = []
+    for index in range(sentences):
+        parts.append(f"Note {index}{' very' * (index % 5)} long: "
+                     f"{NAMES[index % 3]} met {NAMES[(index + 1) % 3]}.")
+        if index % 7 == 6:
+            parts.append("\n\n")
+        else:
+            parts.append(" ")
+
+    return "".join(parts)
+
+
+def find(matcher: SpacyMatcher, text: str) -> List[Tuple[int, int, str]]:
+    """
+    Return the spans and texts of the matches of a text.
+    """
+    return sorted((match.start, match.end, match.text)
+                  for match in matcher.process(text=text))
+
+# ---------------------------------------------------------------------------- #
+
+
+@pytest.mark.parametrize("boundary", ["sentence", "paragraph"])
+@pytest.mark.parametrize("size", [60, 97, 250])
+def test_chunks_match_whole_text(
+    names_model: str,
+    boundary: str,
+    size: int
+) -> None:
+    """
+    A text that is split into overlapping chunks has the same matches as the
+    whole text, each found once.
+    """
+    config: dict[str, Any] = {"model": names_model, "labels": ["PERSON"]}
+
+    whole = SpacyMatcher(label="person", name="Whole", config=config)
+    chunked = SpacyMatcher(label="person", name="Chunked", config={
+        **config, "chunk_size": size, "chunk_overlap": 30,
+        "chunk_boundary": boundary})
+
+    text = get_text()
+    chunks = chunked._split_text(text=text)
+
+    assert len(chunks) > 10
+    assert all(first[1] > second[0]
+               for first, second in zip(chunks, chunks[1:]))
+
+    expected = find(whole, text)
+    assert len(expected) == 120
+    assert find(chunked, text) == expected
+
+
+def test_chunks_cover_text(names_model: str) -> None:
+    """
+    Chunks start at the beginning, end at the end of the text, and are
+    never longer than the chunk size.
+    """
+    matcher = SpacyMatcher(label="person", name="Chunked", config={
+        "model": names_model, "chunk_size": 80, "chunk_overlap": 200})
+
+    text = get_text()
+    chunks = matcher._split_text(text=text)
+
+    assert chunks[0][0] == 0 and chunks[-1][1] == len(text)
+    assert all(end - start <= 80 for (start, end) in chunks)
+
+
+def test_segment_cache_conflict(
+    names_model: str,
+    monkeypatch: pytest.MonkeyPatch,
+    caplog: pytest.LogCaptureFixture
+) -> None:
+    """
+    Matchers of the same model share one segment cache, conflicting
+    settings are reported.
+    """
+    monkeypatch.setattr(pyghost.matchers.spacy.cache, "segments", {})
+    config: dict[str, Any] = {"model": names_model, "segment_cache": True}
+
+    first = SpacyMatcher(label="person", name="First", config=config)
+
+    with caplog.at_level(logging.WARNING, logger="pyghost"):
+        same = SpacyMatcher(label="person", name="Same", config=config)
+        assert caplog.records == []
+
+        other = SpacyMatcher(label="person", name="Other", config={
+            **config, "segment_cache_size": 10})
+
+    assert first.segments is same.segments is other.segments
+    assert first.segments is not None and first.segments.capacity == 10000
+    assert "settings of matcher 'Other' are ignored" in caplog.text
+
+# ---------------------------------------------------------------------------- #
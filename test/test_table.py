@@ -0,0 +1,70 @@
+# ---------------------------------------------------------------------------- #
+
+import pathlib
+from typing import Any, Callable
+
+# ---------------------------------------------------------------------------- #
+
+from pyghost.ghost import Ghost
+from pyghost.models import Config
+from pyghost.table import Table
+
+# ---------------------------------------------------------------------------- #
+
+
+def test_match_across_values(make_config: Callable[..., Config]) -> None:
+    """
+    A match that runs across the separator into the next value is clipped
+    to each value instead of being dropped.
+    """
+    matcher: dict[str, Any] = {
+        "name": "NameMatcher", "label": "name", "cls": "RegexMatcher",
+        "config": {"patterns": ["[A-Z][a-z]+(?:\\s+[A-Z][a-z]+)*"]}}
+    ghost = Ghost(language="en", config=make_config([matcher]))
+
+    values = ["Foo", "Bar Baz", "paid"]
+
+    assert Table(ghost=ghost, columns=["name"]).transform_values(
+        values=values) == ["<name>", "<name> <name>", "paid"]
+
+
+def test_values_match_text_mode(
+    make_config: Callable[..., Config],
+    person_matcher: dict[str, Any],
+    email_matcher: dict[str, Any]
+) -> None:
+    """
+    Values are transformed like texts of the text command.
+    """
+    ghost = Ghost(language="en",
+                  config=make_config([person_matcher, email_matcher]))
+
+    values = ["John Doe", "Bar Baz", "jane@example.com", "John Doe"]
+
+    assert Table(ghost=ghost, columns=["name"]).transform_values(
+        values=values) == ["<person> <person>", "<person> <person>",
+                           "<email>", "<person> <person>"]
+
+
+def test_csv(
+    make_config: Callable[..., Config],
+    person_matcher: dict[str, Any],
+    tmp_path: pathlib.Path
+) -> None:
+    """
+    Only the configured columns of a CSV file are processed.
+    """
+    ghost = Ghost(language="en", config=make_config([person_matcher]))
+
+    source = tmp_path / "claims.csv"
+    source.write_text("id,name\n1,John Doe\n2,Bar Baz\n", encoding="utf-8")
+    target = tmp_path / "output.csv"
+
+    rows = Table(ghost=ghost, columns=["name"], chunk_size=1).process(
+        source=source, target=target)
+
+    assert rows == 2
+    assert target.read_text(encoding="utf-8").splitlines() == [
+        "id,name", "1,<person> <person>", "2,<person> <person>"]
+
+# ---------------------------------------------------------------------------- #
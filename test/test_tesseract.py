@@ -0,0 +1,249 @@
+# ---------------------------------------------------------------------------- #
+
+import numpy
+import pytest
+import pytesseract
+from PIL import Image, ImageDraw
+from typing import Any, Callable, List, Tuple
+
+# ---------------------------------------------------------------------------- #
+
+from pyghost.ghost import Ghost
+from pyghost.models import Config, Segment
+from pyghost.ocr import TesseractOcr
+
+# ---------------------------------------------------------------------------- #
+
+# a word of the test page: text, left, top, block, paragraph, line
+PageWord = Tuple[str, int, int, int, int, int]
+
+WIDTH = 60
+HEIGHT = 20
+
+# the output of 'tesseract image - tsv' for a letter with two blocks, the
+# first with two paragraphs, one of them with two lines
+TSV = [
+    (1, 1, 0, 0, 0, 0, -1, ""),
+    (2, 1, 1, 0, 0, 0, -1, ""),
+    (3, 1, 1, 1, 0, 0, -1, ""),
+    (4, 1, 1, 1, 1, 0, -1, ""),
+    (5, 1, 1, 1, 1, 1, 96, "Dear"),
+    (5, 1, 1, 1, 1, 2, 95, "John"),
+    (5, 1, 1, 1, 1, 3, 95, "Doe,"),
+    (4, 1, 1, 1, 2, 0, -1, ""),
+    (5, 1, 1, 1, 2, 1, 91, "thank"),
+    (5, 1, 1, 1, 2, 2, 93, "you."),
+    (3, 1, 1, 2, 0, 0, -1, ""),
+    (4, 1, 1, 2, 1, 0, -1, ""),
+    (5, 1, 1, 2, 1, 1, 90, "Regards,"),
+    (2, 1, 2, 0, 0, 0, -1, ""),
+    (3, 1, 2, 1, 0, 0, -1, ""),
+    (4, 1, 2, 1, 1, 0, -1, ""),
+    (5, 1, 2, 1, 1, 1, 97, "Jane"),
+    (5, 1, 2, 1, 1, 2, 97, "Doe"),
+]
+
+# ---------------------------------------------------------------------------- #
+
+
+def get_page() -> List[PageWord]:
+    """
+    Return the words of a page with a heading across the page and two
+    columns of two paragraphs below it, in Tesseract's reading order.
+    """
+    words = [(f"head{index}", 50 + index * 75, 40, 1, 1, 1)
+             for index in range(8)]
+
+    for block, left in ((2, 50), (3, 450)):
+        top = 100
+        for paragraph in (1, 2):
+            for line in range(1, 7):
+                words += [(f"b{block}p{paragraph}l{line}w{index}",
+                           left + index * 75, top, block, paragraph, line)
+                          for index in range(4)]
+                top += 30
+            top += 20
+
+    return words
+
+
+def draw_page(words: List[PageWord]) -> Image.Image:
+    """
+    Draw every word as a box in a color that encodes its index.
+    """
+    image = Image.new("RGB", (800, 560), "white")
+    draw = ImageDraw.Draw(image)
+
+    for index, (_, left, top, *_) in enumerate(words):
+        draw.rectangle((left, top, left + WIDTH - 1, top + HEIGHT - 1),
+                       fill=(index // 256, index % 256, 128))
+
+    return image
+
+
+def recognize(words: List[PageWord], image: Image.Image) -> Any:
+    """
+    Stand in for Tesseract: return the words that are completely visible in
+    an image (a tile of the page), numbered like Tesseract numbers its
+    blocks, paragraphs and lines in each image.
+    """
+    pixels = numpy.asarray(image.convert("RGB")).astype(int)
+
+    (ys, xs) = numpy.nonzero(pixels[:, :, 2] == 128)
+    indices = pixels[ys, xs, 0] * 256 + pixels[ys, xs, 1]
+
+    visible = {}
+    for index in numpy.unique(indices):
+        selected = indices == index
+        (top, left) = (ys[selected].min(), xs[selected].min())
+
+        if ys[selected].max() - top + 1 == HEIGHT and \
+                xs[selected].max() - left + 1 == WIDTH:
+            visible[int(index)] = (int(left), int(top))
+
+    result: dict[str, List[Any]] = {
+        key: [] for key in ("level", "page_num", "block_num", "par_num",
+                            "line_num", "word_num", "left", "top", "width",
+                            "height", "conf", "text")}
+    numbers: dict[Tuple[int, ...], int] = {}
+
+    def number(key: Tuple[int, ...]) -> int:
+        if key not in numbers:
+            numbers[key] = len([other for other in numbers
+                                if other[:-1] == key[:-1]]) + 1
+        return numbers[key]
+
+    for index in sorted(visible):
+        (text, _, _, block, paragraph, line) = words[index]
+        (left, top) = visible[index]
+
+        block_number = number((block,))
+        paragraph_number = number((block_number, paragraph))
+        line_number = number((block_number, paragraph_number, line))
+
+        for key, value in (("level", 5), ("page_num", 1),
+                           ("block_num", block_number),
+                           ("par_num", paragraph_number),
+                           ("line_num", line_number), ("word_num", 1),
+                           ("left", left), ("top", top), ("width", WIDTH),
+                           ("height", HEIGHT), ("conf", 95), ("text", text)):
+            result[key].append(value)
+
+    return TesseractOcr.TesseractResult(**result)
+
+
+def fake_tesseract(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Replace the Tesseract binary with the TSV output of the test letter.
+    """
+    header = ["level", "page_num", "block_num", "par_num", "line_num",
+              "word_num", "left", "top", "width", "height", "conf", "text"]
+
+    rows = ["\t".join(header)]
+    for index, (*numbers, conf, text) in enumerate(TSV):
+        rows.append("\t".join(str(value) for value in (
+            *numbers, 10 + index * 5, 10, 40, 12, conf, text)))
+
+    module = pytesseract.pytesseract
+    monkeypatch.setattr(module, "get_tesseract_version",
+                        lambda *args, **kwargs: module.TESSERACT_MIN_VERSION)
+    monkeypatch.setattr(module, "run_and_get_output",
+                        lambda *args, **kwargs: "\n".join(rows) + "\n")
+
+# ---------------------------------------------------------------------------- #
+
+
+def test_layout(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Lines are separated by a line break, paragraphs and blocks by an empty
+    line, and all of them are listed as segments.
+    """
+    fake_tesseract(monkeypatch=monkeypatch)
+
+    result = TesseractOcr(config={"lang": "eng"}).process_image(
+        image=Image.new("RGB", (200, 100), "white"), page_increment=3)
+
+    assert result.text == "Dear John Doe,\nthank you.\n\nRegards,\n\n" \
+        "Jane Doe"
+    assert [result.text[word.start:word.end] for word in result.words] == \
+        [text for (*_, text) in TSV if text]
+    assert {word.page for word in result.words} == {1 + 3}
+
+    def texts(level: str) -> List[str]:
+        return [result.text[segment.start:segment.end]
+                for segment in result.segments if segment.level == level]
+
+    assert texts("block") == ["Dear John Doe,\nthank you.\n\nRegards,",
+                              "Jane Doe"]
+    assert texts("paragraph") == ["Dear John Doe,\nthank you.", "Regards,",
+                                  "Jane Doe"]
+    assert texts("line") == ["Dear John Doe,", "thank you.", "Regards,",
+                             "Jane Doe"]
+
+
+def test_layout_is_transformed(
+    monkeypatch: pytest.MonkeyPatch,
+    make_config: Callable[..., Config],
+    person_matcher: dict[str, Any]
+) -> None:
+    """
+    The spacy matcher processes the paragraphs of an OCR result, and the
+    transformed text keeps its line breaks.
+    """
+    fake_tesseract(monkeypatch=monkeypatch)
+
+    result = TesseractOcr(config={"lang": "eng"}).process_image(
+        image=Image.new("RGB", (200, 100), "white"))
+
+    ghost = Ghost(language="en", config=make_config([person_matcher]))
+    matcher = ghost.matchers["PersonMatcher"]
+
+    processed: List[List[Segment]] = []
+    process_segments = matcher.process_segments
+    monkeypatch.setattr(matcher, "process_segments", lambda text, segments:
+                        processed.append(segments) or
+                        process_segments(text=text, segments=segments))
+
+    matches = ghost.find_matches(text=result.text, words=result.words,
+                                 segments=result.segments)
+
+    assert processed == [result.segments]
+    assert [match.text for match in matches] == ["John Doe", "Jane Doe"]
+    assert ghost.transform_text(
+        text=result.text, matches=matches, words=result.words
+    ).transformed_text == "Dear <person> <person>,\nthank you.\n\n" \
+        "Regards,\n\n<person> <person>"
+
+# ---------------------------------------------------------------------------- #
+
+
+@pytest.mark.parametrize("tile_size", [250, 300, 420])
+def test_tiles_keep_layout(
+    monkeypatch: pytest.MonkeyPatch,
+    tile_size: int
+) -> None:
+    """
+    A tiled page is read in the same order and with the same blocks,
+    paragraphs and lines as the whole page, even with several columns.
+    """
+    words = get_page()
+    image = draw_page(words=words)
+
+    untiled = TesseractOcr(config={"lang": "eng"})
+    tiled = TesseractOcr(config={"lang": "eng", "tile_size": tile_size,
+                                 "tile_overlap": 100})
+
+    for ocr in (untiled, tiled):
+        monkeypatch.setattr(ocr, "_recognize",
+                            lambda image: recognize(words=words, image=image))
+
+    expected = untiled.process_image(image=image)
+    result = tiled.process_image(image=image)
+
+    assert tiled.metrics.snapshot()["counters"]["ocr_tiles"] > 1
+    assert result.text == expected.text
+    assert result.segments == expected.segments
+    assert [word.coordinates for word in result.words] == \
+        [word.coordinates for word in expected.words]
+
+# ---------------------------------------------------------------------------- #
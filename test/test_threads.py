@@ -0,0 +1,171 @@
+# ---------------------------------------------------------------------------- #
+
+import concurrent.futures
+import threading
+from typing import Any, Callable, List, Tuple
+
+# ---------------------------------------------------------------------------- #
+
+from pyghost.cache import SegmentCache
+from pyghost.ghost import Ghost
+from pyghost.matchers.spacy import SpacyMatcher
+from pyghost.models import Config
+from pyghost.text import Text
+
+# ---------------------------------------------------------------------------- #
+
+TEXTS = [
+    "My name is John Doe and my email is john.doe@example.com.",
+    "Dear Jane Doe,\n\nplease call Bar Baz.\n\nKind regards, John Doe",
+    "Bar Baz wrote to jane@example.com and bar@example.com.",
+    "Nothing to see here.",
+]
+
+THREADS = 8
+ROUNDS = 25
+
+# ---------------------------------------------------------------------------- #
+
+
+def hammer(
+    ghost: Ghost,
+    function: Callable[[Ghost, str], str]
+) -> List[Tuple[str, str]]:
+    """
+    Process all texts many times from several threads at once, starting all
+    threads together, and return the (text, result) pairs.
+    """
+    barrier = threading.Barrier(THREADS)
+
+    def work(thread: int) -> List[Tuple[str, str]]:
+        barrier.wait()
+        return [(text, function(ghost, text))
+                for round in range(ROUNDS)
+                for text in TEXTS[thread % len(TEXTS):] +
+                TEXTS[:thread % len(TEXTS)]]
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=THREADS) as pool:
+        results = pool.map(work, range(THREADS))
+
+    return [pair for result in results for pair in result]
+
+
+def transform(ghost: Ghost, text: str) -> str:
+    """
+    Find and transform the matches of a text.
+    """
+    words = Text().get_words(text=text)
+    matches = ghost.find_matches(text=text, words=words)
+    return ghost.transform_text(
+        text=text, matches=matches, words=words).transformed_text
+
+# ---------------------------------------------------------------------------- #
+
+
+def test_shared_ghost_is_deterministic(
+    make_config: Callable[..., Config],
+    person_matcher: dict[str, Any],
+    email_matcher: dict[str, Any]
+) -> None:
+    """
+    Concurrent calls of a shared Ghost (with concurrent matchers) return the
+    same results as sequential calls.
+    """
+    config = make_config([person_matcher, email_matcher],
+                         ghost={"max_workers": 4})
+
+    reference = Ghost(language="en", config=config)
+    expected = {text: transform(reference, text) for text in TEXTS}
+    matches = reference.metrics.snapshot()["counters"]["matches"]
+    reference.close()
+
+    ghost = Ghost(language="en", config=config)
+    try:
+        results = hammer(ghost=ghost, function=transform)
+    finally:
+        ghost.close()
+
+    assert len(results) == THREADS * ROUNDS * len(TEXTS)
+    for text, result in results:
+        assert result == expected[text]
+
+    assert ghost.metrics.snapshot()["counters"]["matches"] == \
+        matches * THREADS * ROUNDS
+
+
+def test_shared_memory_is_consistent(
+    make_config: Callable[..., Config],
+    person_matcher: dict[str, Any],
+    email_matcher: dict[str, Any]
+) -> None:
+    """
+    Concurrent calls of a shared Ghost with a pseudonymizing transformer
+    agree on one replacement per text, and the memory holds exactly one
+    entry per replaced text.
+    """
+    config = make_config(
+        [person_matcher, email_matcher],
+        transformers=[{
+            "name": "FakerEN", "module": "pyghost.transformers",
+            "cls": "FakerTransformer",
+            "config": {"files": {"person": "../data/fake-name-en.txt",
+                                 "email": "../data/fake-email-en.txt"},
+                       "memory": True}}],
+        ghost={"max_workers": 4})
+
+    ghost = Ghost(language="en", config=config)
+    try:
+        results = hammer(ghost=ghost, function=transform)
+    finally:
+        ghost.close()
+
+    for text in TEXTS:
+        assert len({result for source, result in results
+                    if source == text}) == 1
+
+    replaced: dict[str, set[str]] = {}
+    for text in TEXTS:
+        for match in ghost.find_matches(
+                text=text, words=Text().get_words(text=text)):
+            replaced.setdefault(match.label, set()).update(
+                ghost.transformer.get_suffix(word.text)[0]
+                for word in match.touched)
+
+    memory = ghost.transformer.memory
+    assert {label: set(texts) for label, texts in memory.items()} == replaced
+
+
+def test_shared_segment_cache(
+    make_config: Callable[..., Config],
+    person_matcher: dict[str, Any]
+) -> None:
+    """
+    Concurrent calls fill the segment cache of a shared spacy matcher with
+    exactly the entities the model finds in each segment.
+    """
+    person_matcher["config"]["segment_cache"] = True
+    ghost = Ghost(language="en", config=make_config([person_matcher]))
+
+    matcher = ghost.matchers["PersonMatcher"]
+    assert isinstance(matcher, SpacyMatcher)
+    assert matcher.model is not None and matcher.segments is not None
+
+    hammer(ghost=ghost, function=transform)
+
+    model = f"{matcher.config.model}@{matcher.model.meta.get('version', '')}"
+    for text in TEXTS:
+        for (start, end) in matcher._split_segments(text=text):
+            segment = text[start:end]
+            entities = matcher.segments.get(
+                SegmentCache.key(model=model, segment=segment))
+
+            assert entities == [
+                (entity.start_char, entity.end_char, entity.label_)
+                for entity in matcher.model(segment).ents]
+
+    counters = ghost.metrics.snapshot()["counters"]
+    assert counters["cache_hits.segments"] + \
+        counters["cache_misses.segments"] == THREADS * ROUNDS * sum(
+            len(matcher._split_segments(text=text)) for text in TEXTS)
+
+# ---------------------------------------------------------------------------- #